@@ -0,0 +1,217 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+# Adaptive injection-rate search for the saturation knee.
+#
+# Instead of the fixed 0.01/0.05/0.1/0.15/0.2 grid, every
+# (topology, routing, traffic) series starts from a few evenly spaced rates
+# and then repeatedly splits the bracket between the highest unsaturated and
+# the lowest saturated rate until it is narrower than --tol.  A rate counts
+# as saturated when the average delay exceeds --delay-factor times the
+# zero-load delay (the delay at the lowest rate), or when the throughput stops
+# growing with the offered load (accepted/offered below --plateau of what it
+# was at the lowest rate).  The open points of all series are launched
+# together as one parallel batch per round.
+
+LOW_RATE = 0.005
+HIGH_RATE = 0.2
+TOLERANCE = 0.005
+INITIAL_POINTS = 4
+POINTS_PER_ROUND = 2
+DELAY_FACTOR = 3.0
+PLATEAU = 0.9
+RATE_DIGITS = 6
+
+FIELDNAMES = [
+    "Topology", "Routing", "Traffic", "Saturation Rate", "Lower Bound", "Upper Bound",
+    "Zero-Load Delay", "Status", "Runs",
+]
+
+
+def is_saturated(rate, metrics, base_rate, base_metrics, delay_factor=DELAY_FACTOR, plateau=PLATEAU):
+    if metrics["Average Delay"] > delay_factor * base_metrics["Average Delay"]:
+        return True
+    base_efficiency = base_metrics["Throughput"] / base_rate
+    return metrics["Throughput"] / rate < plateau * base_efficiency
+
+
+class KneeSearch:
+    # Bracketing/k-section search along the injection rate of one series
+
+    def __init__(self, topology, routing, traffic, low=LOW_RATE, high=HIGH_RATE, tol=TOLERANCE,
+                 initial_points=INITIAL_POINTS, points_per_round=POINTS_PER_ROUND,
+                 delay_factor=DELAY_FACTOR, plateau=PLATEAU):
+        self.topology = topology
+        self.routing = routing
+        self.traffic = traffic
+        self.low = low
+        self.high = high
+        self.tol = tol
+        self.initial_points = max(2, initial_points)
+        self.points_per_round = max(1, points_per_round)
+        self.delay_factor = delay_factor
+        self.plateau = plateau
+        self.results = {}
+        self.failed = set()
+        self.status = "searching"
+
+    def bracket(self):
+        # (highest unsaturated rate, lowest saturated rate), either may be None
+        rates = sorted(self.results)
+        if not rates:
+            return None, None
+        base_rate = rates[0]
+        base = self.results[base_rate]
+        below = above = None
+        for rate in rates:
+            if is_saturated(rate, self.results[rate], base_rate, base, self.delay_factor, self.plateau):
+                above = rate
+                break
+            below = rate
+        return below, above
+
+    def next_rates(self):
+        if self.status != "searching":
+            return []
+        if not self.results:
+            step = (self.high - self.low) / (self.initial_points - 1)
+            return self._fresh(self.low + i * step for i in range(self.initial_points))
+        if self.low not in self.results:
+            self.status = "failed"
+            return []
+
+        below, above = self.bracket()
+        if above is None:
+            self.status = "not saturated"
+            return []
+        if below is None:
+            self.status = "saturated at lowest rate"
+            return []
+        if above - below <= self.tol:
+            self.status = "converged"
+            return []
+        step = (above - below) / (self.points_per_round + 1)
+        rates = self._fresh(below + i * step for i in range(1, self.points_per_round + 1))
+        if not rates:
+            # Every candidate already failed; give up rather than loop forever
+            self.status = "failed"
+        return rates
+
+    def _fresh(self, rates):
+        rates = [round(r, RATE_DIGITS) for r in rates]
+        return [r for r in dict.fromkeys(rates) if r not in self.results and r not in self.failed]
+
+    def record(self, rate, metrics):
+        if metrics is None:
+            self.failed.add(rate)
+        else:
+            self.results[rate] = metrics
+
+    def summary(self):
+        below, above = self.bracket()
+        estimate = None
+        if below is not None and above is not None:
+            estimate = round((below + above) / 2, RATE_DIGITS)
+        zero_load = self.results[min(self.results)]["Average Delay"] if self.results else None
+        return {
+            "Topology": self.topology,
+            "Routing": self.routing,
+            "Traffic": self.traffic,
+            "Saturation Rate": estimate,
+            "Lower Bound": below,
+            "Upper Bound": above,
+            "Zero-Load Delay": zero_load,
+            "Status": self.status,
+            "Runs": len(self.results) + len(self.failed),
+        }
+
+    def curve(self):
+        return [(rate, self.results[rate]) for rate in sorted(self.results)]
+
+
+def run_search(base_config, searches, options, overrides=None, seed=None, progress=print):
+    # Drives all searches to completion, one parallel batch per round
+    from sweep import SweepPoint, run_sweep
+
+    extra = tuple(sorted((overrides or {}).items()))
+    round_no = 0
+    while True:
+        batch = {}
+        for search in searches:
+            for rate in search.next_rates():
+                point = SweepPoint(search.topology, search.routing, search.traffic, rate, seed, extra)
+                batch[point] = search
+        if not batch:
+            return searches
+        round_no += 1
+        if progress:
+            progress(f"Round {round_no}: {len(batch)} simulations")
+        for outcome in run_sweep(base_config, list(batch), options, progress=None):
+            point = outcome["point"]
+            batch[point].record(point.rate, outcome.get("metrics"))
+
+
+def write_summary(searches, output_csv):
+    with open(output_csv, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for search in searches:
+            writer.writerow(search.summary())
+
+
+def main(argv=None):
+    from sweep import (
+        add_run_arguments,
+        default_axes,
+        options_from_args,
+        overrides_from_args,
+        resolve_base,
+        topology_name,
+    )
+
+    parser = argparse.ArgumentParser(description="Locate the saturation injection rate adaptively.")
+    parser.add_argument("base", help="Base config, e.g. configs/mesh_8x8.yaml")
+    parser.add_argument("--routing", nargs="+", help="routing_algorithm values")
+    parser.add_argument("--traffic", nargs="+", help="traffic_distribution values")
+    parser.add_argument("--low", type=float, default=LOW_RATE, help="Lowest injection rate (zero load)")
+    parser.add_argument("--high", type=float, default=HIGH_RATE, help="Highest injection rate")
+    parser.add_argument("--tol", type=float, default=TOLERANCE, help="Width of the final bracket")
+    parser.add_argument("--initial-points", type=int, default=INITIAL_POINTS)
+    parser.add_argument("--points-per-round", type=int, default=POINTS_PER_ROUND)
+    parser.add_argument("--delay-factor", type=float, default=DELAY_FACTOR)
+    parser.add_argument("--plateau", type=float, default=PLATEAU)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="Summary CSV (default: <results-dir>/<topology>_saturation.csv)")
+    add_run_arguments(parser)
+    args = parser.parse_args(argv)
+
+    base = resolve_base(args.base)
+    topology = topology_name(base)
+    with open(base, "r") as f:
+        routings, traffics = default_axes(f.read())
+    searches = [
+        KneeSearch(topology, routing, traffic, args.low, args.high, args.tol,
+                   args.initial_points, args.points_per_round, args.delay_factor, args.plateau)
+        for routing in args.routing or routings
+        for traffic in args.traffic or traffics
+    ]
+
+    start = time.monotonic()
+    run_search(base, searches, options_from_args(args), overrides_from_args(args), args.seed)
+
+    output_csv = args.output or os.path.join(args.results_dir, f"{topology}_saturation.csv")
+    write_summary(searches, output_csv)
+    for search in searches:
+        s = search.summary()
+        print(f"{s['Routing']:>12} {s['Traffic']:<22} saturation ~ {s['Saturation Rate']} "
+              f"[{s['Lower Bound']}, {s['Upper Bound']}] ({s['Status']}, {s['Runs']} runs)")
+    total = sum(search.summary()["Runs"] for search in searches)
+    print(f"{total} simulations in {time.monotonic() - start:.1f}s, summary in {output_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
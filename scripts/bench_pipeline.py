@@ -0,0 +1,345 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from paths import CONFIG_DIR, RESULTS_DIR
+
+# Benchmarks for the extraction, dataset and plotting pipeline.
+#
+# Synthesizes result trees of the requested sizes (1k, 10k, 100k, 1M files)
+# in the layout the sweeps produce: results/<topology>/<name>_rate_<R>_seed_<S>.txt
+# with real Noxim logs from fake_noxim.format_log and a resource usage
+# sidecar next to every log, and every MULTI_RUN_EVERY-th file holding
+# several concatenated runs.  Trees are kept
+# in --work-dir and reused by later benchmark runs.  Each stage runs in a
+# fresh process, and its wall time, throughput and peak RSS (best of
+# --repeat passes) are recorded:
+#   extract              cold extract_results.compile_results (CSV + store)
+#   extract-noop         the same with nothing changed
+#   load                 results_store.load_frame of the whole store
+#   cube                 results_cube.ResultsCube.from_store
+#   plot                 all plot_engine figures, forced
+#   extract-incremental  after rewriting CHANGED_FRACTION of the files
+#   extract-one          after rewriting a single file
+#   plot-incremental     redraw after that change
+# The 100k tree is the scale of a results dir after a few design-space and
+# replication campaigns; only the extraction stages run on it by default
+# (LARGE_SIZE_STAGES), since that is where the per-run cost has to stay
+# proportional to the changed files rather than to the tree.
+# The results are compared against a stored baseline
+# (results/benchmark_baseline.json, written with --save-baseline).  The run
+# fails when a stage got slower or bigger than the baseline by more than
+# --tolerance.
+
+BASELINE_FILE = os.path.join(RESULTS_DIR, "benchmark_baseline.json")
+WORK_DIR = os.path.join(tempfile.gettempdir(), "noxim-bench")
+
+STAGES = ("extract", "extract-noop", "load", "cube", "plot", "extract-incremental", "plot-incremental",
+          "extract-one")
+DEFAULT_SIZES = ("1k", "10k", "100k")
+LARGE_SIZE = 100000
+LARGE_SIZE_STAGES = ("extract", "extract-noop", "extract-one")
+TREE_VERSION = 2
+
+MESH_TOPOLOGIES = ("mesh_4x4", "mesh_8x8", "mesh_10x10")
+DELTA_TOPOLOGIES = ("butterfly", "omega", "baseline")
+RATES = [round(0.005 * i, 3) for i in range(1, 21)]
+MULTI_RUN_EVERY = 10
+CHANGED_FRACTION = 0.01
+
+# Differences below these are noise, whatever the tolerance
+MIN_SECONDS = 0.05
+MIN_RSS_KB = 16 * 1024
+
+
+def parse_size(text):
+    # "10k" -> 10000, "1M" -> 1000000
+    scale = {"k": 1000, "m": 1000000}.get(text[-1:].lower(), 1)
+    return int(float(text.rstrip("kKmM")) * scale)
+
+
+def combinations():
+    # (topology, routing, traffic) of the real sweeps
+    from sweep import DELTA_ROUTING_ALGORITHMS, DELTA_TRAFFIC_PATTERNS, MESH_ROUTING_ALGORITHMS, MESH_TRAFFIC_PATTERNS
+
+    combos = []
+    for topology in MESH_TOPOLOGIES:
+        combos += [(topology, r, t) for r in MESH_ROUTING_ALGORITHMS for t in MESH_TRAFFIC_PATTERNS]
+    for topology in DELTA_TOPOLOGIES:
+        combos += [(topology, r, t) for r in DELTA_ROUTING_ALGORITHMS for t in DELTA_TRAFFIC_PATTERNS]
+    return combos
+
+
+def iter_tree_files(files):
+    # (topology, routing, traffic, rate, seed) of the first `files` points,
+    # seeds outermost so every size covers all combinations
+    combos = combinations()
+    count = 0
+    seed = 1
+    while True:
+        for topology, routing, traffic in combos:
+            for rate in RATES:
+                if count == files:
+                    return
+                yield topology, routing, traffic, rate, seed
+                count += 1
+        seed += 1
+
+
+def synthetic_log(config, config_path, seed, runs):
+    from fake_noxim import format_log, simulate
+
+    reset = int(config.get("reset_time", 1000))
+    sim_time = int(config.get("simulation_time", 10000))
+    return "".join(
+        format_log(config_path, "power.yaml", reset, sim_time, simulate(config, seed * 1000 + run))
+        for run in range(runs)
+    )
+
+
+def point_path(tree, topology, routing, traffic, rate, seed):
+    return os.path.join(tree, topology, f"{topology}_{routing}_{traffic}_rate_{rate}_seed_{seed}.txt")
+
+
+def synthesize_tree(tree, files):
+    # Writes the tree unless a complete one of this size is already there
+    from fake_noxim import read_config
+
+    marker = os.path.join(tree, ".bench_tree.json")
+    try:
+        with open(marker, "r") as f:
+            if json.load(f) == {"files": files, "version": TREE_VERSION}:
+                return False
+    except (FileNotFoundError, ValueError):
+        pass
+    shutil.rmtree(tree, ignore_errors=True)
+
+    configs = {}
+    for i, (topology, routing, traffic, rate, seed) in enumerate(iter_tree_files(files)):
+        if topology not in configs:
+            configs[topology] = read_config(os.path.join(CONFIG_DIR, f"{topology}.yaml"))
+            os.makedirs(os.path.join(tree, topology), exist_ok=True)
+        config = dict(configs[topology], routing_algorithm=routing, traffic_distribution=traffic,
+                      packet_injection_rate=rate)
+        runs = 2 if i % MULTI_RUN_EVERY == MULTI_RUN_EVERY - 1 else 1
+        write_point(point_path(tree, topology, routing, traffic, rate, seed),
+                    synthetic_log(config, f"{topology}.yaml", seed, runs))
+    with open(marker, "w") as f:
+        json.dump({"files": files, "version": TREE_VERSION}, f)
+    return True
+
+
+def write_point(path, log):
+    # The log and the usage sidecar sweep.run_config leaves next to it
+    from resource_usage import write_usage
+
+    with open(path, "w") as f:
+        f.write(log)
+    write_usage(path, {"wall_time": 1.0, "user_cpu": 0.9, "sys_cpu": 0.1, "max_rss_kb": 20000})
+
+
+def change_files(tree, files, fraction=CHANGED_FRACTION):
+    # Rewrites `fraction` of the files (at least one) with new runs; returns
+    # how many
+    from fake_noxim import read_config
+
+    rng = random.Random()
+    points = list(iter_tree_files(files))
+    changed = rng.sample(points, max(1, int(len(points) * fraction)))
+    for topology, routing, traffic, rate, seed in changed:
+        config = dict(read_config(os.path.join(CONFIG_DIR, f"{topology}.yaml")), packet_injection_rate=rate)
+        write_point(point_path(tree, topology, routing, traffic, rate, seed),
+                    synthetic_log(config, f"{topology}.yaml", rng.randrange(1 << 30), 1))
+    return len(changed)
+
+
+def render_all(store, plot_dir, jobs, force):
+    # The figures of plot_results.py per mesh, plot_generate_delta.py and
+    # plot_scripts_iter2.py; returns the number redrawn
+    from plot_engine import DELTA_PLOTS, ROUTING_PLOTS, TOPOLOGY_PLOTS, load_results, render_plots
+
+    df = load_results(store_dir=store, iteration="current")
+    topology = df["Topology"].astype(str)
+    drawn = 0
+    for mesh in MESH_TOPOLOGIES:
+        drawn += len(render_plots(df[topology == mesh], ROUTING_PLOTS, os.path.join(plot_dir, mesh),
+                                  jobs, force, progress=None))
+    drawn += len(render_plots(df[topology.isin(DELTA_TOPOLOGIES)], DELTA_PLOTS, os.path.join(plot_dir, "delta"),
+                              jobs, force, progress=None))
+    drawn += len(render_plots(df, TOPOLOGY_PLOTS, os.path.join(plot_dir, "topology"), jobs, force, progress=None))
+    return drawn
+
+
+def run_stage(stage, tree, files, jobs):
+    # Runs in a fresh process; returns (seconds, items, unit, peak RSS in kB)
+    from extract_results import MANIFEST_NAME, compile_results
+
+    csv_path = os.path.join(tree, ".bench", "compiled.csv")
+    store = os.path.join(tree, ".bench", "dataset")
+    plot_dir = os.path.join(tree, ".bench", "plots")
+    if stage == "extract":
+        shutil.rmtree(os.path.join(tree, ".bench"), ignore_errors=True)
+        os.makedirs(os.path.join(tree, ".bench"))
+        if os.path.exists(os.path.join(tree, MANIFEST_NAME)):
+            os.remove(os.path.join(tree, MANIFEST_NAME))
+    elif stage == "extract-incremental":
+        change_files(tree, files)
+    elif stage == "extract-one":
+        change_files(tree, files, fraction=0)
+    if stage in ("load", "plot", "plot-incremental"):
+        # Library imports are start-up cost, not pipeline cost
+        import pandas  # noqa: F401
+    if stage.startswith("plot"):
+        import plot_engine  # noqa: F401
+
+    start = time.perf_counter()
+    if stage.startswith("extract"):
+        compile_results(tree, csv_path, store_dir=store)
+        items, unit = files, "files"
+    elif stage == "load":
+        from results_store import load_frame
+
+        items, unit = len(load_frame(store)), "rows"
+    elif stage == "cube":
+        from results_cube import ResultsCube
+
+        cube = ResultsCube.from_store(store)
+        items, unit = int(cube.values.size), "cells"
+    else:
+        items, unit = render_all(store, plot_dir, jobs, force=stage == "plot"), "figures"
+    seconds = time.perf_counter() - start
+
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return seconds, items, unit, peak
+
+
+def run_benchmarks(sizes, stages, work_dir, jobs, repeat=3, progress=print, explicit=False):
+    # {size: {stage: {seconds, items, unit, per_second, peak_rss_kb}}}, the
+    # best of `repeat` passes over the stages.  Trees of LARGE_SIZE files and
+    # more only run LARGE_SIZE_STAGES, unless the stages are `explicit`.
+    results = {}
+    context = get_context("spawn")
+    for size in sizes:
+        files = parse_size(size)
+        tree = os.path.join(work_dir, f"tree_{files}")
+        start = time.monotonic()
+        if synthesize_tree(tree, files) and progress:
+            progress(f"Synthesized {files} result files in {time.monotonic() - start:.1f}s ({tree})")
+        best = {}
+        for _ in range(max(1, repeat)):
+            for stage in STAGES:
+                if stage not in stages or (files >= LARGE_SIZE and stage not in LARGE_SIZE_STAGES
+                                           and not explicit):
+                    continue
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    seconds, items, unit, peak = pool.submit(run_stage, stage, tree, files, jobs).result()
+                if stage not in best or seconds < best[stage][0]:
+                    best[stage] = (seconds, items, unit, min(peak, best.get(stage, (0, 0, 0, peak))[3]))
+        results[size] = {
+            stage: {
+                "seconds": round(seconds, 4),
+                "items": items,
+                "unit": unit,
+                "per_second": round(items / seconds, 1) if seconds > 0 else None,
+                "peak_rss_kb": peak,
+            }
+            for stage, (seconds, items, unit, peak) in best.items()
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Stages slower or bigger than the baseline allows, as messages
+    regressions = []
+    for size, stages in results.items():
+        for stage, now in stages.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(stage)
+            if before is None:
+                continue
+            if now["seconds"] > before["seconds"] * (1 + tolerance) + MIN_SECONDS:
+                regressions.append(f"{size} {stage}: {now['seconds']:.3f}s vs {before['seconds']:.3f}s")
+            if now["peak_rss_kb"] > before["peak_rss_kb"] * (1 + tolerance) + MIN_RSS_KB:
+                regressions.append(f"{size} {stage}: peak RSS {now['peak_rss_kb'] / 1024:.0f} MB "
+                                   f"vs {before['peak_rss_kb'] / 1024:.0f} MB")
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, results):
+    # Merges `results` into the baseline, keeping the sizes not run now
+    baseline = load_baseline(path)
+    baseline["host"] = platform.node()
+    baseline["python"] = platform.python_version()
+    for size, stages in results.items():
+        baseline.setdefault("sizes", {}).setdefault(size, {}).update(stages)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def print_results(results, baseline):
+    print(f"{'size':>6} {'stage':<20} {'seconds':>9} {'throughput':>18} {'peak RSS':>9} {'vs baseline':>11}")
+    for size, stages in results.items():
+        for stage, now in stages.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(stage)
+            ratio = f"{now['seconds'] / before['seconds']:.2f}x" if before and before["seconds"] else "-"
+            rate = f"{now['per_second']:.0f} {now['unit']}/s" if now["per_second"] else "-"
+            print(f"{size:>6} {stage:<20} {now['seconds']:>9.3f} {rate:>18} "
+                  f"{now['peak_rss_kb'] / 1024:>6.0f} MB {ratio:>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark extraction, dataset load and plotting on synthetic result trees.")
+    parser.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES),
+                        help="Result files per tree, e.g. 1k 10k 100k 1M")
+    parser.add_argument("--stages", nargs="+", choices=STAGES,
+                        help=f"Stages to run (default: all, only {', '.join(LARGE_SIZE_STAGES)} on trees of "
+                             f"{LARGE_SIZE} files and more)")
+    parser.add_argument("--work-dir", default=WORK_DIR, help="Where the synthetic trees are kept")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Plot workers")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the stages; the best one counts")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown / memory growth over the baseline (fraction)")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.stages or STAGES, args.work_dir, args.jobs, args.repeat,
+                             explicit=args.stages is not None)
+    baseline = load_baseline(args.baseline)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import sys
+
+import numpy as np
+
+from paths import RESULTS_DIR
+
+# Run-time cost model for scheduling sweeps.
+#
+# Predicts the wall time of one simulator run from its resolved config:
+#   log(seconds) = b0 + b1 log(tiles) + b2 log(cycles) + b3 log(buffer_depth)
+#                  + b4 rate + b5 log(rate) + routing offset
+# tiles is mesh_dim_x * mesh_dim_y (n_delta_tiles for the delta networks) and
+# cycles is reset_time + simulation_time.  The coefficients are a ridge fit
+# of the wall times recorded in the runs' .usage.json sidecars
+# (resource_usage.py), shrunk towards PRIOR, so the model still gives a sane
+# ordering before any history exists and follows the data once it does.
+#
+# run_sweep() hands jobs to its workers longest-expected-first (LPT) and
+# refits after every completed run, so the remaining order improves as the
+# sweep goes.  lpt_makespan() packs the predicted costs on the workers the
+# same way to give the predicted makespan of a sweep.
+
+TERMS = ("intercept", "log_tiles", "log_cycles", "log_buffer", "rate", "log_rate")
+# About a microsecond per router-cycle, growing with the load
+PRIOR = np.array([math.log(1e-6), 1.0, 1.0, 0.0, 2.0, 0.1])
+# Weight of the prior, in runs
+PRIOR_WEIGHT = 2.0
+MIN_RATE = 1e-4
+DEFAULT_CYCLES = 11000
+
+
+def config_number(config_text, key, default=None):
+    match = re.search(rf"^{key}:\s*([\d.eE+-]+)", config_text, re.MULTILINE)
+    return float(match.group(1)) if match else default
+
+
+def config_features(config_text):
+    # The cost-relevant parameters of a resolved config
+    topology = re.search(r"^topology:\s*(\w+)", config_text, re.MULTILINE)
+    routing = re.search(r"^routing_algorithm:\s*(\w+)", config_text, re.MULTILINE)
+    if topology and topology.group(1) != "MESH":
+        tiles = config_number(config_text, "n_delta_tiles", 1)
+    else:
+        tiles = config_number(config_text, "mesh_dim_x", 1) * config_number(config_text, "mesh_dim_y", 1)
+    cycles = config_number(config_text, "reset_time", 0) + config_number(config_text, "simulation_time", 0)
+    return {
+        "tiles": int(tiles),
+        "cycles": int(cycles) or DEFAULT_CYCLES,
+        "buffer_depth": int(config_number(config_text, "buffer_depth", 4)),
+        "rate": config_number(config_text, "packet_injection_rate", 0.01),
+        "routing": routing.group(1) if routing else "",
+    }
+
+
+def design_row(features):
+    rate = max(float(features["rate"]), MIN_RATE)
+    return [
+        1.0,
+        math.log(max(features["tiles"], 1)),
+        math.log(max(features["cycles"], 1)),
+        math.log(max(features["buffer_depth"], 1)),
+        rate,
+        math.log(rate),
+    ]
+
+
+class CostModel:
+
+    def __init__(self, samples=()):
+        # samples: (features, wall seconds) of past runs
+        self.rows = []
+        self.routings = []
+        self.targets = []
+        self.coef = PRIOR.copy()
+        self.routing_offset = {}
+        for features, seconds in samples:
+            self.observe(features, seconds, refit=False)
+        self.fit()
+
+    def __len__(self):
+        return len(self.targets)
+
+    def observe(self, features, seconds, refit=True):
+        if not seconds or seconds <= 0:
+            return
+        self.rows.append(design_row(features))
+        self.routings.append(features.get("routing", ""))
+        self.targets.append(math.log(seconds))
+        if refit:
+            self.fit()
+
+    def fit(self):
+        # Ridge regression towards PRIOR, routing offsets towards 0
+        if not self.targets:
+            return
+        names = sorted(set(self.routings))
+        base = np.array(self.rows)
+        onehot = np.array([[r == name for name in names] for r in self.routings], dtype=np.float64)
+        x = np.hstack([base, onehot])
+        prior = np.concatenate([PRIOR, np.zeros(len(names))])
+        penalty = PRIOR_WEIGHT * np.eye(x.shape[1])
+        coef = np.linalg.solve(x.T @ x + penalty, x.T @ np.array(self.targets) + penalty @ prior)
+        self.coef = coef[:len(PRIOR)]
+        self.routing_offset = dict(zip(names, coef[len(PRIOR):].tolist()))
+
+    def predict(self, features):
+        # Expected wall time in seconds
+        return self.predict_row(design_row(features), features.get("routing", ""))
+
+    def predict_row(self, row, routing):
+        return math.exp(float(np.dot(self.coef, row)) + self.routing_offset.get(routing, 0.0))
+
+    def error(self):
+        # Median relative error of the fit on its own history
+        if not self.targets:
+            return None
+        predicted = np.array([self.predict_row(row, routing) for row, routing in zip(self.rows, self.routings)])
+        actual = np.exp(self.targets)
+        return float(np.median(np.abs(predicted - actual) / actual))
+
+    @classmethod
+    def from_results(cls, results_dir=RESULTS_DIR):
+        return cls(iter_history(results_dir))
+
+
+def iter_history(results_dir=RESULTS_DIR):
+    # (features, wall time) of every successful measured run below results_dir
+    from resource_usage import USAGE_SUFFIX
+
+    for directory, subdirs, files in os.walk(results_dir):
+        subdirs[:] = [d for d in subdirs if not d.startswith(".")]
+        for name in files:
+            if not name.endswith(USAGE_SUFFIX):
+                continue
+            try:
+                with open(os.path.join(directory, name), "r") as f:
+                    usage = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if usage.get("features") and usage.get("exit_status") == 0:
+                yield usage["features"], usage.get("wall_time")
+
+
+def lpt_order(items, cost):
+    # Longest expected first
+    return sorted(items, key=cost, reverse=True)
+
+
+def lpt_makespan(costs, workers):
+    # Makespan of handing `costs` to `workers` longest-first, each job going
+    # to the worker that frees up first
+    loads = [0.0] * max(1, workers)
+    for cost in sorted(costs, reverse=True):
+        heapq.heapreplace(loads, loads[0] + cost)
+    return max(loads)
+
+
+def format_seconds(seconds):
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    if seconds >= 60:
+        return f"{seconds / 60:.1f}min"
+    return f"{seconds:.1f}s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the run-time cost model and predict sweep makespans.")
+    parser.add_argument("configs", nargs="*", help="Resolved configs to predict")
+    parser.add_argument("--results-dir", default=RESULTS_DIR, help="History of measured runs")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    model = CostModel.from_results(args.results_dir)
+    error = model.error()
+    print(f"Fitted on {len(model)} runs" + (f", median error {error:.0%}" if error is not None else " (prior only)"))
+    print("  " + "  ".join(f"{term}={value:.3g}" for term, value in zip(TERMS, model.coef)))
+    for routing, offset in sorted(model.routing_offset.items()):
+        print(f"  {routing}: x{math.exp(offset):.2f}")
+
+    costs = []
+    for path in args.configs:
+        with open(path, "r") as f:
+            cost = model.predict(config_features(f.read()))
+        costs.append(cost)
+        print(f"{path}: {format_seconds(cost)}")
+    if costs:
+        print(f"Predicted makespan on {args.jobs} workers: {format_seconds(lpt_makespan(costs, args.jobs))} "
+              f"(serial {format_seconds(sum(costs))})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,604 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from extract_results import DSE_NAME
+from noxim_log import derived_metrics
+from sweep import (
+    RESULTS_DIR,
+    SweepPoint,
+    add_run_arguments,
+    default_axes,
+    options_from_args,
+    overrides_from_args,
+    resolve_base,
+    run_sweep,
+    topology_name,
+)
+
+# Surrogate-guided design-space exploration of the router knobs.
+#
+# The micro-architectural parameters of a config (buffer_depth,
+# n_virtual_channels, dyad_threshold, flit_size, packet sizes) span a grid
+# of 10^5 points per routing/traffic/rate, far too many to simulate.  Every
+# study (one routing, traffic pattern and injection rate) instead starts
+# from a space-filling sample of --initial designs (Latin hypercube or a
+# scrambled Sobol sequence), fits a Gaussian process to the log of each
+# metric and then asks for --batch designs per round: the ones with the
+# highest expected improvement of --objective, or the most uncertain ones
+# with --acquisition uncertainty.  A batch is picked greedily, each pick
+# added to the model at its predicted value ("kriging believer"), and the
+# batches of all studies run as one parallel sweep per round, until every
+# study has run --budget designs.
+#
+# The GP (squared-exponential kernel with one length scale per parameter,
+# tuned on the marginal likelihood) is plain NumPy.  Its leave-one-out
+# error, in closed form, is reported as the predictor's validation error.
+# Runs are ordinary sweep outputs with a "_design_<id>" suffix, under
+# results/dse/ by default so they stay apart from the main sweeps;
+# <topology>_dse.csv lists every design and its metrics and
+# <topology>_dse_model.json keeps the fitted models for "predict".
+
+DSE_DIR = os.path.join(RESULTS_DIR, DSE_NAME)
+
+INITIAL = 8
+BATCH = 4
+BUDGET = 32
+CANDIDATES = 2048
+GRID_LIMIT = 500000
+EI_MARGIN = 0.01
+
+# metric -> +1 to minimize, -1 to maximize
+OBJECTIVES = {
+    "Average Delay": 1,
+    "Throughput": -1,
+    "Energy Per Flit": 1,
+    "Energy Delay Product": 1,
+}
+# Modelled (and validated) for every study, besides the objective
+TARGETS = ("Average Delay", "Throughput")
+
+
+@dataclass(frozen=True)
+class Parameter:
+    name: str
+    # "int", "float", or "pow2" (low/high/step are exponents of 2)
+    kind: str
+    low: float
+    high: float
+    step: float = 1
+
+    @property
+    def levels(self):
+        return int(round((self.high - self.low) / self.step)) + 1
+
+    def value(self, u):
+        # Position in [0, 1) -> config value on the parameter's grid
+        level = self.low + min(int(u * self.levels), self.levels - 1) * self.step
+        if self.kind == "float":
+            return round(level, 6)
+        return 2 ** int(level) if self.kind == "pow2" else int(level)
+
+    def unit(self, value):
+        # Config value -> position in [0, 1] seen by the surrogate
+        level = math.log2(value) if self.kind == "pow2" else value
+        return (level - self.low) / (self.high - self.low) if self.high > self.low else 0.5
+
+    def with_range(self, low, high):
+        if self.kind == "pow2":
+            low, high = math.log2(low), math.log2(high)
+        return Parameter(self.name, self.kind, low, high, self.step)
+
+
+PARAMETERS = {
+    "buffer_depth": Parameter("buffer_depth", "pow2", 1, 5),
+    "n_virtual_channels": Parameter("n_virtual_channels", "int", 1, 4),
+    "dyad_threshold": Parameter("dyad_threshold", "float", 0.1, 0.9, 0.1),
+    "flit_size": Parameter("flit_size", "pow2", 4, 7),
+    "min_packet_size": Parameter("min_packet_size", "int", 2, 16),
+    "max_packet_size": Parameter("max_packet_size", "int", 2, 16),
+}
+
+# Joe and Kuo's Sobol direction numbers (s, a, m) for dimensions 2..10
+SOBOL_DIRECTIONS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+]
+SOBOL_BITS = 30
+
+
+def latin_hypercube(n, dims, rng):
+    # One point per 1/n stratum of every dimension
+    strata = np.argsort(rng.random((dims, n)), axis=1).T
+    return (strata + rng.random((n, dims))) / n
+
+
+def sobol(n, dims, rng):
+    # First n points of a Sobol sequence, randomly digitally shifted
+    if dims > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"Sobol sampling supports at most {len(SOBOL_DIRECTIONS) + 1} parameters")
+    bits = SOBOL_BITS
+    v = np.zeros((dims, bits), dtype=np.int64)
+    v[0] = 1 << (bits - 1 - np.arange(bits))
+    for j in range(1, dims):
+        s, a, m = SOBOL_DIRECTIONS[j - 1]
+        for i in range(bits):
+            if i < s:
+                v[j, i] = m[i] << (bits - 1 - i)
+            else:
+                v[j, i] = v[j, i - s] ^ (v[j, i - s] >> s)
+                for k in range(1, s):
+                    if (a >> (s - 1 - k)) & 1:
+                        v[j, i] ^= v[j, i - k]
+    points = np.zeros((n, dims), dtype=np.int64)
+    x = np.zeros(dims, dtype=np.int64)
+    for i in range(1, n):
+        # Gray code order: flip the direction of the lowest zero bit of i-1
+        c = (i & -i).bit_length() - 1
+        x ^= v[:, c]
+        points[i] = x
+    shift = rng.integers(0, 1 << bits, dims)
+    return (points ^ shift) / float(1 << bits)
+
+
+SAMPLERS = {"lhs": latin_hypercube, "sobol": sobol}
+
+
+def normal_cdf(z):
+    return 0.5 * (1.0 + np.vectorize(math.erf)(z / math.sqrt(2.0)))
+
+
+def normal_pdf(z):
+    return np.exp(-0.5 * z * z) / math.sqrt(2.0 * math.pi)
+
+
+def expected_improvement(mean, sd, best, margin=EI_MARGIN):
+    # For minimization, in the units of `mean`
+    gain = best - mean - margin
+    z = gain / sd
+    return gain * normal_cdf(z) + sd * normal_pdf(z)
+
+
+class GaussianProcess:
+    # Squared-exponential ARD kernel on standardized targets
+
+    def __init__(self, lengthscales, noise):
+        self.lengthscales = np.asarray(lengthscales, dtype=np.float64)
+        self.noise = float(noise)
+
+    def kernel(self, a, b):
+        d = (a[:, None, :] - b[None, :, :]) / self.lengthscales
+        return np.exp(-0.5 * np.einsum("ijk,ijk->ij", d, d))
+
+    def fit(self, X, y):
+        self.X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.mean = float(y.mean())
+        self.scale = float(y.std()) or 1.0
+        self.z = (y - self.mean) / self.scale
+        K = self.kernel(self.X, self.X) + self.noise * np.eye(len(y))
+        self.chol = np.linalg.cholesky(K)
+        self.alpha = np.linalg.solve(self.chol.T, np.linalg.solve(self.chol, self.z))
+        self.log_likelihood = float(-0.5 * self.z @ self.alpha - np.log(np.diag(self.chol)).sum()
+                                    - 0.5 * len(y) * math.log(2 * math.pi))
+        return self
+
+    def predict(self, X, chunk=20000):
+        # (mean, sd) of the latent function, in the units of y
+        means, sds = [], []
+        for start in range(0, len(X), chunk):
+            k = self.kernel(np.asarray(X[start:start + chunk], dtype=np.float64), self.X)
+            v = np.linalg.solve(self.chol, k.T)
+            means.append(k @ self.alpha)
+            sds.append(np.sqrt(np.maximum(1.0 - np.sum(v * v, axis=0), 1e-12)))
+        return (self.mean + self.scale * np.concatenate(means),
+                self.scale * np.concatenate(sds))
+
+    def loo(self):
+        # Leave-one-out predictions of the training targets (units of y)
+        inverse = np.linalg.solve(self.chol.T, np.linalg.solve(self.chol, np.eye(len(self.z))))
+        return self.mean + self.scale * (self.z - self.alpha / np.diag(inverse))
+
+    @classmethod
+    def tune(cls, X, y):
+        # Isotropic grid search, then per-dimension refinement of the
+        # length scales, on the log marginal likelihood
+        X = np.asarray(X, dtype=np.float64)
+        dims = X.shape[1]
+
+        def score(lengthscales, noise):
+            try:
+                return cls(lengthscales, noise).fit(X, y).log_likelihood
+            except np.linalg.LinAlgError:
+                return -np.inf
+
+        best = max(((np.full(dims, ell), noise)
+                    for ell in np.logspace(-1.3, 0.7, 9) for noise in (1e-6, 1e-4, 1e-3, 1e-2, 1e-1)),
+                   key=lambda params: score(*params))
+        lengthscales, noise = best
+        current = score(lengthscales, noise)
+        for _ in range(2):
+            for d in range(dims):
+                for factor in (0.25, 0.5, 2.0, 4.0, 16.0):
+                    trial = lengthscales.copy()
+                    trial[d] = min(trial[d] * factor, 100.0)
+                    value = score(trial, noise)
+                    if value > current:
+                        lengthscales, current = trial, value
+        return cls(lengthscales, noise).fit(X, y)
+
+
+def design_id(values):
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode()).hexdigest()[:8]
+
+
+class Study:
+    # Surrogate-guided search over the parameters for one routing, traffic
+    # pattern and injection rate
+
+    def __init__(self, topology, routing, traffic, rate, parameters, objective="Average Delay"):
+        self.topology = topology
+        self.routing = routing
+        self.traffic = traffic
+        self.rate = rate
+        self.parameters = list(parameters)
+        self.objective = objective
+        # design id -> {"values", "round", "predicted", "metrics"}
+        self.designs = {}
+        self.round = 0
+
+    @property
+    def label(self):
+        return f"{self.routing} {self.traffic} @ {self.rate:g}"
+
+    def values(self, u):
+        values = {p.name: p.value(x) for p, x in zip(self.parameters, u)}
+        if values.get("max_packet_size", math.inf) < values.get("min_packet_size", -math.inf):
+            values["min_packet_size"], values["max_packet_size"] = values["max_packet_size"], values["min_packet_size"]
+        return values
+
+    def features(self, values):
+        return [p.unit(values[p.name]) for p in self.parameters]
+
+    def grid_size(self):
+        return math.prod(p.levels for p in self.parameters)
+
+    def _new(self, samples, count, predicted=None):
+        chosen = []
+        for i, u in enumerate(samples):
+            values = self.values(u)
+            key = design_id(values)
+            if key in self.designs:
+                continue
+            self.designs[key] = {
+                "values": values,
+                "round": self.round,
+                "predicted": None if predicted is None else predicted[i],
+                "metrics": None,
+            }
+            chosen.append(key)
+            if len(chosen) == count:
+                break
+        return chosen
+
+    def propose_initial(self, count, sampler, rng):
+        chosen = self._new(SAMPLERS[sampler](count, len(self.parameters), rng), count)
+        if len(chosen) < count:
+            # Coarse parameters collapse some samples onto the same design
+            chosen += self._new(rng.random((20 * count, len(self.parameters))), count - len(chosen))
+        return chosen
+
+    def training_data(self, metric):
+        rows = [(self.features(d["values"]), d["metrics"][metric])
+                for d in self.designs.values() if d["metrics"] and d["metrics"].get(metric) is not None]
+        X = np.array([x for x, _ in rows], dtype=np.float64).reshape(len(rows), len(self.parameters))
+        y = np.log(np.maximum([value for _, value in rows], 1e-300))
+        return X, y
+
+    def model(self, metric):
+        X, y = self.training_data(metric)
+        return GaussianProcess.tune(X, y) if len(y) >= 2 else None
+
+    def propose(self, count, acquisition, rng):
+        gp = self.model(self.objective)
+        if gp is None:
+            return self.propose_initial(count, "lhs", rng)
+        sign = OBJECTIVES[self.objective]
+        X, y = gp.X, gp.mean + gp.scale * gp.z
+        best = float(np.min(sign * y))
+
+        samples = rng.random((CANDIDATES, len(self.parameters)))
+        candidates = {}
+        for u in samples:
+            values = self.values(u)
+            key = design_id(values)
+            if key not in self.designs:
+                candidates.setdefault(key, values)
+        keys = list(candidates)
+        features = np.array([self.features(candidates[k]) for k in keys]).reshape(len(keys), len(self.parameters))
+
+        chosen = []
+        while keys and len(chosen) < count:
+            mean, sd = gp.predict(features)
+            score = expected_improvement(sign * mean, sd, best) if acquisition == "ei" else sd
+            i = int(np.argmax(score))
+            key = keys.pop(i)
+            self.designs[key] = {
+                "values": candidates[key],
+                "round": self.round,
+                "predicted": float(np.exp(mean[i])),
+                "metrics": None,
+            }
+            chosen.append(key)
+            # Pretend the pick came out as predicted, so the next one goes elsewhere
+            X = np.vstack([X, features[i]])
+            y = np.append(y, mean[i])
+            features = np.delete(features, i, axis=0)
+            gp = GaussianProcess(gp.lengthscales, gp.noise).fit(X, y)
+        return chosen
+
+    def record(self, key, metrics):
+        design = self.designs[key]
+        design["metrics"] = None if metrics is None else {**metrics, **derived_metrics(metrics)}
+
+    def point(self, key, seed=None, overrides=None):
+        values = {**(overrides or {}), **self.designs[key]["values"]}
+        return SweepPoint(self.topology, self.routing, self.traffic, self.rate, seed,
+                          tuple(sorted(values.items())), design=key)
+
+    def metrics(self):
+        return list(dict.fromkeys((self.objective,) + TARGETS))
+
+    def validation(self):
+        # {metric: (model, mean absolute percentage error, samples)}
+        result = {}
+        for metric in self.metrics():
+            gp = self.model(metric)
+            if gp is None or len(gp.z) < 3:
+                continue
+            actual = np.exp(gp.mean + gp.scale * gp.z)
+            error = np.abs(np.exp(gp.loo()) - actual) / np.maximum(actual, 1e-300)
+            result[metric] = (gp, float(np.mean(error)), len(actual))
+        return result
+
+    def best_observed(self):
+        sign = OBJECTIVES[self.objective]
+        done = [d for d in self.designs.values() if d["metrics"] and d["metrics"].get(self.objective) is not None]
+        return min(done, key=lambda d: sign * d["metrics"][self.objective], default=None)
+
+    def best_predicted(self, gp, rng):
+        # Design of the whole grid with the best predicted objective
+        sign = OBJECTIVES[self.objective]
+        if self.grid_size() <= GRID_LIMIT:
+            axes = [(np.arange(p.levels) + 0.5) / p.levels for p in self.parameters]
+            samples = np.array(list(itertools.product(*axes)))
+        else:
+            samples = rng.random((GRID_LIMIT, len(self.parameters)))
+        designs = {}
+        for u in samples:
+            values = self.values(u)
+            designs.setdefault(design_id(values), values)
+        values = list(designs.values())
+        mean, _ = gp.predict(np.array([self.features(v) for v in values]))
+        i = int(np.argmin(sign * mean))
+        return values[i], float(np.exp(mean[i])), len(values)
+
+
+def run_exploration(base_config, studies, options, budget=BUDGET, initial=INITIAL, batch=BATCH,
+                    sampler="lhs", acquisition="ei", overrides=None, seed=None, rng=None, progress=print):
+    # Drives all studies to their budget, one parallel sweep per round
+    rng = rng or np.random.default_rng()
+    round_no = 0
+    while True:
+        points = {}
+        for study in studies:
+            study.round = round_no
+            count = min(budget - len(study.designs), initial if not study.designs else batch)
+            if count <= 0:
+                continue
+            if study.designs:
+                keys = study.propose(count, acquisition, rng)
+            else:
+                keys = study.propose_initial(count, sampler, rng)
+            for key in keys:
+                points[study.point(key, seed, overrides)] = (study, key)
+        if not points:
+            return studies
+        round_no += 1
+        if progress:
+            progress(f"Round {round_no}: {len(points)} simulations")
+        for outcome in run_sweep(base_config, list(points), options, progress=None):
+            study, key = points[outcome["point"]]
+            study.record(key, outcome.get("metrics"))
+
+
+def write_designs(studies, output_csv):
+    names = list(dict.fromkeys(p.name for study in studies for p in study.parameters))
+    metrics = list(OBJECTIVES)
+    fieldnames = ["Routing", "Traffic", "Injection Rate", "Design", "Round"] + names + metrics + [
+        "Objective", "Predicted", "Status",
+    ]
+    tmp_path = output_csv + ".tmp"
+    with open(tmp_path, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for study in studies:
+            for key, design in study.designs.items():
+                row = {
+                    "Routing": study.routing,
+                    "Traffic": study.traffic,
+                    "Injection Rate": study.rate,
+                    "Design": key,
+                    "Round": design["round"],
+                    "Objective": study.objective,
+                    "Predicted": design["predicted"],
+                    "Status": "ok" if design["metrics"] else "failed",
+                    **design["values"],
+                }
+                row.update((m, (design["metrics"] or {}).get(m)) for m in metrics)
+                writer.writerow(row)
+    os.replace(tmp_path, output_csv)
+
+
+def save_models(studies, validations, path):
+    models = {}
+    for study, validation in zip(studies, validations):
+        models[study.label] = {
+            "routing": study.routing,
+            "traffic": study.traffic,
+            "rate": study.rate,
+            "parameters": [[p.name, p.kind, p.low, p.high, p.step] for p in study.parameters],
+            "metrics": {
+                metric: {
+                    "lengthscales": gp.lengthscales.tolist(),
+                    "noise": gp.noise,
+                    "X": gp.X.tolist(),
+                    "y": (gp.mean + gp.scale * gp.z).tolist(),
+                    "error": error,
+                }
+                for metric, (gp, error, _) in validation.items()
+            },
+        }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(models, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def predict(model_path, routing, traffic, rate, values):
+    # {metric: (prediction, low, high, validation error)} from a saved model;
+    # low/high span one standard deviation
+    with open(model_path, "r") as f:
+        models = json.load(f)
+    matches = [m for m in models.values()
+               if m["routing"] == routing and m["traffic"] == traffic and abs(m["rate"] - rate) < 1e-9]
+    if not matches:
+        raise ValueError(f"No model for {routing} {traffic} @ {rate:g} in {model_path}")
+    model = matches[0]
+    parameters = [Parameter(*p) for p in model["parameters"]]
+    missing = [p.name for p in parameters if p.name not in values]
+    if missing:
+        raise ValueError(f"Missing values for {', '.join(missing)}")
+    x = np.array([[p.unit(values[p.name]) for p in parameters]])
+    result = {}
+    for metric, saved in model["metrics"].items():
+        gp = GaussianProcess(saved["lengthscales"], saved["noise"]).fit(saved["X"], saved["y"])
+        mean, sd = gp.predict(x)
+        result[metric] = (math.exp(mean[0]), math.exp(mean[0] - sd[0]), math.exp(mean[0] + sd[0]), saved["error"])
+    return result
+
+
+def parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def select_parameters(names, ranges):
+    parameters = []
+    for name in names:
+        parameter = PARAMETERS[name]
+        if name in ranges:
+            low, _, high = ranges[name].partition(":")
+            parameter = parameter.with_range(parse_value(low), parse_value(high or low))
+        parameters.append(parameter)
+    return parameters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Surrogate-guided exploration of the router parameters.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    explore = sub.add_parser("explore", help="Sample, model and refine the design space")
+    explore.add_argument("base", help="Base config, e.g. configs/mesh_8x8.yaml")
+    explore.add_argument("--routing", nargs="+", help="routing_algorithm values")
+    explore.add_argument("--traffic", nargs="+", help="traffic_distribution values")
+    explore.add_argument("--rates", nargs="+", type=float, default=[0.05], help="packet_injection_rate values")
+    explore.add_argument("--params", nargs="+", choices=list(PARAMETERS), default=list(PARAMETERS),
+                         help="Parameters to explore")
+    explore.add_argument("--range", nargs="+", default=[], metavar="NAME=LOW:HIGH",
+                         help="Narrow or widen a parameter's range, e.g. buffer_depth=2:32")
+    explore.add_argument("--objective", choices=list(OBJECTIVES), default="Average Delay")
+    explore.add_argument("--sampler", choices=sorted(SAMPLERS), default="lhs")
+    explore.add_argument("--acquisition", choices=["ei", "uncertainty"], default="ei")
+    explore.add_argument("--initial", type=int, default=INITIAL, help="Space-filling designs per study")
+    explore.add_argument("--batch", type=int, default=BATCH, help="Designs per study and round")
+    explore.add_argument("--budget", type=int, default=BUDGET, help="Designs per study in total")
+    explore.add_argument("--seed", type=int, help="Simulator seed")
+    explore.add_argument("--sample-seed", type=int, default=0, help="Seed of the sampling")
+    add_run_arguments(explore)
+    explore.set_defaults(results_dir=DSE_DIR)
+    guess = sub.add_parser("predict", help="Predict a design from a saved model")
+    guess.add_argument("model", help="<topology>_dse_model.json")
+    guess.add_argument("--routing", required=True)
+    guess.add_argument("--traffic", required=True)
+    guess.add_argument("--rate", type=float, required=True)
+    guess.add_argument("--set", nargs="+", default=[], metavar="NAME=VALUE")
+    args = parser.parse_args(argv)
+
+    if args.command == "predict":
+        values = {k: parse_value(v) for k, _, v in (item.partition("=") for item in args.set)}
+        for metric, (value, low, high, error) in predict(args.model, args.routing, args.traffic,
+                                                         args.rate, values).items():
+            print(f"{metric:<22} {value:>12.5g}  [{low:.5g}, {high:.5g}]  (LOO error {error:.1%})")
+        return 0
+
+    base = resolve_base(args.base)
+    topology = topology_name(base)
+    with open(base, "r") as f:
+        routings, traffics = default_axes(f.read())
+    parameters = select_parameters(args.params, dict(item.partition("=")[::2] for item in args.range))
+    studies = [
+        Study(topology, routing, traffic, rate, parameters, args.objective)
+        for routing in args.routing or routings
+        for traffic in args.traffic or traffics
+        for rate in args.rates
+    ]
+
+    start = time.monotonic()
+    rng = np.random.default_rng(args.sample_seed)
+    run_exploration(base, studies, options_from_args(args), args.budget, args.initial, args.batch,
+                    args.sampler, args.acquisition, overrides_from_args(args), args.seed, rng)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    output_csv = os.path.join(args.results_dir, f"{topology}_dse.csv")
+    model_path = os.path.join(args.results_dir, f"{topology}_dse_model.json")
+    write_designs(studies, output_csv)
+    validations = [study.validation() for study in studies]
+    save_models(studies, validations, model_path)
+
+    for study, validation in zip(studies, validations):
+        runs = len(study.designs)
+        print(f"\n{study.label}: {runs} designs, {runs / study.grid_size():.2%} of the "
+              f"{study.grid_size()}-point grid")
+        errors = ", ".join(f"{metric} {error:.1%}" for metric, (_, error, _) in validation.items())
+        print(f"  LOO error: {errors or 'too few runs'}")
+        best = study.best_observed()
+        if best:
+            print(f"  best run: {study.objective} {best['metrics'][study.objective]:.5g}  {best['values']}")
+        if study.objective in validation:
+            values, predicted, size = study.best_predicted(validation[study.objective][0], rng)
+            print(f"  best predicted of {size}: {study.objective} {predicted:.5g}  {values}")
+    print(f"\n{sum(len(s.designs) for s in studies)} simulations in {time.monotonic() - start:.1f}s; "
+          f"designs in {output_csv}, models in {model_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
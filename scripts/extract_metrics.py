@@ -1,40 +1,40 @@
+import argparse
 import os
-import re
-import csv
+import sys
+
+from extract_results import FULL_FIDELITY, compile_results
+from paths import RESULTS_DIR
 
 topologies = ["mesh_4x4", "mesh_8x8", "mesh_10x10" ,"butterfly", "baseline", "omega"]
 injection_rates = [0.01, 0.05, 0.1, 0.15, 0.2]
 
-results = []
-
-for topo in topologies:
-    for rate in injection_rates:
-        filename = f"/home/rishi/results/{topo}/{topo}_rate_{rate}.txt"
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                content = f.read()
-
-                # Regex patterns as established previously
-                received = re.search(r"% Total received packets:\s+(\d+)", content)
-                avg_delay = re.search(r"% Global average delay \(cycles\):\s+([\d\.]+)", content)
-                throughput = re.search(r"% Network throughput \(flits/cycle\):\s+([\d\.]+)", content)
-
-                if received and avg_delay and throughput:
-                    results.append({
-                        "Topology": topo,
-                        "Injection Rate": rate,
-                        "Received Packets": int(received.group(1)),
-                        "Average Delay": float(avg_delay.group(1)),
-                        "Throughput": float(throughput.group(1))
-                    })
-
-# Write to CSV
-output_csv = "/home/rishi/results/compiled_results.csv"
-with open(output_csv, 'w', newline='') as csvfile:
-    fieldnames = ["Topology", "Injection Rate", "Received Packets", "Average Delay", "Throughput"]
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    for row in results:
-        writer.writerow(row)
-
-print(f"Results compiled into {output_csv}")
+# Iter 1 runs: <topo>/<topo>_rate_<rate>.txt, only the injection rate varies.
+# Only new or changed result files are parsed, see extract_results.py
+fieldnames = ["Topology", "Injection Rate", "Received Packets", "Average Delay", "Throughput"]
+
+
+def select(r):
+    return (r["Iteration"] == "current" and r["Traffic"] == "" and r["Fidelity"] == FULL_FIDELITY
+            and r["Topology"] in topologies and r["Injection Rate"] in injection_rates)
+
+
+def compile_rate_results(results_dir=RESULTS_DIR, output_csv=None):
+    output_csv = output_csv or os.path.join(results_dir, "compiled_results.csv")
+    compile_results(results_dir, output_csv, fieldnames, select=select,
+                    selection=f"rate runs of {topologies} at {injection_rates}")
+    return output_csv
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the injection-rate-only runs.")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--output", help="Compiled CSV (default: <results-dir>/compiled_results.csv)")
+    args = parser.parse_args(argv)
+
+    output_csv = compile_rate_results(args.results_dir, args.output)
+    print(f"Results compiled into {output_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
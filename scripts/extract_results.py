@@ -0,0 +1,540 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from log_archive import ARCHIVE_NAME, open_archive
+from noxim_log import DERIVED_COLUMNS, METRIC_COLUMNS, derived_metrics, is_complete, iter_runs
+from paths import RESULTS_DIR
+from replication import annotate_replicas
+from resource_usage import USAGE_COLUMNS, USAGE_SUFFIX, read_usage, usage_path
+
+# Incremental metric extraction for the whole results tree.
+#
+# A manifest (SQLite, path -> size, mtime, content hash, parsed records) is
+# kept next to the results.  On every run only the files whose size or mtime
+# changed are read, and of those only the ones whose content hash changed are
+# parsed again; only their rows of the manifest are written.  Every change
+# bumps the manifest's generation, and a compiled CSV remembers the
+# generation it was built at: when no file changed, nothing but the scan
+# itself runs.  Otherwise the CSV is rebuilt from the manifest records, and
+# rewritten only when its content changed.
+# The resource usage of a run (<name>.usage.json, see resource_usage.py) is
+# merged into the run's records.  A sidecar is read when its log changed, or
+# when it appeared or went away since the last scan, which the directory
+# listing tells without a stat per file.
+# Logs kept in the compressed archive of the results dir (log_archive.py)
+# are read from there when their file is no longer in the tree.
+#
+# Understands all the naming schemes used so far:
+#   mesh_4x4_rate_0.1.txt                             (Iter 1)
+#   mesh_8x8_WEST_FIRST_TRAFFIC_SHUFFLE_rate_0.1.txt  (mesh sweeps)
+#   butterfly_DELTA_TRAFFIC_BIT_REVERSAL_rate_0.1.txt (delta sweeps)
+#   ..._rate_0.1_seed_3.txt                           (sweep.py with seeds)
+#   ..._rate_0.1_cycles_1000.txt                      (shortened screening runs)
+#   ..._rate_0.1_design_3f09a2c1.txt                  (design_space.py samples)
+# "Design" is the id of a design-space sample and "" for the base configs, so
+# samples are never pooled with each other or with the base runs.  The
+# samples live under results/dse/, which is left out of the default scan;
+# extract them on purpose with --results-dir results/dse.
+# The "Fidelity" column is "full" for runs at the base config's length and
+# "<N> cycles" for "_cycles_<N>" runs.  Only full-length runs go into the
+# legacy CSVs, and the analysis tools drop the others by default
+# (full_fidelity()); "Refined" marks the full-length runs of points that were
+# screened first (multi_fidelity.py).
+
+MANIFEST_NAME = ".extract_manifest.db"
+# All iterations and columns; compiled_results.csv is the legacy
+# extract_metrics.py output
+OUTPUT_NAME = "all_results.csv"
+STORE_NAME = "dataset"
+DSE_NAME = "dse"
+MANIFEST_VERSION = 8
+CURRENT_ITERATION = "current"
+FULL_FIDELITY = "full"
+# Manifest rows written per transaction while parsing
+WRITE_BATCH = 1000
+
+FIELDNAMES = [
+    "Iteration", "Topology", "Routing", "Traffic", "Injection Rate", "Seed", "Run", "Fidelity", "Design",
+    "Received Packets", "Average Delay", "Throughput",
+] + [c for c in METRIC_COLUMNS if c not in ("Received Packets", "Average Delay", "Throughput")] + DERIVED_COLUMNS + list(
+    USAGE_COLUMNS.values()
+) + [
+    "Replicas", "Delay CI", "Throughput CI", "Refined", "Source",
+]
+
+
+def parse_result_name(filename):
+    # Returns the run parameters encoded in a result file name, or None
+    parts = filename[:-len(".txt")].split("_")
+    if "rate" not in parts:
+        return None
+    rate_index = parts.index("rate")
+    if rate_index == 0 or rate_index + 1 >= len(parts):
+        return None
+    try:
+        rate_val = float(parts[rate_index + 1])
+    except ValueError:
+        return None
+
+    # Optional "_seed_<N>" / "_cycles_<N>" / "_design_<id>" suffixes.  The
+    # simulated cycles are read back from the log itself; the suffix only
+    # tells that the run is not at the base config's length.  Design-space
+    # samples are described by their config and told apart by their id.
+    seed = None
+    fidelity = FULL_FIDELITY
+    design = ""
+    tail = parts[rate_index + 2:]
+    if len(tail) % 2:
+        return None
+    for key, value in zip(tail[::2], tail[1::2]):
+        if key == "design" and value.isalnum():
+            design = value
+            continue
+        if key not in ("seed", "cycles") or not value.isdigit():
+            return None
+        if key == "seed":
+            seed = int(value)
+        else:
+            fidelity = f"{value} cycles"
+
+    # mesh topologies are named mesh_<X>x<Y>, the delta networks by one token
+    head = parts[:rate_index]
+    n_topo = 2 if head[0] == "mesh" and len(head) > 1 else 1
+    topo = "_".join(head[:n_topo])
+    rest = head[n_topo:]
+
+    if "TRAFFIC" in rest:
+        traffic_index = rest.index("TRAFFIC")
+        routing = "_".join(rest[:traffic_index])
+        traffic_pattern = "_".join(rest[traffic_index:])
+    elif rest:
+        return None
+    else:
+        # Iter 1 runs only varied the injection rate
+        routing = traffic_pattern = ""
+
+    return {
+        "Topology": topo,
+        "Routing": routing,
+        "Traffic": traffic_pattern,
+        "Injection Rate": rate_val,
+        "Seed": seed,
+        "Fidelity": fidelity,
+        "Design": design,
+    }
+
+
+def iteration_for(rel_dir):
+    # results/<topology>/x.txt belongs to the current iteration,
+    # results/Iter 1/<topology>/x.txt to "Iter 1"
+    components = [c for c in rel_dir.split(os.sep) if c and c != "."]
+    return components[0] if len(components) > 1 else CURRENT_ITERATION
+
+
+def complete_runs(source):
+    return [run for run in iter_runs(source) if is_complete(run)]
+
+
+def parse_result_file(path, params, iteration, rel_path, runs=None):
+    # One record per complete run in the file (files may hold several).
+    # `runs` are the file's complete runs when they were parsed already.
+    usage = read_usage(path)
+    return [
+        {"Iteration": iteration, **params, **run, **derived_metrics(run), **usage, "Source": rel_path}
+        for run in (complete_runs(path) if runs is None else runs)
+    ]
+
+
+def usage_mtime(path):
+    try:
+        return os.stat(usage_path(path)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def iter_result_dirs(results_dir):
+    # Yields (directory relative to results_dir, [DirEntry of its files]) for
+    # results_dir ("") and the directories below it, skipping hidden
+    # directories (manifest, caches), per-point configs, the columnar store,
+    # the log archive and the design-space runs
+    stack = [("", results_dir)]
+    while stack:
+        rel_dir, directory = stack.pop()
+        files = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name.startswith(".") or entry.name in ("configs", STORE_NAME, ARCHIVE_NAME):
+                        continue
+                    if not rel_dir and entry.name == DSE_NAME:
+                        continue
+                    stack.append((os.path.join(rel_dir, entry.name), entry.path))
+                else:
+                    files.append(entry)
+        yield rel_dir, files
+
+
+def iter_result_files(results_dir):
+    # Yields (relative path, DirEntry) for every .txt file below results_dir
+    for rel_dir, files in iter_result_dirs(results_dir):
+        for entry in files:
+            if entry.name.endswith(".txt"):
+                yield os.path.join(rel_dir, entry.name), entry
+
+
+class Manifest:
+    # One row per log (size, mtime, content hash, mtime of its usage sidecar
+    # and the parsed records as JSON) and one per compiled output (the
+    # generation and content signature it was built at).  Checking for
+    # changes only reads the small columns; records are decoded when needed.
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != MANIFEST_VERSION:
+            self._db.executescript(
+                "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS outputs; DROP TABLE IF EXISTS state;"
+                f" PRAGMA user_version = {MANIFEST_VERSION};"
+            )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT,"
+            " usage_mtime_ns INTEGER, records TEXT)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outputs ("
+            " target TEXT PRIMARY KEY, generation INTEGER, build TEXT, signature TEXT, rows INTEGER)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value INTEGER)")
+
+    def close(self):
+        self._db.close()
+
+    @property
+    def generation(self):
+        row = self._db.execute("SELECT value FROM state WHERE name = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def index(self):
+        # {path: (size, mtime_ns, sha256, usage_mtime_ns)}
+        return {row[0]: row[1:] for row in self._db.execute(
+            "SELECT path, size, mtime_ns, sha256, usage_mtime_ns FROM files")}
+
+    def records(self, path=None):
+        # The records of one file, or of all of them
+        if path is not None:
+            row = self._db.execute("SELECT records FROM files WHERE path = ?", (path,)).fetchone()
+            return json.loads(row[0]) if row else []
+        return [r for (records,) in self._db.execute("SELECT records FROM files") for r in json.loads(records)]
+
+    def source(self, path):
+        # (sha256, usage_mtime_ns) of a file
+        return self._db.execute("SELECT sha256, usage_mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+
+    def apply(self, rows, removed):
+        # Writes the changed rows (path, size, mtime_ns, sha256,
+        # usage_mtime_ns, records) and deletes the removed paths in one
+        # transaction; any change moves the generation on
+        if not rows and not removed:
+            return
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                [row[:5] + (json.dumps(row[5], separators=(",", ":")),) for row in rows],
+            )
+            self._db.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            self._db.execute(
+                "INSERT INTO state VALUES ('generation', 1)"
+                " ON CONFLICT (name) DO UPDATE SET value = value + 1"
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def output(self, target):
+        # (generation, build, signature, rows) an output was last built at
+        return self._db.execute(
+            "SELECT generation, build, signature, rows FROM outputs WHERE target = ?", (target,)
+        ).fetchone()
+
+    def set_output(self, target, generation, build, signature, rows):
+        self._db.execute("INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?)",
+                         (target, generation, build, signature, rows))
+
+
+def load_manifest(path):
+    return Manifest(path)
+
+
+def read_records(path, params, rel_path, runs=None):
+    records = []
+    if params is not None:
+        records = parse_result_file(path, params, iteration_for(os.path.dirname(rel_path)), rel_path, runs)
+    return records
+
+
+def with_usage(records, path):
+    usage = read_usage(path)
+    for record in records:
+        record.update(usage)
+    return records
+
+
+def update_manifest(results_dir, manifest):
+    # Brings the manifest in line with the files on disk.  Returns the number
+    # of (parsed, touched, removed) files; all 0 when nothing changed.
+    known = manifest.index()
+    seen = set()
+    sidecars = set()
+    rows = []
+    parsed = touched = 0
+    logs = []
+    for rel_dir, entries in iter_result_dirs(results_dir):
+        prefix = rel_dir + os.sep if rel_dir else ""
+        for entry in entries:
+            if entry.name.endswith(".txt"):
+                logs.append((prefix + entry.name, entry))
+            elif entry.name.endswith(USAGE_SUFFIX):
+                # Relative path of the log the sidecar belongs to
+                sidecars.add(prefix + entry.name[:-len(USAGE_SUFFIX)] + ".txt")
+
+    for rel_path, entry in logs:
+        seen.add(rel_path)
+        has_usage = rel_path in sidecars
+        st = entry.stat()
+        size, mtime_ns, sha256, usage_mtime_ns = known.get(rel_path, (None,) * 4)
+        if size == st.st_size and mtime_ns == st.st_mtime_ns:
+            if has_usage != (usage_mtime_ns is not None):
+                # Only its resource usage sidecar appeared or went away
+                records = with_usage(manifest.records(rel_path), entry.path)
+                rows.append((rel_path, size, mtime_ns, sha256, usage_mtime(entry.path), records))
+                touched += 1
+            continue
+
+        digest = file_digest(entry.path)
+        if sha256 == digest:
+            # Touched but unchanged, its sidecar may have been rewritten
+            records = manifest.records(rel_path)
+            new_usage_mtime_ns = usage_mtime(entry.path)
+            if new_usage_mtime_ns != usage_mtime_ns:
+                with_usage(records, entry.path)
+            rows.append((rel_path, st.st_size, st.st_mtime_ns, digest, new_usage_mtime_ns, records))
+            touched += 1
+            continue
+
+        records = read_records(entry.path, parse_result_name(entry.name), rel_path)
+        rows.append((rel_path, st.st_size, st.st_mtime_ns, digest, usage_mtime(entry.path), records))
+        parsed += 1
+        if len(rows) >= WRITE_BATCH:
+            manifest.apply(rows, [])
+            rows.clear()
+
+    archive = open_archive(results_dir)
+    if archive is not None:
+        archived_parsed, archived_touched = update_from_archive(results_dir, archive, known, manifest, seen,
+                                                                sidecars, rows)
+        archive.close()
+        parsed += archived_parsed
+        touched += archived_touched
+
+    removed = [path for path in known if path not in seen]
+    manifest.apply(rows, removed)
+    return parsed, touched, len(removed)
+
+
+def update_from_archive(results_dir, archive, known, manifest, seen, sidecars, rows):
+    # Manifest rows for the archived logs that are not in the tree any more.
+    # Changed ones are decompressed in storage order and parsed from memory.
+    # Returns (parsed, touched).
+    changed = {}
+    touched = 0
+    for rel_path, digest, _ in archive.runs():
+        if rel_path in seen or rel_path.split("/", 1)[0] == DSE_NAME:
+            continue
+        seen.add(rel_path)
+        size, _, sha256, usage_mtime_ns = known.get(rel_path, (None,) * 4)
+        if sha256 == digest:
+            path = os.path.join(results_dir, rel_path)
+            if (usage_mtime_ns is not None) != (rel_path in sidecars):
+                records = with_usage(manifest.records(rel_path), path)
+                rows.append((rel_path, size, None, digest, usage_mtime(path), records))
+                touched += 1
+            continue
+        changed.setdefault(digest, []).append(rel_path)
+
+    for digest, data in archive.read_many(changed):
+        runs = complete_runs(data.splitlines(keepends=True))
+        for rel_path in changed[digest]:
+            path = os.path.join(results_dir, rel_path)
+            records = read_records(path, parse_result_name(os.path.basename(rel_path)), rel_path, runs)
+            rows.append((rel_path, len(data), None, digest, usage_mtime(path), records))
+    return sum(len(paths) for paths in changed.values()), touched
+
+
+def fidelity_key(record):
+    return (
+        record["Iteration"], record["Topology"], record["Routing"], record["Traffic"],
+        record["Injection Rate"], record["Seed"], record.get("Design"),
+    )
+
+
+def annotate_refined(records):
+    # "Refined" is set on the full-length runs of points that also have
+    # shorter runs, i.e. the points multi_fidelity.py promoted
+    screened = {fidelity_key(r) for r in records if r["Fidelity"] != FULL_FIDELITY}
+    for record in records:
+        record["Refined"] = record["Fidelity"] == FULL_FIDELITY and fidelity_key(record) in screened
+    return records
+
+
+def full_fidelity(df):
+    # The rows of a compiled frame that come from full-length runs, so
+    # screening runs are not averaged with them.  Frames without a Fidelity
+    # column are returned as they are.
+    if "Fidelity" not in df.columns:
+        return df
+    return df[df["Fidelity"].astype(str) == FULL_FIDELITY]
+
+
+def manifest_records(manifest):
+    # All parsed records, with the replica statistics of their point
+    records = manifest.records()
+    annotate_replicas(records)
+    annotate_refined(records)
+    records.sort(key=lambda r: (
+        r["Iteration"], r["Topology"], r["Routing"], r["Traffic"], r["Design"],
+        r["Injection Rate"], r["Seed"] if r["Seed"] is not None else -1, r["Run"],
+    ))
+    return records
+
+
+def write_csv(records, output_csv, fieldnames=FIELDNAMES):
+    tmp_path = output_csv + ".tmp"
+    with open(tmp_path, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for row in records:
+            writer.writerow(row)
+    os.replace(tmp_path, output_csv)
+
+
+def output_signature(records, index, fieldnames):
+    # Identifies the content of a compiled CSV by the files (and resource
+    # usage sidecars) it was built from; Refined depends on other files.
+    # `index` is Manifest.index().
+    h = hashlib.sha256(json.dumps(fieldnames).encode())
+    for record in records:
+        _, _, sha256, usage_mtime_ns = index[record["Source"]]
+        h.update(f"{sha256}:{usage_mtime_ns}:{record['Refined']}".encode())
+    return h.hexdigest()
+
+
+def extract(results_dir=RESULTS_DIR, manifest_path=None):
+    # Updates the manifest of results_dir and returns all parsed records
+    manifest = load_manifest(manifest_path or os.path.join(results_dir, MANIFEST_NAME))
+    try:
+        update_manifest(results_dir, manifest)
+        return manifest_records(manifest)
+    finally:
+        manifest.close()
+
+
+def compile_results(results_dir, output_csv, fieldnames=FIELDNAMES, select=None, store_dir=None, selection=None):
+    # Extracts new/changed runs and rewrites output_csv if its content would
+    # change.  `select` optionally filters the records that end up in the CSV;
+    # `selection` names that filter (e.g. the command line options it was
+    # built from), so that a CSV last built by the same filter is known to be
+    # up to date as long as no file changed.  Without it, a CSV with a
+    # `select` is checked against its records every time.  Several compiled
+    # CSVs can share one manifest, each one remembers which files it was last
+    # built from.  With store_dir, the columnar results store
+    # (results_store.py) is kept in sync with all records as well.
+    # Returns (rows in the CSV, written).
+    manifest = load_manifest(os.path.join(results_dir, MANIFEST_NAME))
+    try:
+        update_manifest(results_dir, manifest)
+        generation = manifest.generation
+        output_key = os.path.abspath(output_csv)
+        build = json.dumps([fieldnames, selection if select is not None else ""])
+        output = manifest.output(output_key)
+        csv_current = (output is not None and output[:2] == (generation, build) and os.path.exists(output_csv)
+                       and (select is None or selection is not None))
+        store_key = None if store_dir is None else os.path.abspath(store_dir)
+        store_current = store_dir is None or (
+            (manifest.output(store_key) or (None,))[0] == generation
+            and os.path.exists(os.path.join(store_dir, "schema.json"))
+        )
+        if csv_current and store_current:
+            # Nothing changed since both were built
+            return output[3], False
+
+        index = manifest.index()
+        all_records = manifest_records(manifest)
+        records = all_records
+        if select is not None:
+            records = [r for r in records if select(r)]
+        signature = output_signature(records, index, fieldnames)
+        written = output is None or output[2] != signature or not os.path.exists(output_csv)
+        if written:
+            write_csv(records, output_csv, fieldnames)
+        manifest.set_output(output_key, generation, build, signature, len(records))
+
+        if not store_current:
+            signature = output_signature(all_records, index, ["store"] + FIELDNAMES)
+            store = manifest.output(store_key)
+            if store is None or store[2] != signature or not os.path.exists(os.path.join(store_dir, "schema.json")):
+                from results_store import write_store
+
+                write_store(all_records, store_dir)
+            manifest.set_output(store_key, generation, "store", signature, len(all_records))
+        return len(records), written
+    finally:
+        manifest.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally extract metrics from Noxim result logs.")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--output", help=f"Compiled CSV (default: <results-dir>/{OUTPUT_NAME})")
+    parser.add_argument("--topologies", nargs="+", help="Only keep these topologies in the CSV")
+    parser.add_argument("--iteration", help="Only keep this iteration (e.g. 'current', 'Iter 1')")
+    parser.add_argument("--store", help="Columnar results store (default: <results-dir>/dataset)")
+    parser.add_argument("--no-store", action="store_true", help="Only write the CSV")
+    args = parser.parse_args(argv)
+
+    output_csv = args.output or os.path.join(args.results_dir, OUTPUT_NAME)
+    store_dir = None if args.no_store else (args.store or os.path.join(args.results_dir, STORE_NAME))
+
+    def select(record):
+        if args.topologies and record["Topology"] not in args.topologies:
+            return False
+        if args.iteration and record["Iteration"] != args.iteration:
+            return False
+        return True
+
+    start = time.perf_counter()
+    rows, written = compile_results(args.results_dir, output_csv, select=select, store_dir=store_dir,
+                                    selection=json.dumps([args.topologies, args.iteration]))
+    elapsed = (time.perf_counter() - start) * 1000
+    state = "updated" if written else "unchanged"
+    print(f"Compiled results {state}: {rows} rows in {output_csv} ({elapsed:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
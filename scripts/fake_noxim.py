@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+import math
+import os
+import random
+import re
+import sys
+import time
+
+# Stand-in for the Noxim binary, for exercising the sweep tooling without a
+# SystemC build.  Accepts the same "-config <file> -power <file> [-seed N]"
+# arguments and prints a log in Noxim's format, with metrics from a crude
+# load/latency model of the configured topology.
+#
+# FAKE_NOXIM_SLEEP=<seconds> makes every run take that long, which is handy
+# when checking concurrency and timeouts.
+#
+# With detailed: true / show_buffer_stats: true the per-router report and
+# buffer statistics are printed as well, with routers loaded according to
+# the traffic pattern (center for random traffic, the anti-diagonal for
+# transposes, the middle tiles for TRAFFIC_HOTSPOT).
+
+BANNER = """\t--------------------------------------------
+\t\tNoxim - the NoC Simulator
+\t\t(C) University of Catania
+\t--------------------------------------------
+Catania V., Mineo A., Monteleone S., Palesi M., and Patti D. (2016) Cycle-Accurate Network on Chip Simulation with Noxim. ACM Trans. Model. Comput. Simul. 27, 1, Article 4 (August 2016), 25 pages. DOI: https://doi.org/10.1145/2953878
+
+"""
+
+
+def read_config(path):
+    # Only the flat top-level keys are needed here
+    config = {}
+    with open(path, "r") as f:
+        for line in f:
+            match = re.match(r"^(\w+):\s*(\S+)", line)
+            if match:
+                config[match.group(1)] = match.group(2).strip('"')
+    return config
+
+
+def simulate(config, seed):
+    rng = random.Random(seed)
+    topology = config.get("topology", "MESH")
+    dim_x = int(config.get("mesh_dim_x", 4))
+    dim_y = int(config.get("mesh_dim_y", 4))
+    if topology == "MESH":
+        nodes = dim_x * dim_y
+        hops = (dim_x + dim_y) / 3.0
+        saturation = 0.38 / max(dim_x, dim_y) ** 1.5
+    else:
+        nodes = int(config.get("n_delta_tiles", 8))
+        hops = max(1, nodes.bit_length() - 1)
+        saturation = 0.035
+    rate = float(config.get("packet_injection_rate", 0.01))
+    packet_size = (int(config.get("min_packet_size", 8)) + int(config.get("max_packet_size", 8))) / 2.0
+    cycles = int(config.get("simulation_time", 10000)) - int(config.get("stats_warm_up_time", 1000))
+
+    # Deeper buffers and more virtual channels push saturation out a bit,
+    # DYAD pays for a threshold far from its sweet spot
+    saturation *= min(int(config.get("buffer_depth", 4)), 16) ** 0.25 / 4 ** 0.25
+    saturation *= 1.0 + 0.15 * (int(config.get("n_virtual_channels", 1)) - 1)
+    if config.get("routing_algorithm") == "DYAD":
+        saturation *= 1.0 - 0.4 * (float(config.get("dyad_threshold", 0.6)) - 0.6) ** 2
+
+    load = min(rate / saturation, 0.9)
+    accepted = min(rate, saturation)
+    delay = (hops + packet_size) / (1.0 - load)
+    if rate > saturation:
+        delay += cycles * 0.35 * (1.0 - math.exp(-(rate - saturation) / saturation))
+    delay *= rng.uniform(0.97, 1.03)
+    packets = int(accepted * nodes * cycles * rng.uniform(0.98, 1.02))
+    flits = int(packets * packet_size)
+    throughput = flits / float(cycles)
+    dynamic = flits * 2.2e-11 * int(config.get("flit_size", 32)) / 32.0
+    static = nodes * 1.2e-7 * cycles / 10000.0
+    return {
+        "packets": packets,
+        "flits": flits,
+        "ratio": accepted / rate if rate else 0.0,
+        "delay": delay,
+        "max_delay": int(delay * rng.uniform(2.0, 15.0)),
+        "throughput": throughput,
+        "ip_throughput": throughput / nodes,
+        "dynamic": dynamic,
+        "static": static,
+    }
+
+
+def router_weights(config):
+    # Relative load of every router, in node id order (y * mesh_dim_x + x)
+    traffic = config.get("traffic_distribution", "TRAFFIC_RANDOM")
+    if config.get("topology", "MESH") != "MESH":
+        return [1.0] * int(config.get("n_delta_tiles", 8))
+    dim_x = int(config.get("mesh_dim_x", 4))
+    dim_y = int(config.get("mesh_dim_y", 4))
+    weights = []
+    for y in range(dim_y):
+        for x in range(dim_x):
+            if traffic.startswith("TRAFFIC_TRANSPOSE"):
+                weight = 1.0 + 3.0 * math.exp(-abs(x + y - (dim_x - 1)))
+            elif traffic == "TRAFFIC_HOTSPOT":
+                weight = 1.0 + 6.0 * math.exp(-math.hypot(x - (dim_x - 1) / 2, y - (dim_y - 1) / 2))
+            else:
+                weight = 1.0 + x * (dim_x - 1 - x) / dim_x + y * (dim_y - 1 - y) / dim_y
+            weights.append(weight)
+    return weights
+
+
+def detailed_report(config, m, seed):
+    # Per-router report of detailed: true and the show_buffer_stats table
+    rng = random.Random(seed)
+    weights = router_weights(config)
+    nodes = len(weights)
+    total = sum(weights)
+    mesh = config.get("topology", "MESH") == "MESH"
+    dim_x = int(config.get("mesh_dim_x", 4)) if mesh else nodes
+    cycles = int(config.get("simulation_time", 10000)) - int(config.get("stats_warm_up_time", 1000))
+    packet_size = m["flits"] / m["packets"] if m["packets"] else 8.0
+    lines = []
+    if config.get("detailed") == "true":
+        lines.append("\ndetailed = [\n")
+        max_delays = []
+        for dst, weight in enumerate(weights):
+            received = m["packets"] * weight / total
+            energy = (m["dynamic"] + m["static"]) / nodes * weight
+            max_delays.append(int(m["delay"] * weight * rng.uniform(1.5, 3.0)))
+            lines.append("%  src  dst delay avg delay max     throughput       energy    received    received\n")
+            lines.append("%                cycles    cycles    flits/cycle        Joule     packets       flits\n")
+            for src in range(nodes):
+                if src == dst:
+                    continue
+                packets = max(0, int(received / (nodes - 1) * rng.uniform(0.8, 1.2)))
+                delay = m["delay"] * weight / total * nodes * rng.uniform(0.9, 1.1)
+                lines.append(f" {src:5d}{dst:5d}{delay:10.4g}{int(delay * 2):10d}{packets * packet_size / cycles:15.6g}"
+                             f"{energy:13.6g}{packets:12d}{int(packets * packet_size):12d}\n")
+            lines.append(f"% Aggregated average delay (cycles): {m['delay'] * weight / total * nodes:.6g}\n")
+            lines.append(f"% Aggregated average throughput (flits/cycle): {received * packet_size / cycles:.6g}\n")
+        lines.append("];\n")
+        for name, values in (
+            ("max_delay", max_delays),
+            ("routed_flits", [int(m["flits"] * w / total * 3) for w in weights]),
+        ):
+            lines.append(f"\n{name} = [\n")
+            for row in range(0, nodes, dim_x):
+                lines.append("   " + "".join(f"{v:10d}" for v in values[row:row + dim_x]) + "\n")
+            lines.append("];\n")
+    if config.get("show_buffer_stats") == "true":
+        depth = int(config.get("buffer_depth", 4))
+        lines.append("Router id\tBuffer N\t\tBuffer E\t\tBuffer S\t\tBuffer W\t\tBuffer L\n")
+        lines.append("         \tMean\tMax\tMean\tMax\tMean\tMax\tMean\tMax\tMean\tMax\n")
+        for node, weight in enumerate(weights):
+            fill = min(depth, depth * weight / max(weights) * min(1.0, m["ratio"] + 0.2))
+            ports = "".join(f"\t{fill * rng.uniform(0.5, 1.0):.3g}\t{min(depth, math.ceil(fill))}" for _ in range(5))
+            lines.append(f"{node}{ports}\n")
+    return "".join(lines)
+
+
+def format_log(config_path, power_path, reset, sim_time, m, details=""):
+    # One complete run as Noxim prints it; concatenating several gives a
+    # multi-run log like the ones run_simulations.sh appends to
+    return "".join([
+        BANNER + "\n",
+        f'Loading configuration from file "{config_path}"... Done\n',
+        f'Loading power configurations from file "{power_path}"... Done\n',
+        f"Reset for {reset} cycles...  done! \n",
+        f" Now running for {sim_time} cycles...\n",
+        f"Noxim simulation completed. ({reset + sim_time} cycles executed)\n\n",
+        f"% Total received packets: {m['packets']}\n",
+        f"% Total received flits: {m['flits']}\n",
+        f"% Received/Ideal flits Ratio: {m['ratio']:.6g}\n",
+        "% Average wireless utilization: 0\n",
+        f"% Global average delay (cycles): {m['delay']:.6g}\n",
+        f"% Max delay (cycles): {m['max_delay']}\n",
+        f"% Network throughput (flits/cycle): {m['throughput']:.6g}\n",
+        f"% Average IP throughput (flits/cycle/IP): {m['ip_throughput']:.6g}\n",
+        f"% Total energy (J): {m['dynamic'] + m['static']:.6g}\n",
+        f"% \tDynamic energy (J): {m['dynamic']:.6g}\n",
+        f"% \tStatic energy (J): {m['static']:.6g}\n",
+        details,
+    ])
+
+
+def main(argv):
+    args = dict(zip(argv[::2], argv[1::2]))
+    config_path = args.get("-config")
+    if not config_path:
+        sys.stderr.write("Usage: fake_noxim.py -config <file> -power <file> [-seed N]\n")
+        return 1
+    config = read_config(config_path)
+    seed = int(args.get("-seed", 0))
+
+    delay = float(os.environ.get("FAKE_NOXIM_SLEEP", "0"))
+    if delay:
+        time.sleep(delay)
+
+    reset = int(config.get("reset_time", 1000))
+    sim_time = int(config.get("simulation_time", 10000))
+    m = simulate(config, seed)
+
+    details = detailed_report(config, m, seed)
+    sys.stdout.write(format_log(config_path, args.get("-power", ""), reset, sim_time, m, details))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,321 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from adaptive_rate import DELAY_FACTOR, PLATEAU
+from extract_results import FULL_FIDELITY, OUTPUT_NAME, full_fidelity
+from paths import RESULTS_DIR
+from replication import T_975
+
+# Iteration-to-iteration comparison of result sets.
+#
+# Both sides (an iteration of the compiled CSV or results store, e.g.
+# "Iter 1" and "current", or any compiled CSV file) are reduced to one row
+# per (topology, routing, traffic, design, rate, seed), runs averaged, and joined on
+# that key with one pandas hash join.  Per point (seeds pooled) the change
+# of Average Delay and Throughput is significant when it exceeds the
+# combined 95% CI half-widths of the two sides, sqrt(ci_a^2 + ci_b^2); points
+# without replicas on both sides fall back to a relative --threshold.  Per
+# curve (topology, routing, traffic, design) the saturation rate is estimated the
+# way adaptive_rate.py does and compared as well.  Everything is column-wise
+# NumPy/pandas, so hundreds of thousands of points take seconds.  Only
+# full-length runs are compared, screening runs are left out.
+#
+# Output goes to results/diff/<base>_vs_<new>/: points.csv, curves.csv,
+# report.txt (also printed) and overlay plots of the curves with the worst
+# regressions.  Old runs without routing/traffic in their file name (Iter 1)
+# can be matched with --fill Routing=XY Traffic=TRAFFIC_RANDOM.
+
+DIFF_DIR = os.path.join(RESULTS_DIR, "diff")
+
+CURVE = ["Topology", "Routing", "Traffic", "Design"]
+POINT = CURVE + ["Injection Rate"]
+KEYS = POINT + ["Seed"]
+# metric -> +1 when an increase is a regression, -1 when a decrease is
+METRICS = {"Average Delay": 1, "Throughput": -1}
+THRESHOLD = 0.05
+RATE_DIGITS = 6
+PLOTS = 12
+TOP = 10
+
+
+def t_critical(dof):
+    # Vectorized replication.t_critical
+    dof = np.asarray(dof)
+    table = np.array([np.inf] + T_975)
+    return np.where(dof > len(T_975), 1.96, table[np.clip(dof, 0, len(T_975))])
+
+
+def load_side(label, csv_path=None, store_dir=None):
+    # One side of the comparison: an iteration of the CSV/store, or a CSV file
+    import pandas as pd
+
+    columns = KEYS + ["Run"] + list(METRICS)
+    if label.endswith(".csv") and os.path.exists(label):
+        df = pd.read_csv(label)
+    elif store_dir:
+        from results_store import load_frame
+
+        df = load_frame(store_dir, columns=columns, where={"Iteration": label, "Fidelity": FULL_FIDELITY})
+    else:
+        df = pd.read_csv(csv_path)
+        df = df[df["Iteration"] == label]
+    # Screening runs (multi_fidelity.py) are not comparable with full-length ones
+    df = full_fidelity(df)
+    if df.empty:
+        raise ValueError(f"No results for {label!r}")
+    return df[[c for c in columns if c in df.columns]]
+
+
+def normalize(df, fill=None):
+    # Plain key columns: strings for the labels, -1 for "no seed"
+    df = df.copy()
+    for column in CURVE:
+        values = df[column].astype(object) if column in df.columns else ""
+        df[column] = values if isinstance(values, str) else values.where(values.notna(), "").astype(str)
+        if fill and column in fill:
+            df.loc[df[column] == "", column] = fill[column]
+    df["Injection Rate"] = df["Injection Rate"].astype(np.float64).round(RATE_DIGITS)
+    seed = df["Seed"] if "Seed" in df.columns else -1
+    df["Seed"] = np.nan_to_num(np.asarray(seed, dtype=np.float64) * np.ones(len(df)), nan=-1).astype(np.int64)
+    return df
+
+
+def seed_points(df):
+    # One row per KEYS, the runs of a file averaged
+    return df.groupby(KEYS, sort=False)[list(METRICS)].mean().reset_index()
+
+
+def point_stats(points):
+    # Mean, replica count and 95% CI half-width per POINT, seeds pooled
+    grouped = points.groupby(POINT, sort=False)[list(METRICS)]
+    stats = grouped.mean()
+    counts = grouped.count()
+    spread = grouped.std()
+    for metric in METRICS:
+        n = counts[metric].to_numpy()
+        stats[f"{metric} N"] = n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stats[f"{metric} CI"] = t_critical(n - 1) * spread[metric].to_numpy() / np.sqrt(n)
+    return stats.reset_index()
+
+
+def saturation_rates(stats):
+    # Saturation rate per curve from the point means: midway between the
+    # last unsaturated and the first saturated rate, the highest rate when
+    # the curve never saturates (adaptive_rate.is_saturated)
+    import pandas as pd
+
+    df = stats.sort_values(POINT, kind="stable").reset_index(drop=True)
+    n = len(df)
+    if not n:
+        return pd.DataFrame(columns=CURVE + ["Saturation Rate", "Saturated", "Rates"])
+    codes = df.groupby(CURVE, sort=False).ngroup().to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    rate = df["Injection Rate"].to_numpy()
+    delay = df["Average Delay"].to_numpy()
+    throughput = df["Throughput"].to_numpy()
+    first = starts[codes]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        saturated = (delay > DELAY_FACTOR * delay[first]) | (
+            throughput / rate < PLATEAU * throughput[first] / rate[first])
+    hit = np.minimum.reduceat(np.where(saturated, np.arange(n), n), starts)
+    safe = np.minimum(hit, n - 1)
+    knee = np.where(hit < n, (rate[np.maximum(safe - 1, 0)] + rate[safe]) / 2, rate[ends])
+    curves = df.loc[starts, CURVE].reset_index(drop=True)
+    return pd.DataFrame({**{c: curves[c] for c in CURVE}, "Saturation Rate": knee, "Saturated": hit <= ends,
+                         "Rates": ends - starts + 1})
+
+
+def compare(base, new, threshold=THRESHOLD):
+    # (points, curves, counts): per-POINT and per-curve deltas with flags
+    base_points, new_points = seed_points(base), seed_points(new)
+    joined = base_points.merge(new_points, on=KEYS, how="outer", suffixes=(" base", " new"), indicator=True)
+    counts = joined["_merge"].value_counts()
+    counts = {
+        "matched": int(counts.get("both", 0)),
+        "base only": int(counts.get("left_only", 0)),
+        "new only": int(counts.get("right_only", 0)),
+    }
+    # Seed-level pairs; the statistics pool the seeds both sides ran
+    both = joined[joined["_merge"] == "both"]
+    base_matched = both[KEYS + [f"{m} base" for m in METRICS]].rename(columns=lambda c: c.replace(" base", ""))
+    new_matched = both[KEYS + [f"{m} new" for m in METRICS]].rename(columns=lambda c: c.replace(" new", ""))
+    points = point_stats(base_matched).merge(point_stats(new_matched), on=POINT, suffixes=(" base", " new"))
+
+    for metric, sense in METRICS.items():
+        a, b = points[f"{metric} base"], points[f"{metric} new"]
+        delta = b - a
+        points[f"{metric} Delta"] = delta
+        points[f"{metric} Change"] = delta / a.abs().where(a != 0)
+        margin = np.sqrt(points[f"{metric} CI base"] ** 2 + points[f"{metric} CI new"] ** 2)
+        by_ci = margin.notna()
+        significant = np.where(by_ci, delta.abs() > margin, points[f"{metric} Change"].abs() > threshold)
+        points[f"{metric} Margin"] = margin
+        points[f"{metric} Flag"] = np.where(
+            ~significant, "", np.where(sense * delta > 0, "regression", "improvement"))
+        points[f"{metric} Basis"] = np.where(by_ci, "ci", "threshold")
+
+    curves = saturation_rates(points.rename(columns={f"{m} base": m for m in METRICS})).merge(
+        saturation_rates(points.rename(columns={f"{m} new": m for m in METRICS})),
+        on=CURVE, suffixes=(" base", " new"))
+    change = curves["Saturation Rate new"] / curves["Saturation Rate base"] - 1
+    curves["Saturation Change"] = change
+    curves["Saturation Flag"] = np.where(change < -threshold, "regression",
+                                         np.where(change > threshold, "improvement", ""))
+    flags = {f"{m} Regressions": points[f"{m} Flag"] == "regression" for m in METRICS}
+    per_curve = points.assign(**flags).groupby(CURVE, sort=False).agg(
+        **{f"{m} Mean Change": (f"{m} Change", "mean") for m in METRICS},
+        **{column: (column, "sum") for column in flags},
+    ).reset_index()
+    curves = curves.merge(per_curve, on=CURVE, how="left")
+    return points, curves, counts
+
+
+def curve_label(row):
+    # "mesh_8x8 XY TRAFFIC_RANDOM", with the design-space sample when there is one
+    label = f"{row['Topology']} {row['Routing'] or '-'} {row['Traffic'] or '-'}"
+    return f"{label} design {row['Design']}" if row["Design"] else label
+
+
+def format_report(base_label, new_label, points, curves, counts, threshold=THRESHOLD, top=TOP):
+    lines = [
+        f"{base_label} -> {new_label}: {counts['matched']} matched seed points "
+        f"({counts['base only']} only in {base_label}, {counts['new only']} only in {new_label}), "
+        f"{len(points)} points, {len(curves)} curves",
+    ]
+    for metric in METRICS:
+        flags = points[f"{metric} Flag"]
+        by_ci = int((points[f"{metric} Basis"] == "ci").sum())
+        lines.append(f"{metric}: {int((flags == 'regression').sum())} significant regressions, "
+                     f"{int((flags == 'improvement').sum())} improvements "
+                     f"({by_ci} points tested against their CIs, the rest at {threshold:.0%})")
+    flags = curves["Saturation Flag"]
+    lines.append(f"Saturation rate: {int((flags == 'regression').sum())} curves regressed, "
+                 f"{int((flags == 'improvement').sum())} improved")
+
+    worst = []
+    for metric, sense in METRICS.items():
+        for row in points[points[f"{metric} Flag"] == "regression"].to_dict("records"):
+            worst.append((sense * row[f"{metric} Change"], metric, row))
+    if worst:
+        lines.append("Worst regressions:")
+        worst.sort(key=lambda item: -item[0])
+        for _, metric, row in worst[:top]:
+            margin = row[f"{metric} Margin"]
+            ci = f", CI +/-{margin:.4g}" if margin == margin else ""
+            lines.append(f"  {curve_label(row)} @ {row['Injection Rate']:g}  {metric} {row[f'{metric} base']:.4g} -> "
+                         f"{row[f'{metric} new']:.4g} ({row[f'{metric} Change']:+.1%}{ci})")
+    regressed = curves[curves["Saturation Flag"] == "regression"].sort_values("Saturation Change")
+    for row in regressed.head(top).to_dict("records"):
+        lines.append(f"  {curve_label(row)}  saturation "
+                     f"{row['Saturation Rate base']:.4g} -> {row['Saturation Rate new']:.4g} "
+                     f"({row['Saturation Change']:+.1%})")
+    return "\n".join(lines)
+
+
+def plot_overlays(base, new, curves, base_label, new_label, output_dir, count=PLOTS, points=None):
+    # Both iterations' curves on the same axes, for the `count` curves with
+    # the most regressions; regressed points are marked
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from plot_common import plot_series
+    from plot_engine import Y_LABELS
+
+    regressions = sum(curves[f"{m} Regressions"].fillna(0) for m in METRICS)
+    regressions = regressions + (curves["Saturation Flag"] == "regression")
+    ranked = curves.assign(_score=regressions).sort_values("_score", ascending=False)
+    ranked = ranked[ranked["_score"] > 0].head(count)
+    if ranked.empty:
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    base_groups = base.groupby(CURVE, sort=False)
+    new_groups = new.groupby(CURVE, sort=False)
+    point_groups = points.groupby(CURVE, sort=False) if points is not None else None
+    paths = []
+    for curve in ranked[CURVE].itertuples(index=False, name=None):
+        fig, axes = plt.subplots(1, len(METRICS), figsize=(6 * len(METRICS), 4.5))
+        for ax, metric in zip(np.atleast_1d(axes), METRICS):
+            plt.sca(ax)
+            for data, label, style in ((base_groups.get_group(curve), base_label, "--"),
+                                       (new_groups.get_group(curve), new_label, "-")):
+                plot_series(data, metric, marker="o", linestyle=style, label=label)
+            if point_groups is not None:
+                flagged = point_groups.get_group(curve)
+                flagged = flagged[flagged[f"{metric} Flag"] == "regression"]
+                if len(flagged):
+                    ax.scatter(flagged["Injection Rate"], flagged[f"{metric} new"], s=140, facecolors="none",
+                               edgecolors="red", linewidths=1.5, label="regression", zorder=3)
+            ax.set_xlabel("Injection Rate")
+            ax.set_ylabel(Y_LABELS.get(metric, metric))
+            ax.grid(True)
+            ax.legend(fontsize=8)
+        fig.suptitle(" ".join(part for part in curve if part))
+        fig.tight_layout()
+        name = "_".join(part for part in curve if part) + ".png"
+        path = os.path.join(output_dir, name)
+        fig.savefig(path, dpi=110)
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+def slug(label):
+    return re.sub(r"\W+", "_", os.path.splitext(os.path.basename(label))[0]).strip("_")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two result iterations and flag regressions.")
+    parser.add_argument("base", help="Reference iteration (e.g. 'Iter 1') or compiled CSV file")
+    parser.add_argument("new", help="Iteration (e.g. 'current') or compiled CSV file to check")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", default=os.path.join(RESULTS_DIR, OUTPUT_NAME),
+                        help="Compiled results CSV holding both iterations")
+    source.add_argument("--store", help="Columnar results store holding both iterations")
+    parser.add_argument("--fill", nargs="+", default=[], metavar="COLUMN=VALUE",
+                        help="Value for empty Routing/Traffic labels, e.g. Routing=XY")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Relative change that counts when a point has no CI")
+    parser.add_argument("--output-dir", help="Default: results/diff/<base>_vs_<new>")
+    parser.add_argument("--plots", type=int, default=PLOTS, help="Overlay plots of the worst curves")
+    parser.add_argument("--top", type=int, default=TOP, help="Regressions listed in the report")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 when anything regressed")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    fill = dict(item.partition("=")[::2] for item in args.fill)
+    base = normalize(load_side(args.base, args.csv, args.store), fill)
+    new = normalize(load_side(args.new, args.csv, args.store), fill)
+    points, curves, counts = compare(base, new, args.threshold)
+    report = format_report(args.base, args.new, points, curves, counts, args.threshold, args.top)
+    elapsed = time.perf_counter() - start
+
+    output_dir = args.output_dir or os.path.join(DIFF_DIR, f"{slug(args.base)}_vs_{slug(args.new)}")
+    os.makedirs(output_dir, exist_ok=True)
+    points.to_csv(os.path.join(output_dir, "points.csv"), index=False, float_format="%.6g")
+    curves.to_csv(os.path.join(output_dir, "curves.csv"), index=False, float_format="%.6g")
+    with open(os.path.join(output_dir, "report.txt"), "w") as f:
+        f.write(report + "\n")
+    print(report)
+    print(f"Compared in {elapsed:.2f}s; details in {output_dir}")
+    if args.plots:
+        paths = plot_overlays(base, new, curves, args.base, args.new, os.path.join(output_dir, "overlays"),
+                              args.plots, points)
+        print(f"{len(paths)} overlay plot(s) in {os.path.join(output_dir, 'overlays')}")
+
+    regressed = any((points[f"{m} Flag"] == "regression").any() for m in METRICS)
+    regressed = regressed or (curves["Saturation Flag"] == "regression").any()
+    return 1 if args.fail_on_regression and regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+from cost_model import config_features, lpt_order
+from noxim_log import read_metrics
+from result_cache import CACHE_DIR, ResultCache
+from sweep import (
+    INJECTION_RATES,
+    NOXIM_BIN,
+    POWER_FILE,
+    RESULTS_DIR,
+    SweepOptions,
+    apply_overrides,
+    config_path_for,
+    default_axes,
+    expand_points,
+    output_path_for,
+    overrides_from_args,
+    resolve_base,
+    resolve_sim_bin,
+    run_config,
+    topology_name,
+    write_atomic,
+)
+
+# Durable, crash-resumable sweep queue.
+#
+# "submit" expands a sweep like sweep.py and stores every point as a job
+# holding its fully resolved config.  Any number of "work" processes, on this
+# machine or on others sharing the queue file, lease jobs one at a time: a
+# lease is valid for --lease seconds and is renewed by a heartbeat thread
+# while the simulator runs.  A worker that crashes or is killed simply stops
+# renewing, and once its lease has expired the job is handed to the next
+# worker.  A worker that finds its lease gone kills its simulator run.
+# Results are written atomically through per-process temporary files
+# (sweep.run_config), completion is only accepted from the current lease
+# holder, and jobs that keep losing their lease or failing are parked as
+# "failed" after --max-attempts.
+# "status" prints progress and an ETA; "requeue" puts failed jobs back.
+#
+# The queue is a single SQLite file with a rollback journal
+# (journal_mode=DELETE): WAL needs shared memory that only works between
+# processes of one host, a rollback journal only needs file locks.  Several
+# machines can drain the queue when it lives on a filesystem with working
+# POSIX locks (e.g. NFSv4 with locking enabled), as long as they see the
+# results dir at the same path; jobs store absolute config and output paths.
+
+QUEUE_FILE = os.path.join(RESULTS_DIR, "queue.db")
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 2
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    def __init__(self, path=QUEUE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=DELETE")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY, name TEXT, topology TEXT, seed INTEGER,"
+            " config_path TEXT, config_text TEXT, output TEXT UNIQUE,"
+            " status TEXT, attempts INTEGER DEFAULT 0, worker TEXT, lease_expires REAL,"
+            " submitted REAL, started REAL, finished REAL, wall_time REAL,"
+            " metrics TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def close(self):
+        self._db.close()
+
+    def submit(self, jobs):
+        # jobs: dicts with name, topology, seed, config_path, config_text,
+        # output and optionally status/metrics.  Jobs whose output is already
+        # queued are left alone.  Returns the number of new jobs.
+        now = time.time()
+        before = self._db.total_changes
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.executemany(
+            "INSERT OR IGNORE INTO jobs (name, topology, seed, config_path, config_text, output,"
+            " status, submitted, finished, metrics) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (job["name"], job["topology"], job["seed"], job["config_path"], job["config_text"],
+                 job["output"], job.get("status", PENDING), now,
+                 now if job.get("status") == DONE else None,
+                 json.dumps(job["metrics"]) if job.get("metrics") else None)
+                for job in jobs
+            ],
+        )
+        self._db.execute("COMMIT")
+        return self._db.total_changes - before
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        # Atomically hands out the oldest pending job or expired lease
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, worker = NULL,"
+                " error = 'lease expired ' || attempts || ' times'"
+                " WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, max_attempts),
+            )
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?)"
+                " ORDER BY id LIMIT 1",
+                (PENDING, LEASED, now),
+            ).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, lease_expires = ?, started = ?,"
+                    " attempts = attempts + 1 WHERE id = ?",
+                    (LEASED, worker, now + lease_seconds, now, row["id"]),
+                )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def heartbeat(self, job_id, worker, lease_seconds=LEASE_SECONDS):
+        # Renews the lease; False once another worker has taken the job over
+        cur = self._db.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = ?",
+            (time.time() + lease_seconds, job_id, worker, LEASED),
+        )
+        return cur.rowcount == 1
+
+    def finish(self, job_id, worker, outcome, max_attempts=MAX_ATTEMPTS):
+        # Records a run_config() outcome.  Failed runs go back to pending
+        # until max_attempts.  Ignored unless `worker` still holds the lease.
+        if outcome["status"] in ("ok", "cached") and outcome.get("metrics") is not None:
+            status, error = DONE, None
+        else:
+            status, error = PENDING, outcome.get("error") or "incomplete simulator output"
+        cur = self._db.execute(
+            "UPDATE jobs SET status = CASE WHEN ? = ? AND attempts >= ? THEN ? ELSE ? END,"
+            " worker = NULL, lease_expires = NULL, finished = ?, wall_time = ?, metrics = ?, error = ?"
+            " WHERE id = ? AND worker = ? AND status = ?",
+            (status, PENDING, max_attempts, FAILED, status, time.time(), outcome.get("wall_time"),
+             json.dumps(outcome.get("metrics")) if outcome.get("metrics") else None, error,
+             job_id, worker, LEASED),
+        )
+        return cur.rowcount == 1
+
+    def requeue(self, statuses=(FAILED,)):
+        marks = ",".join("?" * len(statuses))
+        cur = self._db.execute(
+            f"UPDATE jobs SET status = ?, attempts = 0, worker = NULL, lease_expires = NULL"
+            f" WHERE status IN ({marks})",
+            (PENDING, *statuses),
+        )
+        return cur.rowcount
+
+    def unfinished(self):
+        return self._db.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (PENDING, LEASED)
+        ).fetchone()[0]
+
+    def progress(self):
+        now = time.time()
+        counts = dict.fromkeys((PENDING, LEASED, DONE, FAILED), 0)
+        counts.update(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        workers = self._db.execute(
+            "SELECT COUNT(DISTINCT worker) FROM jobs WHERE status = ? AND lease_expires >= ?",
+            (LEASED, now),
+        ).fetchone()[0]
+        mean_wall = self._db.execute(
+            "SELECT AVG(wall_time) FROM jobs WHERE status = ? AND wall_time > 0", (DONE,)
+        ).fetchone()[0]
+        remaining = counts[PENDING] + counts[LEASED]
+        eta = None
+        if remaining and mean_wall and workers:
+            eta = remaining * mean_wall / workers
+        return {"counts": counts, "total": sum(counts.values()), "workers": workers,
+                "mean_wall_time": mean_wall, "eta": eta}
+
+
+class Heartbeat:
+    # Renews a lease from a background thread while the simulator runs.
+    # `lost` is set once the lease went to another worker; run_config kills
+    # the simulator then, so the job is not run twice side by side.
+
+    def __init__(self, queue_path, job_id, worker, lease_seconds):
+        self.queue_path = queue_path
+        self.job_id = job_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        queue = JobQueue(self.queue_path)
+        try:
+            while not self._stop.wait(self.lease_seconds / 4):
+                if not queue.heartbeat(self.job_id, self.worker, self.lease_seconds):
+                    self.lost.set()
+                    return
+        finally:
+            queue.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def point_jobs(base_config, points, options, skip_complete=True):
+    # Queue entries for sweep points, with absolute paths so that workers
+    # started elsewhere write to the same files; outputs that already hold a
+    # complete run are submitted as done.  Jobs are leased in id order, so with a cost
+    # model they are submitted longest-expected-first.
+    with open(base_config, "r") as f:
+        base_text = f.read()
+    jobs = []
+    for point in points:
+        output = os.path.abspath(output_path_for(point, options))
+        job = {
+            "name": point.name,
+            "topology": point.topology,
+            "seed": point.seed,
+            "config_path": os.path.abspath(config_path_for(point, options)),
+            "config_text": apply_overrides(base_text, point.config_overrides()),
+            "output": output,
+        }
+        if skip_complete and os.path.exists(output):
+            metrics = read_metrics(output)
+            if metrics is not None:
+                job.update(status=DONE, metrics=metrics)
+        jobs.append(job)
+    model = options.scheduler(jobs)
+    if model is not None:
+        jobs = lpt_order(jobs, lambda job: model.predict(config_features(job["config_text"])))
+    return jobs
+
+
+def work(queue_path, options, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS,
+         wait=True, progress=print):
+    # Drains the queue; with `wait`, keeps polling while other workers hold
+    # leases that may still expire.  Returns the number of jobs completed.
+    worker = worker_name()
+    queue = JobQueue(queue_path)
+    completed = 0
+    try:
+        while True:
+            job = queue.lease(worker, lease_seconds, max_attempts)
+            if job is None:
+                if wait and queue.unfinished():
+                    time.sleep(POLL_SECONDS)
+                    continue
+                return completed
+            with Heartbeat(queue_path, job["id"], worker, lease_seconds) as beat:
+                try:
+                    os.makedirs(os.path.dirname(job["config_path"]), exist_ok=True)
+                    write_atomic(job["config_path"], job["config_text"])
+                    outcome = run_config(job["config_path"], job["config_text"], job["seed"],
+                                         job["output"], options, cancel=beat.lost)
+                except OSError as e:
+                    outcome = {"status": "failed", "error": str(e)}
+            accepted = not beat.lost.is_set() and queue.finish(job["id"], worker, outcome, max_attempts)
+            completed += accepted and outcome["status"] != "failed"
+            if progress:
+                state = outcome["status"] if accepted else "lease lost"
+                progress(f"[{worker}] {job['name']}: {state}")
+    finally:
+        queue.close()
+
+
+def _work_process(queue_path, options, cache_dir, lease_seconds, max_attempts, wait):
+    # Each worker process opens its own cache and queue connections
+    if cache_dir is not None:
+        options.cache = ResultCache(cache_dir)
+    work(queue_path, options, lease_seconds, max_attempts, wait)
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}h{seconds // 60 % 60:02d}m{seconds % 60:02d}s"
+
+
+def print_status(p):
+    c = p["counts"]
+    eta = format_duration(p["eta"]) if p["eta"] is not None else "-"
+    print(f"{c[DONE]}/{p['total']} done, {c[LEASED]} running, {c[PENDING]} pending, {c[FAILED]} failed; "
+          f"{p['workers']} active worker(s), ETA {eta}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durable job queue for Noxim sweeps.")
+    parser.add_argument("--queue", default=QUEUE_FILE, help="Queue database")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    submit = sub.add_parser("submit", help="Queue the points of a sweep")
+    submit.add_argument("base", help="Base config, e.g. configs/mesh_10x10.yaml")
+    submit.add_argument("--routing", nargs="+", help="routing_algorithm values")
+    submit.add_argument("--traffic", nargs="+", help="traffic_distribution values")
+    submit.add_argument("--rates", nargs="+", type=float, default=INJECTION_RATES)
+    submit.add_argument("--seeds", nargs="+", type=int, help="Simulator seeds")
+    submit.add_argument("--set", nargs="+", default=[], metavar="KEY=VALUE",
+                        help="Extra config overrides applied to every point")
+    submit.add_argument("--results-dir", default=RESULTS_DIR)
+    submit.add_argument("--config-out-dir", help="Where to write the per-point configs")
+    submit.add_argument("--rerun", action="store_true", help="Queue points whose output is already complete")
+
+    worker = sub.add_parser("work", help="Run queued jobs until the queue is drained")
+    worker.add_argument("-j", "--workers", type=int, default=1, help="Worker processes to start")
+    worker.add_argument("--lease", type=float, default=LEASE_SECONDS, help="Lease length in seconds")
+    worker.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    worker.add_argument("--no-wait", action="store_true",
+                        help="Exit when nothing is pending instead of waiting for other workers' leases")
+    worker.add_argument("--sim-bin", default=NOXIM_BIN)
+    worker.add_argument("--power", default=POWER_FILE)
+    worker.add_argument("--timeout", type=float, help="Per-job timeout in seconds")
+    worker.add_argument("--retries", type=int, default=0, help="In-place retries before giving the job back")
+    worker.add_argument("--cache-dir", default=CACHE_DIR)
+    worker.add_argument("--no-cache", action="store_true", help="Always run the simulator")
+
+    status = sub.add_parser("status", help="Show progress and ETA")
+    status.add_argument("--watch", type=float, metavar="SECONDS", help="Refresh every SECONDS")
+
+    requeue = sub.add_parser("requeue", help="Put failed jobs back in the queue")
+    requeue.add_argument("--leased", action="store_true", help="Also reclaim jobs that are currently leased")
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        base = resolve_base(args.base)
+        with open(base, "r") as f:
+            routings, traffics = default_axes(f.read())
+        points = expand_points(topology_name(base), args.routing or routings, args.traffic or traffics,
+                               args.rates, args.seeds or [None], overrides_from_args(args))
+        options = SweepOptions(results_dir=args.results_dir, config_out_dir=args.config_out_dir,
+                               cost_history=args.results_dir)
+        jobs = point_jobs(base, points, options, skip_complete=not args.rerun)
+        queue = JobQueue(args.queue)
+        added = queue.submit(jobs)
+        done = sum(1 for job in jobs if job.get("status") == DONE)
+        print(f"Queued {added} new job(s) of {len(jobs)} ({done} already complete) in {args.queue}")
+        return 0
+
+    if args.command == "work":
+        options = SweepOptions(sim_bin=resolve_sim_bin(args.sim_bin), power_file=args.power, timeout=args.timeout,
+                               retries=args.retries)
+        cache_dir = None if args.no_cache else args.cache_dir
+        worker_args = (args.queue, options, cache_dir, args.lease, args.max_attempts, not args.no_wait)
+        if args.workers <= 1:
+            _work_process(*worker_args)
+        else:
+            procs = [multiprocessing.Process(target=_work_process, args=worker_args) for _ in range(args.workers)]
+            for proc in procs:
+                proc.start()
+            for proc in procs:
+                proc.join()
+        print_status(JobQueue(args.queue).progress())
+        return 0
+
+    queue = JobQueue(args.queue)
+    if args.command == "requeue":
+        statuses = (FAILED, LEASED) if args.leased else (FAILED,)
+        print(f"Requeued {queue.requeue(statuses)} job(s)")
+        return 0
+
+    while True:
+        print_status(queue.progress())
+        if not args.watch:
+            return 0
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+from paths import RESULTS_DIR
+
+# Compressed archive of raw Noxim logs.
+#
+# Logs are appended to segment files (segment-000001.dat, ...) as separate
+# zlib streams, each compressed against a preset dictionary of the text every
+# Noxim log shares (banner, progress lines, "% ..." metric labels), so even a
+# 1 kB log shrinks to a few hundred bytes.  An SQLite index maps
+#   run id       the log's path relative to the results dir, e.g.
+#                mesh_8x8/mesh_8x8_XY_TRAFFIC_RANDOM_rate_0.1.txt
+#   -> blob      (segment, offset, length) of its compressed content
+# and records the hash of the run's resolved config (from its per-point
+# config, when there is one).  Blobs are stored once per content hash, so the
+# copies of a log kept under results/ and "results/Iter 1/" cost nothing
+# extra.  Any single log can be decompressed on its own ("cat"), and
+# read_many() streams whole segments in storage order for bulk re-parsing.
+# extract_results.py scans the archive of a results dir (<results>/archive)
+# alongside the .txt files, so archived logs can be deleted from the tree
+# ("add --delete").
+
+ARCHIVE_NAME = "archive"
+SEGMENT_BYTES = 256 * 1024 ** 2
+LEVEL = 9
+BATCH = 1000
+
+# Preset dictionaries by version.  Blobs record the version they were
+# compressed with, so never change one: add a new version instead.
+DICTIONARIES = {
+    1: (
+        "\t--------------------------------------------\n"
+        "\t\tNoxim - the NoC Simulator\n"
+        "\t\t(C) University of Catania\n"
+        "\t--------------------------------------------\n"
+        "Catania V., Mineo A., Monteleone S., Palesi M., and Patti D. (2016) Cycle-Accurate Network "
+        "on Chip Simulation with Noxim. ACM Trans. Model. Comput. Simul. 27, 1, Article 4 (August "
+        "2016), 25 pages. DOI: https://doi.org/10.1145/2953878\n\n\n"
+        "Loading configuration from file \"configs/.yaml\"... Done\n"
+        "Loading power configurations from file \"/bin/power.yaml\"... Done\n"
+        "Reset for 1000 cycles...  done! \n"
+        " Now running for 10000 cycles...\n"
+        "Noxim simulation completed. (11000 cycles executed)\n\n"
+        "% Total received packets: \n"
+        "% Total received flits: \n"
+        "% Received/Ideal flits Ratio: \n"
+        "% Average wireless utilization: 0\n"
+        "% Global average delay (cycles): \n"
+        "% Max delay (cycles): \n"
+        "% Network throughput (flits/cycle): \n"
+        "% Average IP throughput (flits/cycle/IP): \n"
+        "% Total energy (J): \n"
+        "% \tDynamic energy (J): \n"
+        "% \tStatic energy (J): \n"
+    ).encode(),
+}
+DICTIONARY = max(DICTIONARIES)
+
+
+def compress(data, dictionary=DICTIONARY):
+    c = zlib.compressobj(LEVEL, zlib.DEFLATED, zlib.MAX_WBITS, 9, zlib.Z_DEFAULT_STRATEGY, DICTIONARIES[dictionary])
+    return c.compress(data) + c.flush()
+
+
+def decompress(blob, dictionary):
+    d = zlib.decompressobj(zlib.MAX_WBITS, DICTIONARIES[dictionary])
+    return d.decompress(blob) + d.flush()
+
+
+def config_hash(config_text):
+    # Hash of the resolved config, independent of comments and formatting
+    from result_cache import resolve_config
+
+    resolved = json.dumps(resolve_config(config_text), sort_keys=True, default=str)
+    return hashlib.sha256(resolved.encode()).hexdigest()
+
+
+def point_config(results_dir, run_id):
+    # The per-point config sweep.py wrote for this log, if it is still there
+    topology_dir, name = os.path.split(os.path.join(results_dir, run_id))
+    path = os.path.join(topology_dir, "configs", os.path.splitext(name)[0] + ".yaml")
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class LogArchive:
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self._lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(archive_dir, "index.db"), timeout=60,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " sha256 TEXT PRIMARY KEY, segment INTEGER, offset INTEGER, length INTEGER,"
+            " size INTEGER, dictionary INTEGER)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY, sha256 TEXT, config_hash TEXT, added REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS runs_config ON runs (config_hash)")
+
+    def close(self):
+        self._db.close()
+
+    def _segment_path(self, segment):
+        return os.path.join(self.archive_dir, f"segment-{segment:06d}.dat")
+
+    def add_many(self, entries):
+        # entries: (run_id, raw bytes, config hash or None).  Blobs already in
+        # the archive are not written again.  Returns the bytes appended.
+        entries = list(entries)
+        digests = [hashlib.sha256(data).hexdigest() for _, data, _ in entries]
+        written = 0
+        now = time.time()
+        with self._lock:
+            # The write lock of the index also serializes segment appends
+            # between processes
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                known = {
+                    row[0] for digest in set(digests)
+                    for row in self._db.execute("SELECT sha256 FROM blobs WHERE sha256 = ?", (digest,))
+                }
+                segment = self._db.execute("SELECT COALESCE(MAX(segment), 1) FROM blobs").fetchone()[0]
+                out = open(self._segment_path(segment), "ab")
+                try:
+                    for (run_id, data, config), digest in zip(entries, digests):
+                        if digest not in known:
+                            if out.tell() >= SEGMENT_BYTES:
+                                out.close()
+                                segment += 1
+                                out = open(self._segment_path(segment), "ab")
+                            blob = compress(data)
+                            offset = out.tell()
+                            out.write(blob)
+                            self._db.execute("INSERT INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                                             (digest, segment, offset, len(blob), len(data), DICTIONARY))
+                            known.add(digest)
+                            written += len(blob)
+                        self._db.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                                         (run_id, digest, config, now))
+                finally:
+                    out.close()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return written
+
+    def add(self, run_id, data, config=None):
+        return self.add_many([(run_id, data, config)])
+
+    def runs(self, pattern=None):
+        # [(run_id, sha256, config hash)], optionally matching an fnmatch pattern
+        with self._lock:
+            rows = self._db.execute("SELECT run_id, sha256, config_hash FROM runs ORDER BY run_id").fetchall()
+        return [row for row in rows if pattern is None or fnmatch.fnmatch(row[0], pattern)]
+
+    def digest(self, run_id):
+        with self._lock:
+            row = self._db.execute("SELECT sha256 FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0] if row else None
+
+    def read(self, run_id):
+        # Raw log of one run, or None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT b.segment, b.offset, b.length, b.dictionary FROM runs r"
+                " JOIN blobs b ON b.sha256 = r.sha256 WHERE r.run_id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        segment, offset, length, dictionary = row
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return decompress(f.read(length), dictionary)
+
+    def read_many(self, digests):
+        # Yields (sha256, raw log) for the given blobs in storage order, so
+        # that bulk reads are sequential
+        wanted = set(digests)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT sha256, segment, offset, length, dictionary FROM blobs ORDER BY segment, offset"
+            ).fetchall()
+        f = None
+        current = None
+        try:
+            for digest, segment, offset, length, dictionary in rows:
+                if digest not in wanted:
+                    continue
+                if segment != current:
+                    if f is not None:
+                        f.close()
+                    f = open(self._segment_path(segment), "rb", buffering=1 << 20)
+                    current = segment
+                f.seek(offset)
+                yield digest, decompress(f.read(length), dictionary)
+        finally:
+            if f is not None:
+                f.close()
+
+    def stats(self):
+        with self._lock:
+            runs, = self._db.execute("SELECT COUNT(*) FROM runs").fetchone()
+            blobs, raw, stored, segments = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0), COUNT(DISTINCT segment)"
+                " FROM blobs"
+            ).fetchone()
+            orphaned, = self._db.execute(
+                "SELECT COALESCE(SUM(length), 0) FROM blobs WHERE sha256 NOT IN (SELECT sha256 FROM runs)"
+            ).fetchone()
+        return {"runs": runs, "blobs": blobs, "raw_bytes": raw, "stored_bytes": stored,
+                "orphaned_bytes": orphaned, "segments": segments,
+                "ratio": round(raw / stored, 2) if stored else None}
+
+
+def open_archive(results_dir):
+    # The archive of a results dir, None when it has none
+    archive_dir = os.path.join(results_dir, ARCHIVE_NAME)
+    if not os.path.exists(os.path.join(archive_dir, "index.db")):
+        return None
+    return LogArchive(archive_dir)
+
+
+def archive_tree(results_dir, archive, delete=False, progress=print):
+    # Archives every result log below results_dir that is not archived with
+    # its current content yet; with `delete`, removes the archived files.
+    # Returns (logs archived, bytes appended, files deleted).
+    from extract_results import file_digest, iter_result_files
+
+    pending = []
+    added = appended = deleted = 0
+    archived = []
+
+    def flush():
+        nonlocal appended
+        appended += archive.add_many(pending)
+        archived.extend(run_id for run_id, _, _ in pending)
+        pending.clear()
+
+    for rel_path, entry in iter_result_files(results_dir):
+        known = archive.digest(rel_path)
+        if known is None or known != file_digest(entry.path):
+            with open(entry.path, "rb") as f:
+                data = f.read()
+            text = point_config(results_dir, rel_path)
+            pending.append((rel_path, data, config_hash(text) if text is not None else None))
+            added += 1
+            if len(pending) >= BATCH:
+                flush()
+                if progress:
+                    progress(f"Archived {added} logs")
+        else:
+            archived.append(rel_path)
+    flush()
+
+    if delete:
+        # Only files whose archived copy matches what is on disk now
+        for rel_path in archived:
+            path = os.path.join(results_dir, rel_path)
+            if archive.digest(rel_path) == file_digest(path):
+                os.remove(path)
+                deleted += 1
+    return added, appended, deleted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compressed archive of raw Noxim logs.")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--archive-dir", help=f"Archive directory (default: <results-dir>/{ARCHIVE_NAME})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Archive the result logs of the results dir")
+    add.add_argument("--delete", action="store_true", help="Remove the logs from the tree once archived")
+    cat = sub.add_parser("cat", help="Print archived logs")
+    cat.add_argument("run_ids", nargs="+", help="Paths relative to the results dir")
+    ls = sub.add_parser("ls", help="List archived runs")
+    ls.add_argument("pattern", nargs="?", help="fnmatch pattern, e.g. 'mesh_8x8/*XY*'")
+    sub.add_parser("stats", help="Size and compression of the archive")
+    sub.add_parser("verify", help="Decompress every blob and check its hash")
+    args = parser.parse_args(argv)
+
+    archive = LogArchive(args.archive_dir or os.path.join(args.results_dir, ARCHIVE_NAME))
+    if args.command == "add":
+        added, appended, deleted = archive_tree(args.results_dir, archive, args.delete)
+        print(f"Archived {added} log(s), {appended / 1024 ** 2:.1f} MB appended"
+              + (f", {deleted} file(s) removed" if args.delete else ""))
+    elif args.command == "cat":
+        for run_id in args.run_ids:
+            data = archive.read(run_id)
+            if data is None:
+                print(f"{run_id}: not archived", file=sys.stderr)
+                return 1
+            sys.stdout.buffer.write(data)
+    elif args.command == "ls":
+        for run_id, digest, config in archive.runs(args.pattern):
+            print(f"{digest[:12]}  {(config or '-')[:12]:<12}  {run_id}")
+    elif args.command == "stats":
+        print(json.dumps(archive.stats(), indent=2))
+    elif args.command == "verify":
+        digests = {digest for _, digest, _ in archive.runs()}
+        ok = sum(1 for d, data in archive.read_many(digests) if hashlib.sha256(data).hexdigest() == d)
+        print(f"{ok}/{len(digests)} blobs ok")
+        return 0 if ok == len(digests) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
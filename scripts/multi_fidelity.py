@@ -0,0 +1,223 @@
+import argparse
+import csv
+import math
+import os
+import re
+import statistics
+import sys
+import time
+
+from adaptive_rate import is_saturated
+
+# Multi-fidelity sweeps.
+#
+# Every point first runs with a short simulation_time (the screening
+# fidelity).  Points far below the saturation knee of their series (clearly
+# idle) or far above it (clearly saturated) are settled by the short run.
+# The others are ranked by how close they sit to the knee, scaled up by how
+# uncertain their short-run estimate is (few received packets); only the
+# top fraction of all points is promoted and re-run at the next fidelity,
+# by default the base config's full simulation_time.
+# More stages (e.g. a longer final run) can be chained with --fidelities.
+#
+# Runs shorter or longer than the base config are stored with a
+# "_cycles_<N>" suffix; extract_results.py records them with their
+# "Fidelity" and flags the promoted full-length runs as "Refined", so plots
+# can mark refined points.  A per-point summary goes to
+# <results>/<topology>_fidelity.csv.
+
+SCREEN_TIME = 1000
+PROMOTE_FRACTION = 0.3
+UNCERTAINTY_WEIGHT = 0.5
+# Points below IDLE_LOAD or above SATURATED_LOAD times the knee rate of
+# their series are not refined
+IDLE_LOAD = 0.5
+SATURATED_LOAD = 2.0
+
+FIELDNAMES = [
+    "Topology", "Routing", "Traffic", "Injection Rate", "Seed", "Stage", "Simulation Time",
+    "Received Packets", "Average Delay", "Throughput", "Score", "Promoted",
+]
+
+
+def config_value(config_text, key, default):
+    match = re.search(rf"^{key}:\s*(\d+)", config_text, re.MULTILINE)
+    return int(match.group(1)) if match else default
+
+
+def knee_estimate(curve):
+    # curve: sorted [(rate, metrics)] of one series -> estimated knee rate
+    base_rate, base = curve[0]
+    below = None
+    for rate, metrics in curve:
+        if is_saturated(rate, metrics, base_rate, base):
+            return rate if below is None else (below + rate) / 2
+        below = rate
+    return curve[-1][0]
+
+
+def score_points(results):
+    # results: {SweepPoint: metrics}.  Returns {SweepPoint: score} of the
+    # points worth refining, higher meaning more; clearly idle and clearly
+    # saturated points get no score.
+    series = {}
+    for point, metrics in results.items():
+        series.setdefault((point.routing, point.traffic, point.seed), []).append((point.rate, point))
+
+    closeness = {}
+    for members in series.values():
+        members.sort(key=lambda m: m[0])
+        rates = [rate for rate, _ in members]
+        curve = [(rate, results[point]) for rate, point in members]
+        knee = knee_estimate(curve)
+        gaps = [b - a for a, b in zip(rates, rates[1:])]
+        spacing = statistics.median(gaps) if gaps else max(rates[0], 1e-9)
+        for rate, point in members:
+            if IDLE_LOAD * knee <= rate <= SATURATED_LOAD * knee:
+                closeness[point] = 1.0 / (1.0 + abs(rate - knee) / spacing)
+
+    # Relative standard error of a mean over n packets goes as 1/sqrt(n); it
+    # only counts as much as the point is close to the knee
+    uncertainty = {
+        point: 1.0 / math.sqrt(max(results[point]["Received Packets"], 1))
+        for point in closeness
+    }
+    top = max(uncertainty.values(), default=1.0) or 1.0
+    return {
+        point: closeness[point] * (1.0 + UNCERTAINTY_WEIGHT * uncertainty[point] / top)
+        for point in closeness
+    }
+
+
+def select_promoted(scores, fraction, total=None):
+    # The best `fraction` of `total` points (default: the scored ones), of
+    # those that have a score
+    total = len(scores) if total is None else total
+    count = max(1, math.ceil(total * fraction)) if scores else 0
+    ranked = sorted(scores, key=lambda p: (-scores[p], p.routing, p.traffic, p.rate))
+    return ranked[:count]
+
+
+def stage_point(point, sim_time, base_time, base_warm_up):
+    # Same point at another fidelity; the warm-up is scaled with the length
+    from sweep import SweepPoint
+
+    if sim_time == base_time:
+        return SweepPoint(point.topology, point.routing, point.traffic, point.rate,
+                          point.seed, point.overrides)
+    warm_up = max(1, round(base_warm_up * sim_time / base_time))
+    overrides = dict(point.overrides)
+    overrides["stats_warm_up_time"] = warm_up
+    return SweepPoint(point.topology, point.routing, point.traffic, point.rate, point.seed,
+                      tuple(sorted(overrides.items())), sim_time)
+
+
+def run_multi_fidelity(base_config, points, fidelities, promote, options, progress=print):
+    # Returns the summary rows and the number of simulated cycles spent
+    from sweep import run_sweep
+
+    with open(base_config, "r") as f:
+        config_text = f.read()
+    base_time = config_value(config_text, "simulation_time", 10000)
+    base_warm_up = config_value(config_text, "stats_warm_up_time", 1000)
+    reset = config_value(config_text, "reset_time", 1000)
+
+    rows = []
+    cycles = 0
+    candidates = list(points)
+    for stage, sim_time in enumerate(fidelities):
+        sim_time = sim_time or base_time
+        batch = {stage_point(p, sim_time, base_time, base_warm_up): p for p in candidates}
+        if progress:
+            progress(f"Stage {stage}: {len(batch)} simulations of {sim_time} cycles")
+        results = {}
+        for outcome in run_sweep(base_config, list(batch), options, progress=None):
+            if outcome["status"] == "ok":
+                cycles += sim_time + reset
+            if outcome.get("metrics") is not None:
+                results[batch[outcome["point"]]] = outcome["metrics"]
+
+        last = stage == len(fidelities) - 1
+        scores = score_points(results) if results else {}
+        fraction = promote[min(stage, len(promote) - 1)]
+        promoted = set() if last else set(select_promoted(scores, fraction, len(results)))
+        ordered = sorted(results.items(), key=lambda item: (item[0].routing, item[0].traffic, item[0].rate))
+        for point, metrics in ordered:
+            rows.append({
+                "Topology": point.topology,
+                "Routing": point.routing,
+                "Traffic": point.traffic,
+                "Injection Rate": point.rate,
+                "Seed": point.seed,
+                "Stage": stage,
+                "Simulation Time": sim_time,
+                "Received Packets": metrics["Received Packets"],
+                "Average Delay": metrics["Average Delay"],
+                "Throughput": metrics["Throughput"],
+                "Score": round(scores[point], 4) if point in scores else None,
+                "Promoted": point in promoted,
+            })
+        candidates = [p for p in candidates if p in promoted]
+        if not candidates:
+            break
+    return rows, cycles
+
+
+def main(argv=None):
+    from sweep import (
+        INJECTION_RATES,
+        SweepPoint,
+        add_run_arguments,
+        default_axes,
+        options_from_args,
+        overrides_from_args,
+        resolve_base,
+        topology_name,
+    )
+
+    parser = argparse.ArgumentParser(description="Screen all points with short runs, refine the interesting ones.")
+    parser.add_argument("base", help="Base config, e.g. configs/mesh_10x10.yaml")
+    parser.add_argument("--routing", nargs="+", help="routing_algorithm values")
+    parser.add_argument("--traffic", nargs="+", help="traffic_distribution values")
+    parser.add_argument("--rates", nargs="+", type=float, default=INJECTION_RATES)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--fidelities", nargs="+", type=int,
+                        help=f"simulation_time of each stage (default: {SCREEN_TIME} then the base config's)")
+    parser.add_argument("--promote", nargs="+", type=float, default=[PROMOTE_FRACTION],
+                        help="Fraction of points promoted after each stage")
+    parser.add_argument("--output", help="Summary CSV (default: <results-dir>/<topology>_fidelity.csv)")
+    add_run_arguments(parser)
+    args = parser.parse_args(argv)
+
+    base = resolve_base(args.base)
+    topology = topology_name(base)
+    with open(base, "r") as f:
+        config_text = f.read()
+    routings, traffics = default_axes(config_text)
+    fidelities = args.fidelities or [SCREEN_TIME, None]
+    extra = tuple(sorted(overrides_from_args(args).items()))
+    points = [
+        SweepPoint(topology, routing, traffic, float(rate), args.seed, extra)
+        for routing in args.routing or routings
+        for traffic in args.traffic or traffics
+        for rate in args.rates
+    ]
+
+    start = time.monotonic()
+    rows, cycles = run_multi_fidelity(base, points, fidelities, args.promote, options_from_args(args))
+
+    output_csv = args.output or os.path.join(args.results_dir, f"{topology}_fidelity.csv")
+    with open(output_csv, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    full = len(points) * (config_value(config_text, "simulation_time", 10000)
+                          + config_value(config_text, "reset_time", 1000))
+    print(f"Simulated {cycles} cycles vs {full} for a full-length grid "
+          f"({full / max(cycles, 1):.1f}x less) in {time.monotonic() - start:.1f}s, summary in {output_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
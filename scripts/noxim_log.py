@@ -0,0 +1,151 @@
+import io
+import re
+
+# Streaming parser for Noxim simulation logs.
+#
+# Logs are read line by line in binary mode, so memory stays constant no
+# matter how large a VERBOSE_HIGH log gets.  Only lines starting with "%"
+# (the end-of-run report), the banner and the "Now running for" and
+# "simulation completed" lines are looked at.  A file may hold several concatenated runs: every banner starts
+# a new run, and so does a repeated report line when a run was appended
+# without its banner.  Each run becomes one record with every "% ..." metric.
+# The "name = [ ... ];" blocks of detailed: true runs (per-router report,
+# whose "% Aggregated ..." lines repeat once per router) are skipped here;
+# router_stats.py parses them.
+
+BANNER = b"Noxim - the NoC Simulator"
+CYCLES_RE = re.compile(rb"\((\d+) cycles executed\)")
+RUNNING_RE = re.compile(rb"Now running for (\d+) cycles")
+
+# Report label -> (column, type).  Labels not listed here are kept under
+# their own name as floats, so nothing the simulator reports gets dropped.
+METRICS = {
+    "Total received packets": ("Received Packets", int),
+    "Total received flits": ("Received Flits", int),
+    "Received/Ideal flits Ratio": ("Received/Ideal Flits Ratio", float),
+    "Average wireless utilization": ("Wireless Utilization", float),
+    "Global average delay (cycles)": ("Average Delay", float),
+    "Max delay (cycles)": ("Max Delay", float),
+    "Network throughput (flits/cycle)": ("Throughput", float),
+    "Average IP throughput (flits/cycle/IP)": ("IP Throughput", float),
+    "Total energy (J)": ("Total Energy", float),
+    "Dynamic energy (J)": ("Dynamic Energy", float),
+    "Static energy (J)": ("Static Energy", float),
+}
+METRIC_COLUMNS = [column for column, _ in METRICS.values()] + ["Simulation Time", "Cycles Executed"]
+
+# Computed from the reported ones by derived_metrics(): total energy per
+# received flit (J) and energy-delay product (J * cycles)
+DERIVED_COLUMNS = ["Energy Per Flit", "Energy Delay Product"]
+
+# A run only counts as complete when it reports these
+REQUIRED_METRICS = ("Received Packets", "Average Delay", "Throughput")
+
+READ_BUFFER = 1 << 20
+
+
+def parse_metric_line(line):
+    # b"% Global average delay (cycles): 42.6511" -> ("Average Delay", 42.6511)
+    label, sep, value = line[1:].rpartition(b":")
+    if not sep:
+        return None
+    label = label.strip().decode(errors="replace")
+    column, kind = METRICS.get(label, (label, float))
+    try:
+        return column, kind(value.strip())
+    except ValueError:
+        try:
+            return column, kind(float(value.strip()))
+        except ValueError:
+            return None
+
+
+def parse_cycles_line(line, pattern, column):
+    match = pattern.search(line)
+    return (column, int(match.group(1))) if match else None
+
+
+def iter_runs(source):
+    # Yields one dict per run found in `source`: a path, a binary file object
+    # or any iterable of bytes lines.  Every record carries its "Run" index
+    # (0-based position in the file) plus the metrics that run reported.
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        with open(source, "rb", buffering=READ_BUFFER) as f:
+            yield from iter_runs(f)
+        return
+
+    run = {}
+    index = 0
+    in_block = False
+    for line in source:
+        if in_block:
+            in_block = line[:2] != b"];"
+            continue
+        if line[:1] == b"%":
+            parsed = parse_metric_line(line)
+        elif line[:1] == b"\t" and BANNER in line:
+            if run:
+                yield {"Run": index, **run}
+                index += 1
+                run = {}
+            continue
+        elif line.startswith(b" Now running for"):
+            parsed = parse_cycles_line(line, RUNNING_RE, "Simulation Time")
+        elif line.startswith(b"Noxim simulation completed"):
+            parsed = parse_cycles_line(line, CYCLES_RE, "Cycles Executed")
+        else:
+            in_block = line.rstrip().endswith(b"= [")
+            continue
+        if parsed is None:
+            continue
+        column, value = parsed
+        if column in run:
+            # Same line again without a banner: an appended run
+            yield {"Run": index, **run}
+            index += 1
+            run = {}
+        run[column] = value
+    if run:
+        yield {"Run": index, **run}
+
+
+def parse_runs(content):
+    # All runs of a log held in memory (str or bytes)
+    if isinstance(content, str):
+        content = content.encode()
+    return list(iter_runs(io.BytesIO(content)))
+
+
+def is_complete(run):
+    return all(column in run for column in REQUIRED_METRICS)
+
+
+def derived_metrics(run):
+    # Derived columns of one run; empty for logs without an energy report
+    energy = run.get("Total Energy")
+    if energy is None:
+        return {}
+    derived = {}
+    if run.get("Received Flits"):
+        derived["Energy Per Flit"] = energy / run["Received Flits"]
+    if run.get("Average Delay") is not None:
+        derived["Energy Delay Product"] = energy * run["Average Delay"]
+    return derived
+
+
+def first_complete(runs):
+    for run in runs:
+        if is_complete(run):
+            return {k: v for k, v in run.items() if k != "Run"}
+    return None
+
+
+def parse_metrics(content):
+    # Metrics of the first complete run of a log, or None when there is none
+    # (e.g. the run crashed or was cut short)
+    return first_complete(parse_runs(content))
+
+
+def read_metrics(path):
+    # parse_metrics() of a log file, streamed instead of read into memory
+    return first_complete(iter_runs(path))
@@ -0,0 +1,76 @@
+import importlib
+import os
+import sys
+
+# One command line for all the tools in this directory, installed as
+# "noxim-tools" by pyproject.toml (or run as python scripts/noxim_tools.py):
+#   noxim-tools sweep configs/mesh_8x8.yaml --rates 0.01 0.05
+#   noxim-tools extract
+#   noxim-tools query saturation mesh_8x8 XY TRAFFIC_SHUFFLE
+#   noxim-tools plot --csv results/all_results.csv --output-dir results/plots
+#   noxim-tools diff "Iter 1" current
+# Every command is the main() of one module and takes that script's options.
+# The module is imported only when its command runs, so "extract" and
+# "query" never load NumPy, pandas or matplotlib and start in a few tens of
+# milliseconds; "noxim-tools --help" imports nothing at all.  Default
+# locations come from paths.py and can be moved with NOXIM_HOME,
+# NOXIM_RESULTS_DIR, NOXIM_BIN, ...
+
+# command -> (module, summary)
+COMMANDS = {
+    "sweep": ("sweep", "Run a parallel parameter sweep"),
+    "extract": ("extract_results", "Extract new or changed runs into the compiled CSV and store"),
+    "query": ("query", "Look up points, curves and saturation rates"),
+    "plot": ("plot_engine", "Render the result plots, redrawing only what changed"),
+    "diff": ("iteration_diff", "Compare two iterations and flag regressions"),
+    "queue": ("job_queue", "Durable job queue and workers"),
+    "knee": ("adaptive_rate", "Adaptive search for the saturation rate"),
+    "fidelity": ("multi_fidelity", "Screen with short runs, refine the interesting points"),
+    "replicate": ("replication", "Replicate points over seeds until their CIs converge"),
+    "dse": ("design_space", "Surrogate-guided exploration of the router parameters"),
+    "pareto": ("pareto", "Energy/delay/throughput Pareto frontiers"),
+    "model": ("queue_model", "Analytical latency/saturation model"),
+    "cost": ("cost_model", "Run-time cost model and makespan prediction"),
+    "traffic": ("traffic_table", "Traffic tables from matrices or traces"),
+    "routers": ("router_stats", "Per-router statistics of detailed runs"),
+    "usage": ("resource_usage", "Compute cost of simulator runs"),
+    "archive": ("log_archive", "Compressed archive of raw logs"),
+    "cache": ("result_cache", "Simulation result cache"),
+    "store": ("results_store", "Columnar results store"),
+    "cube": ("results_cube", "Series from the results cube"),
+    "bench": ("bench_pipeline", "Benchmark the extraction and plotting pipeline"),
+}
+
+
+def usage(prog="noxim-tools"):
+    lines = [f"usage: {prog} <command> [options]", "", "commands:"]
+    lines += [f"  {name:<10} {summary}" for name, (_, summary) in COMMANDS.items()]
+    lines += ["", f"Run '{prog} <command> --help' for the options of a command."]
+    return "\n".join(lines)
+
+
+def run(command, argv=()):
+    # Imports the command's module and runs its main(); returns the exit status
+    module = importlib.import_module(COMMANDS[command][0])
+    return module.main(list(argv)) or 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    prog = os.path.basename(sys.argv[0]) if sys.argv[0] else "noxim-tools"
+    if prog.endswith(".py"):
+        prog = "noxim-tools"
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print(usage(prog))
+        return 0
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"{prog}: unknown command '{command}'\n\n{usage(prog)}", file=sys.stderr)
+        return 2
+    # The commands' parsers take their name from argv[0]
+    sys.argv = [f"{prog} {command}"] + rest
+    return run(command, rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
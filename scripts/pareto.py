@@ -0,0 +1,265 @@
+import argparse
+import os
+import sys
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from extract_results import FULL_FIDELITY, OUTPUT_NAME, full_fidelity
+from paths import RESULTS_DIR
+
+# Energy / delay / throughput Pareto frontiers of the design space.
+#
+# A design point is a (Topology, Routing, Design) triple at one traffic
+# pattern and injection rate, its full-length replicas (seeds, runs)
+# averaged; Design is the design-space sample (design_space.py), "" for the
+# base configs.  skyline() finds the
+# non-dominated points of every (Traffic, Injection Rate) group in one pass
+# over the data sorted once, with no pairwise comparison:
+#   1 objective   the group minimum
+#   2 objectives  sorted by the first, a point survives when the second
+#                 beats the running minimum of the points before it (NumPy)
+#   3 objectives  sorted by the first, a sweep keeps the 2-d staircase of
+#                 the other two seen so far; each point is one bisect
+#                 against it (Kung, Luccio and Preparata)
+# so a few million points take seconds.  Objectives to maximize are negated
+# first; exact duplicates are collapsed so they share their fate.
+#
+# The frontier is ranked within each group by the distance to the group's
+# ideal point, every objective scaled to [0, 1] over the group, and written
+# as results/pareto_frontier.csv.  --plot-dir draws one figure per traffic
+# pattern: all points in grey and the frontier coloured by injection rate.
+
+# column -> +1 to minimize, -1 to maximize
+SENSES = {
+    "Average Delay": 1,
+    "Max Delay": 1,
+    "Throughput": -1,
+    "IP Throughput": -1,
+    "Received/Ideal Flits Ratio": -1,
+    "Total Energy": 1,
+    "Dynamic Energy": 1,
+    "Energy Per Flit": 1,
+    "Energy Delay Product": 1,
+}
+DEFAULT_OBJECTIVES = ("Average Delay", "Throughput", "Energy Per Flit")
+GROUP_BY = ("Traffic", "Injection Rate")
+DESIGN = ("Topology", "Routing", "Design")
+RATE_DIGITS = 6
+PLOT_BACKGROUND = 50000
+
+
+def _dense_ranks(values):
+    return np.unique(values, return_inverse=True)[1].ravel().astype(np.int64)
+
+
+def _skyline_2d(groups, a, b):
+    # Rows are unique and sorted by (group, a, b): a row is dominated when
+    # an earlier row of its group has b <= its b.  Offsetting the ranks of
+    # b by group makes one running minimum restart at every group.
+    n = len(a)
+    key = _dense_ranks(b) - groups * n
+    best = np.minimum.accumulate(key)
+    previous = np.concatenate(([np.iinfo(np.int64).max], best[:-1]))
+    first = np.concatenate(([True], groups[1:] != groups[:-1]))
+    return first | (key < previous)
+
+
+def _skyline_3d(groups, a, b, c):
+    # Rows are unique and sorted by (group, a, b, c); (bs, cs) is the
+    # staircase of the group so far, b ascending and c strictly descending
+    keep = np.zeros(len(a), dtype=bool)
+    bs, cs = [], []
+    group = None
+    for i, (g, bi, ci) in enumerate(zip(groups.tolist(), b.tolist(), c.tolist())):
+        if g != group:
+            group = g
+            bs, cs = [], []
+        j = bisect_right(bs, bi) - 1
+        if j >= 0 and cs[j] <= ci:
+            continue
+        keep[i] = True
+        start = bisect_left(bs, bi)
+        end = start
+        while end < len(cs) and cs[end] >= ci:
+            end += 1
+        bs[start:end] = [bi]
+        cs[start:end] = [ci]
+    return keep
+
+
+def skyline(points, groups=None):
+    # Boolean mask of the non-dominated rows of `points` (n x k, every column
+    # to be minimized) within each group; rows with NaN are never kept
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or not 1 <= points.shape[1] <= 3:
+        raise ValueError("skyline() takes 1 to 3 objectives")
+    n = len(points)
+    groups = np.zeros(n, dtype=np.int64) if groups is None else _dense_ranks(groups)
+    valid = ~np.isnan(points).any(axis=1)
+    mask = np.zeros(n, dtype=bool)
+    if not valid.any():
+        return mask
+
+    # Sort by (group, objectives...) and collapse runs of identical rows
+    values, groups = points[valid], groups[valid]
+    order = np.lexsort(tuple(values[:, j] for j in reversed(range(values.shape[1]))) + (groups,))
+    values, groups = values[order], groups[order]
+    new = np.ones(len(values), dtype=bool)
+    new[1:] = (groups[1:] != groups[:-1]) | (values[1:] != values[:-1]).any(axis=1)
+    unique, g = values[new], groups[new]
+    if unique.shape[1] == 1:
+        keep = np.concatenate(([True], g[1:] != g[:-1]))
+    elif unique.shape[1] == 2:
+        keep = _skyline_2d(g, unique[:, 0], unique[:, 1])
+    else:
+        keep = _skyline_3d(g, unique[:, 0], unique[:, 1], unique[:, 2])
+    kept = np.empty(len(values), dtype=bool)
+    kept[order] = keep[np.cumsum(new) - 1]
+    mask[valid] = kept
+    return mask
+
+
+def design_points(df, objectives, per_run=False):
+    # One row per design point and group, replicas averaged; only
+    # full-length runs count
+    df = full_fidelity(df)
+    keys = list(GROUP_BY) + list(DESIGN) + (["Seed", "Run"] if per_run else [])
+    df = df.assign(**{"Injection Rate": df["Injection Rate"].astype(np.float64).round(RATE_DIGITS)})
+    for column in DESIGN + GROUP_BY[:1]:
+        df[column] = np.where(df[column].isna(), "", df[column].astype(str))
+    return df.groupby(keys, observed=True, dropna=False, sort=False)[list(objectives)].mean().reset_index()
+
+
+def design_label(row):
+    label = f"{row['Topology']} {row['Routing']}"
+    return f"{label} design {row['Design']}" if row["Design"] else label
+
+
+def pareto_frontier(df, objectives=DEFAULT_OBJECTIVES):
+    # The non-dominated rows of `df` per (Traffic, Injection Rate), with
+    # their "Rank" and "Distance" to the group's ideal point
+    objectives = list(objectives)
+    values = np.column_stack([df[o].to_numpy(np.float64) * SENSES.get(o, 1) for o in objectives])
+    groups = df.groupby(list(GROUP_BY), sort=False).ngroup().to_numpy()
+    frontier = df[skyline(values, groups)].copy()
+
+    # Scale by the group's range over all its points, not just the frontier
+    grouped = df.groupby(list(GROUP_BY), sort=False)[objectives]
+    low = grouped.transform("min").loc[frontier.index]
+    high = grouped.transform("max").loc[frontier.index]
+    span = (high - low).where(high > low, 1.0)
+    scaled = (frontier[objectives] - low) / span
+    for o in objectives:
+        if SENSES.get(o, 1) < 0:
+            scaled[o] = 1.0 - scaled[o]
+    frontier["Distance"] = np.sqrt((scaled ** 2).sum(axis=1))
+    frontier["Rank"] = frontier.groupby(list(GROUP_BY), sort=False)["Distance"].rank(method="min").astype(int)
+    return frontier.sort_values(list(GROUP_BY) + ["Rank"]).reset_index(drop=True)
+
+
+def load_points(csv_path=None, store_dir=None, iteration=None, objectives=DEFAULT_OBJECTIVES, per_run=False):
+    columns = list(dict.fromkeys(list(GROUP_BY) + list(DESIGN) + list(objectives)
+                                 + (["Seed", "Run"] if per_run else [])))
+    if store_dir:
+        from results_store import load_frame
+
+        where = {"Fidelity": FULL_FIDELITY}
+        if iteration:
+            where["Iteration"] = iteration
+        return load_frame(store_dir, columns=columns, where=where)
+
+    import pandas as pd
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"{csv_path} has no {', '.join(missing)} column(s); recompile it with extract_results.py")
+    extra = [c for c in ("Iteration", "Fidelity") if c in header and c not in columns]
+    df = pd.read_csv(csv_path, usecols=columns + extra)
+    if iteration and "Iteration" in df.columns:
+        df = df[df["Iteration"] == iteration]
+    return full_fidelity(df).drop(columns=extra)
+
+
+def plot_frontiers(points, frontier, objectives, plot_dir):
+    # One figure per traffic pattern: first vs last objective
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    os.makedirs(plot_dir, exist_ok=True)
+    x, y = objectives[0], objectives[-1]
+    rng = np.random.default_rng(0)
+    paths = []
+    for traffic, front in frontier.groupby("Traffic", sort=True):
+        background = points[points["Traffic"] == traffic]
+        if len(background) > PLOT_BACKGROUND:
+            background = background.iloc[rng.choice(len(background), PLOT_BACKGROUND, replace=False)]
+        fig, ax = plt.subplots(figsize=(7, 5))
+        ax.scatter(background[x], background[y], s=6, color="0.8", label="dominated", rasterized=True)
+        dots = ax.scatter(front[x], front[y], s=28, c=front["Injection Rate"], cmap="viridis",
+                          edgecolors="black", linewidths=0.4, label="Pareto frontier")
+        fig.colorbar(dots, ax=ax, label="Injection Rate")
+        for _, row in front[front["Rank"] == 1].iterrows():
+            ax.annotate(design_label(row), (row[x], row[y]), fontsize=7,
+                        xytext=(4, 4), textcoords="offset points")
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel(x)
+        ax.set_ylabel(y)
+        ax.set_title(f"{traffic}: " + " / ".join(objectives))
+        ax.legend(loc="best", fontsize=8)
+        fig.tight_layout()
+        path = os.path.join(plot_dir, f"pareto_{traffic}.png")
+        fig.savefig(path, dpi=120)
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Energy/delay/throughput Pareto frontiers per traffic and rate.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help=f"Compiled results CSV (default: results/{OUTPUT_NAME})")
+    source.add_argument("--store", help="Columnar results store (results_store.py)")
+    parser.add_argument("--objectives", nargs="+", choices=sorted(SENSES), default=list(DEFAULT_OBJECTIVES),
+                        help="1 to 3 metrics; delays and energies are minimized, throughputs maximized")
+    parser.add_argument("--iteration", default="current", help="Iteration to use ('' for all)")
+    parser.add_argument("--traffic", nargs="+", help="Only these traffic patterns")
+    parser.add_argument("--per-run", action="store_true", help="Treat every seed/run as its own point")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "pareto_frontier.csv"))
+    parser.add_argument("--top", type=int, default=5, help="Frontier rows printed per group (0: none)")
+    parser.add_argument("--plot-dir", help="Write one frontier plot per traffic pattern here")
+    args = parser.parse_args(argv)
+    if len(args.objectives) > 3:
+        parser.error("at most 3 objectives")
+
+    csv_path = args.csv or (None if args.store else os.path.join(RESULTS_DIR, OUTPUT_NAME))
+    raw = load_points(csv_path, args.store, args.iteration or None, args.objectives, args.per_run)
+    if args.traffic:
+        raw = raw[raw["Traffic"].astype(str).isin(args.traffic)]
+    points = design_points(raw, args.objectives, args.per_run)
+    frontier = pareto_frontier(points, args.objectives)
+
+    tmp = args.output + ".tmp"
+    frontier.to_csv(tmp, index=False, float_format="%.6g")
+    os.replace(tmp, args.output)
+    groups = frontier.groupby(list(GROUP_BY), sort=True)
+    print(f"{len(frontier)} of {len(points)} design points on the frontier of {groups.ngroups} "
+          f"traffic/rate group(s); saved {args.output}")
+    if args.top:
+        for (traffic, rate), rows in groups:
+            print(f"\n{traffic} @ {rate:g}")
+            for _, row in rows.head(args.top).iterrows():
+                metrics = "  ".join(f"{o}={row[o]:.4g}" for o in args.objectives)
+                print(f"  {row['Rank']:>3}  {design_label(row):<27} {metrics}")
+    if args.plot_dir:
+        for path in plot_frontiers(points, frontier, args.objectives, args.plot_dir):
+            print(f"Saved {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import os
+
+# Default locations used by every tool.  Each one can be moved with an
+# environment variable, and the tools' command line options (--results-dir,
+# --sim-bin, ...) override them per run:
+#   NOXIM_HOME         directory holding configs/ and results/ (default: this
+#                      checkout, or the working directory when the tools are
+#                      installed as a package)
+#   NOXIM_CONFIG_DIR   base configs             (default: $NOXIM_HOME/configs)
+#   NOXIM_RESULTS_DIR  result tree              (default: $NOXIM_HOME/results)
+#   NOXIM_CACHE_DIR    simulation result cache  (default: $NOXIM_HOME/.sim_cache)
+#   NOXIM_DIR          Noxim build              (default: ~/noxim)
+#   NOXIM_BIN          simulator binary         (default: $NOXIM_DIR/bin/noxim)
+#   NOXIM_POWER        power model              (default: $NOXIM_DIR/bin/power.yaml)
+# Standard library only: this is imported by every command, including the
+# ones that must start fast.
+
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.environ.get("NOXIM_HOME") or (
+    SOURCE_DIR if os.path.isdir(os.path.join(SOURCE_DIR, "configs")) else os.getcwd()
+)
+CONFIG_DIR = os.environ.get("NOXIM_CONFIG_DIR") or os.path.join(REPO_DIR, "configs")
+RESULTS_DIR = os.environ.get("NOXIM_RESULTS_DIR") or os.path.join(REPO_DIR, "results")
+CACHE_DIR = os.environ.get("NOXIM_CACHE_DIR") or os.path.join(REPO_DIR, ".sim_cache")
+
+NOXIM_DIR = os.environ.get("NOXIM_DIR") or os.path.join(os.path.expanduser("~"), "noxim")
+NOXIM_BIN = os.environ.get("NOXIM_BIN") or os.path.join(NOXIM_DIR, "bin", "noxim")
+POWER_FILE = os.environ.get("NOXIM_POWER") or os.path.join(NOXIM_DIR, "bin", "power.yaml")
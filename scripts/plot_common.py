@@ -0,0 +1,63 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from extract_results import full_fidelity
+from replication import CI_METRICS
+
+# Shared helpers for the plot scripts.
+
+# Marker drawn over the points a multi-fidelity sweep refined
+REFINED_MARKER = "*"
+
+
+def series_points(data, y, x="Injection Rate"):
+    # Mean of `y` per x value (averaging seed replicas) and its CI half-width
+    # when the data carries one, else None.  Only full-length runs are used,
+    # screening runs would pull the means towards their short-run values.
+    data = full_fidelity(data)
+    grouped = data.groupby(x, sort=True)
+    mean = grouped[y].mean()
+    ci_column = CI_METRICS.get(y)
+    err = None
+    if ci_column in data.columns:
+        err = grouped[ci_column].max()
+        if not err.notna().any():
+            err = None
+    return mean.index, mean.values, err
+
+
+def refined_points(data, xs, x="Injection Rate"):
+    # Boolean mask over xs: the x values whose runs were promoted from a
+    # screening run (the "Refined" column of the compiled results)
+    if "Refined" not in data.columns:
+        return np.zeros(len(xs), dtype=bool)
+    refined = full_fidelity(data)
+    refined = refined[refined["Refined"] == 1]
+    return np.isin(np.asarray(xs), refined[x].unique())
+
+
+def plot_series(data, y, x="Injection Rate", **kwargs):
+    # Line of y vs x, with 95% CI error bars where replicas were run and a
+    # star on the refined points.  Returns whether any point was refined.
+    xs, ys, err = series_points(data, y, x)
+    return plot_curve(xs, ys, None if err is None else err.values, refined_points(data, xs, x), **kwargs)
+
+
+def plot_curve(xs, ys, err=None, refined=None, **kwargs):
+    # plot_series on plain arrays: err holds CI half-widths (NaN where there
+    # is none), refined is a boolean mask over xs
+    xs, ys = np.asarray(xs), np.asarray(ys)
+    if err is None or np.isnan(err).all():
+        line = plt.plot(xs, ys, **kwargs)[0]
+    else:
+        line = plt.errorbar(xs, ys, yerr=np.nan_to_num(err), capsize=3, **kwargs).lines[0]
+    if refined is not None and refined.any():
+        plt.scatter(xs[refined], ys[refined], marker=REFINED_MARKER, s=140,
+                    color=line.get_color(), edgecolors="black", linewidths=0.5, zorder=3)
+    return refined is not None and bool(refined.any())
+
+
+def refined_legend():
+    # Legend entry explaining the refined marker
+    plt.scatter([], [], marker=REFINED_MARKER, s=140, color="white", edgecolors="black",
+                linewidths=0.5, label="refined (multi-fidelity)")
@@ -0,0 +1,263 @@
+import argparse
+import fnmatch
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from plot_common import plot_curve, refined_legend  # noqa: E402
+from replication import CI_METRICS  # noqa: E402
+from results_cube import ResultsCube  # noqa: E402
+
+# Declarative plotting engine.
+#
+# A PlotSpec says what to draw: y against x, one line per value of `series`,
+# one figure per combination of the `facet` columns.  render_plots() builds
+# one ResultsCube per spec, averaging out the other axes, and cuts each
+# figure's (series, rate) block out of it by index; no figure or series
+# masks the rows again.  Each block is hashed and only the PNGs whose block
+# (or spec) changed since the last run are redrawn; the digests live in
+# <output_dir>/.plot_index.json.  Figures are rendered on a process pool
+# with the Agg backend.
+#
+# Only full-length runs of the base configs are plotted (the cube's
+# selection); points refined by a multi-fidelity sweep are starred
+# (plot_common.plot_curve).
+#
+# The spec sets below reproduce the figures of plot_results.py,
+# plot_scripts_iter2.py and plot_generate_delta.py.
+
+INDEX_NAME = ".plot_index.json"
+
+Y_LABELS = {
+    "Average Delay": "Average Delay (cycles)",
+    "Throughput": "Throughput (flits/cycle)",
+}
+
+
+@dataclass(frozen=True)
+class PlotSpec:
+    # File name and title are format strings over the facet values
+    name: str
+    y: str
+    series: str
+    facet: tuple = ()
+    x: str = "Injection Rate"
+    title: str = ""
+    marker: str = "o"
+    # ((column, (pattern, ...)), ...): keep rows whose column matches one of
+    # the fnmatch patterns
+    filters: tuple = ()
+
+
+ROUTING_PLOTS = [
+    PlotSpec("delay_vs_rate_{Traffic}.png", "Average Delay", "Routing", ("Traffic",),
+             title="Average Delay vs. Injection Rate\nTraffic: {Traffic}", marker="o"),
+    PlotSpec("delay_vs_rate_routing_{Routing}.png", "Average Delay", "Traffic", ("Routing",),
+             title="Average Delay vs. Injection Rate\nRouting: {Routing}", marker="s"),
+    PlotSpec("throughput_vs_rate_{Traffic}.png", "Throughput", "Routing", ("Traffic",),
+             title="Throughput vs. Injection Rate\nTraffic: {Traffic}", marker="^",
+             filters=(("Traffic", ("TRAFFIC_RANDOM",)),)),
+]
+
+DELTA_PLOTS = [
+    PlotSpec("delay_vs_rate_{Traffic}.png", "Average Delay", "Topology", ("Traffic",),
+             title="Average Delay vs. Injection Rate\nTraffic: {Traffic} (Routing=DELTA)", marker="o"),
+    PlotSpec("throughput_vs_rate_{Traffic}.png", "Throughput", "Topology", ("Traffic",),
+             title="Throughput vs. Injection Rate\nTraffic: {Traffic} (Routing=DELTA)", marker="^"),
+    PlotSpec("delay_vs_rate_topology_{Topology}.png", "Average Delay", "Traffic", ("Topology",),
+             title="Average Delay vs. Injection Rate\nTopology: {Topology} (Routing=DELTA)", marker="s"),
+    PlotSpec("throughput_vs_rate_topology_{Topology}.png", "Throughput", "Traffic", ("Topology",),
+             title="Throughput vs. Injection Rate\nTopology: {Topology} (Routing=DELTA)", marker="d"),
+]
+
+TOPOLOGY_PLOTS = [
+    PlotSpec("average_delay_all_topologies.png", "Average Delay", "Topology",
+             title="Global Average Delay vs. Injection Rate", marker="o"),
+    PlotSpec("throughput_all_topologies.png", "Throughput", "Topology",
+             title="Throughput vs. Injection Rate", marker="s"),
+    PlotSpec("mesh_scalability_delay.png", "Average Delay", "Topology",
+             title="MESH Scalability: Average Delay vs. Injection Rate", marker="o",
+             filters=(("Topology", ("mesh_*",)),)),
+    PlotSpec("delta_vs_mesh_delay.png", "Average Delay", "Topology",
+             title="Delta Network Topologies vs. Mesh (4x4): Average Delay", marker="D",
+             filters=(("Topology", ("mesh_4x4", "butterfly", "baseline", "omega")),)),
+]
+
+PLOT_SETS = {"routing": ROUTING_PLOTS, "delta": DELTA_PLOTS, "topology": TOPOLOGY_PLOTS}
+
+
+def apply_filters(df, filters):
+    for column, patterns in filters:
+        labels = [str(v) for v in df[column].unique()]
+        keep = [v for v in labels if any(fnmatch.fnmatchcase(v, p) for p in patterns)]
+        df = df[df[column].astype(str).isin(keep)]
+    return df
+
+
+def figure_metrics(spec):
+    # Cube metrics a figure needs: y, its CI and the refined flag
+    return [spec.y] + [m for m in (CI_METRICS.get(spec.y), "Refined") if m]
+
+
+def figure_cube(df, spec):
+    # ResultsCube of the spec's rows with the axes that are neither facet,
+    # series nor x averaged out.  CIs and the refined flag are the largest of
+    # the averaged points rather than their mean.
+    cube = ResultsCube.from_frame(df, figure_metrics(spec), iteration=None)
+    other = [axis for axis in cube.axes if axis not in spec.facet + (spec.series, spec.x)]
+    if not other or not cube.values.size:
+        return cube
+    mean, peak = cube.reduce("mean", over=other), cube.reduce("max", over=other)
+    for metric in cube.metrics:
+        if metric != spec.y:
+            j = cube.metric_index[metric]
+            mean.values[..., j] = peak.values[..., j]
+    return mean
+
+
+def slice_digest(spec, facet_values, data):
+    labels, rates, values, metrics = data
+    h = hashlib.sha256(repr((spec, facet_values, labels, rates, metrics)).encode())
+    h.update(np.ascontiguousarray(values).tobytes())
+    return h.hexdigest()
+
+
+def build_jobs(df, specs, output_dir):
+    # One job per figure: (spec, facet values, data, output path, digest),
+    # data being (series labels, rates, values[series, rate, metric],
+    # metrics) cut out of the spec's ResultsCube
+    jobs = []
+    for spec in specs:
+        cube = figure_cube(apply_filters(df, spec.filters), spec)
+        if not cube.values.size:
+            continue
+        rates = cube.labels[spec.x]
+        for key in itertools.product(*(cube.labels[axis] for axis in spec.facet)):
+            facet_values = dict(zip(spec.facet, (str(k) for k in key)))
+            values = cube.sel(**{axis.replace(" ", "_"): k for axis, k in zip(spec.facet, key)})
+            present = ~np.isnan(values[..., cube.metric_index[spec.y]])
+            if not present.any():
+                continue
+            data = (cube.labels[spec.series], rates, values, cube.metrics)
+            path = os.path.join(output_dir, spec.name.format(**facet_values))
+            jobs.append((spec, facet_values, data, path, slice_digest(spec, facet_values, data)))
+    return jobs
+
+
+def render(job):
+    spec, facet_values, (labels, rates, values, metrics), path, _ = job
+    column = {metric: j for j, metric in enumerate(metrics)}
+    rates = np.asarray(rates)
+    ci = CI_METRICS.get(spec.y)
+    plt.figure(figsize=(10, 6))
+    refined = False
+    for label, curve in zip(labels, values):
+        ys = curve[:, column[spec.y]]
+        present = ~np.isnan(ys)
+        if not present.any():
+            continue
+        err = curve[present, column[ci]] if ci in column else None
+        flags = curve[present, column["Refined"]] > 0 if "Refined" in column else None
+        refined |= plot_curve(rates[present], ys[present], err, flags, marker=spec.marker, label=label)
+    if refined:
+        refined_legend()
+    plt.title(spec.title.format(**facet_values))
+    plt.xlabel(spec.x)
+    plt.ylabel(Y_LABELS.get(spec.y, spec.y))
+    plt.grid(True)
+    plt.legend()
+    plt.savefig(path)
+    plt.close()
+    return path
+
+
+def load_index(output_dir):
+    try:
+        with open(os.path.join(output_dir, INDEX_NAME), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_index(output_dir, index):
+    path = os.path.join(output_dir, INDEX_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def render_plots(df, specs, output_dir, jobs=None, force=False, progress=print):
+    # Renders the figures of `specs` whose data changed.  Returns the paths
+    # of the PNGs that were (re)drawn.
+    os.makedirs(output_dir, exist_ok=True)
+    index = load_index(output_dir)
+    todo = [
+        job for job in build_jobs(df, specs, output_dir)
+        if force or index.get(os.path.basename(job[3])) != job[4] or not os.path.exists(job[3])
+    ]
+    if not todo:
+        return []
+
+    workers = min(jobs or os.cpu_count() or 1, len(todo))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(render, todo, chunksize=max(1, len(todo) // (workers * 4))))
+    else:
+        paths = [render(job) for job in todo]
+
+    for job in todo:
+        index[os.path.basename(job[3])] = job[4]
+    save_index(output_dir, index)
+    if progress:
+        for path in paths:
+            progress(f"Saved {path}")
+    return paths
+
+
+def load_results(csv_path=None, store_dir=None, iteration=None):
+    if store_dir:
+        from results_store import load_frame
+
+        where = {"Iteration": iteration} if iteration else None
+        return load_frame(store_dir, where=where)
+    df = pd.read_csv(csv_path)
+    if iteration and "Iteration" in df.columns:
+        df = df[df["Iteration"] == iteration]
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render result plots in parallel, redrawing only what changed.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="Compiled results CSV")
+    source.add_argument("--store", help="Columnar results store (results_store.py)")
+    parser.add_argument("--set", dest="plot_set", choices=sorted(PLOT_SETS), default="routing")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--topologies", nargs="+", help="Only plot these topologies")
+    parser.add_argument("--iteration", default="current", help="Iteration to plot ('' for all)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="Redraw every figure")
+    args = parser.parse_args(argv)
+
+    df = load_results(args.csv, args.store, args.iteration or None)
+    if args.topologies:
+        df = df[df["Topology"].astype(str).isin(args.topologies)]
+    paths = render_plots(df, PLOT_SETS[args.plot_set], args.output_dir, args.jobs, args.force)
+    print(f"{len(paths)} plot(s) redrawn in {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,126 +1,46 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
 import os
+import sys
 
-RESULTS_CSV = "/home/rishi/results/delta_topologies_compiled_results.csv"
-OUTPUT_DIR = "/home/rishi/results/plots_delta"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+from paths import RESULTS_DIR
 
-df = pd.read_csv(RESULTS_CSV)
+RESULTS_CSV = os.path.join(RESULTS_DIR, "delta_topologies_compiled_results.csv")
+OUTPUT_DIR = os.path.join(RESULTS_DIR, "plots_delta")
 
-expected_cols = {"Topology", "Routing", "Traffic", "Injection Rate", "Received Packets", "Average Delay", "Throughput"}
-if not expected_cols.issubset(df.columns):
-    raise ValueError(f"The CSV must contain {expected_cols} columns.")
+# Figures (see DELTA_PLOTS in plot_engine.py), for butterfly, baseline and
+# omega with DELTA routing:
+# - per traffic pattern: Average Delay and Throughput vs. Injection Rate,
+#   one line per topology
+# - per topology: Average Delay and Throughput vs. Injection Rate, one line
+#   per traffic pattern
+# Only figures whose data changed since the last run are redrawn.
 
-# Since Routing is always DELTA, we don't need to group by routing. Just filter if needed.
-# Confirm that routing is DELTA for all entries (optional check)
-if (df['Routing'].unique() != ['DELTA']).all():
-    print("Warning: Found routing algorithms other than DELTA. Proceeding anyway.")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plot the delta network figures.")
+    parser.add_argument("--csv", default=RESULTS_CSV)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args(argv)
 
-def plot_delay_by_topologies_for_traffic(df, traffic_pattern):
-    # For a given traffic pattern, plot Average Delay vs Injection Rate for each topology
-    subset = df[(df['Traffic'] == traffic_pattern)]
-    if subset.empty:
-        print(f"No data for traffic pattern: {traffic_pattern}")
-        return
+    # pandas and matplotlib are only loaded once there is something to plot
+    import pandas as pd
 
-    plt.figure(figsize=(10,6))
-    for topo in subset['Topology'].unique():
-        data = subset[subset['Topology'] == topo].sort_values('Injection Rate')
-        plt.plot(data['Injection Rate'], data['Average Delay'], marker='o', label=topo)
-    
-    plt.title(f"Average Delay vs. Injection Rate\nTraffic: {traffic_pattern} (Routing=DELTA)")
-    plt.xlabel("Injection Rate")
-    plt.ylabel("Average Delay (cycles)")
-    plt.grid(True)
-    plt.legend()
-    output_file = os.path.join(OUTPUT_DIR, f"delay_vs_rate_{traffic_pattern}.png")
-    plt.savefig(output_file)
-    plt.close()
-    print(f"Saved {output_file}")
+    from plot_engine import DELTA_PLOTS, render_plots
 
-def plot_delay_by_traffic_for_topology(df, topology):
-    # For a given topology, plot Average Delay vs Injection Rate for each traffic pattern
-    subset = df[df['Topology'] == topology]
-    if subset.empty:
-        print(f"No data for topology: {topology}")
-        return
+    df = pd.read_csv(args.csv)
 
-    plt.figure(figsize=(10,6))
-    for pattern in subset['Traffic'].unique():
-        data = subset[subset['Traffic'] == pattern].sort_values('Injection Rate')
-        plt.plot(data['Injection Rate'], data['Average Delay'], marker='s', label=pattern)
-    
-    plt.title(f"Average Delay vs. Injection Rate\nTopology: {topology} (Routing=DELTA)")
-    plt.xlabel("Injection Rate")
-    plt.ylabel("Average Delay (cycles)")
-    plt.grid(True)
-    plt.legend()
-    output_file = os.path.join(OUTPUT_DIR, f"delay_vs_rate_topology_{topology}.png")
-    plt.savefig(output_file)
-    plt.close()
-    print(f"Saved {output_file}")
+    expected_cols = {"Topology", "Routing", "Traffic", "Injection Rate", "Received Packets", "Average Delay", "Throughput"}
+    if not expected_cols.issubset(df.columns):
+        raise ValueError(f"The CSV must contain {expected_cols} columns.")
 
-def plot_throughput_by_topologies_for_traffic(df, traffic_pattern):
-    # For a given traffic pattern, plot Throughput vs Injection Rate for each topology
-    subset = df[df['Traffic'] == traffic_pattern]
-    if subset.empty:
-        print(f"No data for traffic pattern: {traffic_pattern}")
-        return
+    # Since Routing is always DELTA, we don't need to group by routing.
+    if (df['Routing'].unique() != ['DELTA']).all():
+        print("Warning: Found routing algorithms other than DELTA. Proceeding anyway.")
 
-    plt.figure(figsize=(10,6))
-    for topo in subset['Topology'].unique():
-        data = subset[subset['Topology'] == topo].sort_values('Injection Rate')
-        plt.plot(data['Injection Rate'], data['Throughput'], marker='^', label=topo)
-    
-    plt.title(f"Throughput vs. Injection Rate\nTraffic: {traffic_pattern} (Routing=DELTA)")
-    plt.xlabel("Injection Rate")
-    plt.ylabel("Throughput (flits/cycle)")
-    plt.grid(True)
-    plt.legend()
-    output_file = os.path.join(OUTPUT_DIR, f"throughput_vs_rate_{traffic_pattern}.png")
-    plt.savefig(output_file)
-    plt.close()
-    print(f"Saved {output_file}")
+    render_plots(df, DELTA_PLOTS, args.output_dir)
+    print("All plots generated for butterfly, baseline, and omega topologies with DELTA routing.")
+    return 0
 
-def plot_throughput_by_traffic_for_topology(df, topology):
-    # For a given topology, plot Throughput vs Injection Rate for each traffic pattern
-    subset = df[df['Topology'] == topology]
-    if subset.empty:
-        print(f"No data for topology: {topology}")
-        return
 
-    plt.figure(figsize=(10,6))
-    for pattern in subset['Traffic'].unique():
-        data = subset[subset['Traffic'] == pattern].sort_values('Injection Rate')
-        plt.plot(data['Injection Rate'], data['Throughput'], marker='d', label=pattern)
-    
-    plt.title(f"Throughput vs. Injection Rate\nTopology: {topology} (Routing=DELTA)")
-    plt.xlabel("Injection Rate")
-    plt.ylabel("Throughput (flits/cycle)")
-    plt.grid(True)
-    plt.legend()
-    output_file = os.path.join(OUTPUT_DIR, f"throughput_vs_rate_topology_{topology}.png")
-    plt.savefig(output_file)
-    plt.close()
-    print(f"Saved {output_file}")
-
-# Traffic patterns available: TRAFFIC_RANDOM and TRAFFIC_BIT_REVERSAL
-traffic_patterns = df['Traffic'].unique()
-topologies = df['Topology'].unique()
-
-# Generate plots
-for pattern in traffic_patterns:
-    # Delay vs Injection Rate for all topologies under this traffic pattern
-    plot_delay_by_topologies_for_traffic(df, pattern)
-    # Throughput vs Injection Rate for all topologies under this traffic pattern
-    plot_throughput_by_topologies_for_traffic(df, pattern)
-
-for topo in topologies:
-    # Delay vs Injection Rate for all traffic patterns under this topology
-    plot_delay_by_traffic_for_topology(df, topo)
-    # Throughput vs Injection Rate for all traffic patterns under this topology
-    plot_throughput_by_traffic_for_topology(df, topo)
-
-print("All plots generated for butterfly, baseline, and omega topologies with DELTA routing.")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,98 +1,40 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
 import os
+import sys
 
-# Set up paths
-RESULTS_CSV = "/home/rishi/results/compiled_results.csv"
-OUTPUT_DIR = "/home/rishi/results/plots"
-
-# Create the output directory if it does not exist
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+from paths import RESULTS_DIR
 
-# Read the compiled results into a DataFrame
-df = pd.read_csv(RESULTS_CSV)
+# Set up paths
+RESULTS_CSV = os.path.join(RESULTS_DIR, "compiled_results.csv")
+OUTPUT_DIR = os.path.join(RESULTS_DIR, "plots")
 
 # The DataFrame is expected to have these columns:
 # Topology, Injection Rate, Received Packets, Average Delay, Throughput
+#
+# Figures (see TOPOLOGY_PLOTS in plot_engine.py):
+# 1. Average Delay vs. Injection Rate for all topologies
+# 2. Throughput vs. Injection Rate for all topologies
+# 3. MESH sizes only (mesh_2x2, mesh_4x4, mesh_8x8, ...)
+# 4. Delta networks (BUTTERFLY, BASELINE, OMEGA) vs mesh_4x4
+# Only figures whose data changed since the last run are redrawn.
 
-# 1. Plot Average Delay vs. Injection Rate for all topologies
-def plot_delay_vs_injection(df, output_path):
-    plt.figure(figsize=(10,6))
-    # Get unique topologies
-    topologies = df['Topology'].unique()
-    for topo in topologies:
-        subset = df[df['Topology'] == topo].sort_values('Injection Rate')
-        plt.plot(subset['Injection Rate'], subset['Average Delay'], marker='o', label=topo)
-
-    plt.title('Global Average Delay vs. Injection Rate')
-    plt.xlabel('Injection Rate')
-    plt.ylabel('Average Delay (cycles)')
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(output_path)
-    plt.close()
-    print(f"Saved plot: {output_path}")
-
-# 2. Plot Throughput vs. Injection Rate for all topologies
-def plot_throughput_vs_injection(df, output_path):
-    plt.figure(figsize=(10,6))
-    topologies = df['Topology'].unique()
-    for topo in topologies:
-        subset = df[df['Topology'] == topo].sort_values('Injection Rate')
-        plt.plot(subset['Injection Rate'], subset['Throughput'], marker='s', label=topo)
-
-    plt.title('Throughput vs. Injection Rate')
-    plt.xlabel('Injection Rate')
-    plt.ylabel('Throughput (flits/cycle)')
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(output_path)
-    plt.close()
-    print(f"Saved plot: {output_path}")
-
-# 3. Compare MESH sizes only (e.g., mesh_2x2, mesh_4x4, mesh_8x8)
-def plot_mesh_scalability(df, output_path):
-    plt.figure(figsize=(10,6))
-    # Filter for only those topologies that start with "mesh_"
-    mesh_variants = [t for t in df['Topology'].unique() if t.startswith("mesh_")]
-    for topo in mesh_variants:
-        subset = df[df['Topology'] == topo].sort_values('Injection Rate')
-        plt.plot(subset['Injection Rate'], subset['Average Delay'], marker='o', label=topo)
 
-    plt.title('MESH Scalability: Average Delay vs. Injection Rate')
-    plt.xlabel('Injection Rate')
-    plt.ylabel('Average Delay (cycles)')
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(output_path)
-    plt.close()
-    print(f"Saved plot: {output_path}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plot the topology comparison figures.")
+    parser.add_argument("--csv", default=RESULTS_CSV)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args(argv)
 
-# 4. Compare Delta Networks (BUTTERFLY, BASELINE, OMEGA) vs MESH
-def plot_delta_vs_mesh(df, output_path):
-    plt.figure(figsize=(10,6))
-    # Assuming you compare a single mesh size (e.g., mesh_4x4) against others:
-    compare_topologies = ["mesh_4x4", "butterfly", "baseline", "omega"]
-    # Filter only these topologies if they exist in the dataset
-    compare_topologies = [t for t in compare_topologies if t in df['Topology'].unique()]
+    # pandas and matplotlib are only loaded once there is something to plot
+    import pandas as pd
 
-    for topo in compare_topologies:
-        subset = df[df['Topology'] == topo].sort_values('Injection Rate')
-        plt.plot(subset['Injection Rate'], subset['Average Delay'], marker='D', label=topo)
+    from plot_engine import TOPOLOGY_PLOTS, render_plots
 
-    plt.title('Delta Network Topologies vs. Mesh (4x4): Average Delay')
-    plt.xlabel('Injection Rate')
-    plt.ylabel('Average Delay (cycles)')
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(output_path)
-    plt.close()
-    print(f"Saved plot: {output_path}")
+    df = pd.read_csv(args.csv)
+    render_plots(df, TOPOLOGY_PLOTS, args.output_dir)
+    print("All plots generated successfully.")
+    return 0
 
-# Run the plotting functions
-plot_delay_vs_injection(df, os.path.join(OUTPUT_DIR, "average_delay_all_topologies.png"))
-plot_throughput_vs_injection(df, os.path.join(OUTPUT_DIR, "throughput_all_topologies.png"))
-plot_mesh_scalability(df, os.path.join(OUTPUT_DIR, "mesh_scalability_delay.png"))
-plot_delta_vs_mesh(df, os.path.join(OUTPUT_DIR, "delta_vs_mesh_delay.png"))
 
-print("All plots generated successfully.")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+
+from adaptive_rate import DELAY_FACTOR, PLATEAU, RATE_DIGITS, KneeSearch
+from extract_results import FULL_FIDELITY
+from paths import RESULTS_DIR
+
+# Quick lookups in the extracted results, for shells and scripts that ask
+# many small questions:
+#   query.py saturation mesh_8x8 XY TRAFFIC_SHUFFLE
+#   query.py curve mesh_8x8 XY TRAFFIC_SHUFFLE
+#   query.py point mesh_8x8 XY TRAFFIC_SHUFFLE 0.05
+#   query.py list [mesh_8x8]
+# Only the standard library is imported (no NumPy/pandas), so a query starts
+# and answers in a few tens of milliseconds.  Rows come from the compiled CSV
+# written by extract_results.py (--csv, default results/all_results.csv)
+# and are averaged over seeds per injection rate; --iteration picks the
+# iteration (default: current).  Like the plots and the results cube, only
+# full-length runs of the base configs count: screening runs
+# (multi_fidelity.py) and design-space samples are left out.  A saturation
+# query prefers the adaptive search's <topology>_saturation.csv when it
+# covers the series and otherwise brackets the knee on the extracted curve
+# with the same test as adaptive_rate.py.  --json prints the answer as JSON.
+
+CURVE_METRICS = ("Average Delay", "Throughput", "Energy Per Flit")
+DEFAULT_ITERATION = "current"
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_rows(csv_path, topology=None, routing=None, traffic=None, iteration=DEFAULT_ITERATION, design=""):
+    # Yields the full-length rows of a compiled CSV matching the filters;
+    # None matches all.  Files written before the Iteration, Fidelity or
+    # Design columns existed match any iteration and count as full-length
+    # base-config runs.
+    with open(csv_path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            if topology and row.get("Topology") != topology:
+                continue
+            if routing and row.get("Routing") != routing:
+                continue
+            if traffic and row.get("Traffic") != traffic:
+                continue
+            if iteration and row.get("Iteration", iteration) != iteration:
+                continue
+            if row.get("Fidelity", FULL_FIDELITY) != FULL_FIDELITY:
+                continue
+            if design is not None and (row.get("Design") or "") != design:
+                continue
+            yield row
+
+
+def curve(csv_path, topology, routing, traffic, iteration=DEFAULT_ITERATION, metrics=CURVE_METRICS):
+    # [(rate, {metric: seed mean, "Runs": n})] sorted by injection rate
+    samples = {}
+    for row in read_rows(csv_path, topology, routing, traffic, iteration):
+        rate = _number(row.get("Injection Rate"))
+        if rate is not None:
+            samples.setdefault(round(rate, RATE_DIGITS), []).append(row)
+    points = []
+    for rate in sorted(samples):
+        rows = samples[rate]
+        values = {"Runs": len(rows)}
+        for metric in metrics:
+            column = [v for v in (_number(r.get(metric)) for r in rows) if v is not None]
+            values[metric] = statistics.fmean(column) if column else None
+        points.append((rate, values))
+    return points
+
+
+def stored_saturation(results_dir, topology, routing, traffic):
+    # The adaptive search's summary row for this series, or None
+    path = os.path.join(results_dir, f"{topology}_saturation.csv")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["Routing"] == routing and row["Traffic"] == traffic:
+                return {
+                    **row,
+                    "Saturation Rate": _number(row["Saturation Rate"]),
+                    "Lower Bound": _number(row["Lower Bound"]),
+                    "Upper Bound": _number(row["Upper Bound"]),
+                    "Zero-Load Delay": _number(row["Zero-Load Delay"]),
+                    "Source": os.path.basename(path),
+                }
+    return None
+
+
+def estimate_saturation(points, topology, routing, traffic, delay_factor=DELAY_FACTOR, plateau=PLATEAU):
+    # Brackets the knee on an already simulated curve, as KneeSearch would
+    points = [(rate, m) for rate, m in points if m["Average Delay"] and m["Throughput"]]
+    if not points:
+        return None
+    search = KneeSearch(topology, routing, traffic, low=points[0][0], high=points[-1][0],
+                        tol=0.0, delay_factor=delay_factor, plateau=plateau)
+    for rate, metrics in points:
+        search.record(rate, metrics)
+    search.next_rates()
+    if search.status == "searching":
+        search.status = "bracketed"
+    return search.summary()
+
+
+def saturation(topology, routing, traffic, results_dir=RESULTS_DIR, csv_path=None,
+               iteration=DEFAULT_ITERATION):
+    summary = stored_saturation(results_dir, topology, routing, traffic)
+    if summary is not None:
+        return summary
+    csv_path = csv_path or os.path.join(results_dir, "all_results.csv")
+    summary = estimate_saturation(curve(csv_path, topology, routing, traffic, iteration),
+                                  topology, routing, traffic)
+    if summary is not None:
+        summary["Source"] = os.path.basename(csv_path)
+    return summary
+
+
+def series(csv_path, topology=None, iteration=DEFAULT_ITERATION):
+    # {(topology, routing, traffic): number of rows}
+    counts = {}
+    for row in read_rows(csv_path, topology, iteration=iteration):
+        key = (row["Topology"], row["Routing"], row["Traffic"])
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def _format(value):
+    if value is None:
+        return "-"
+    return f"{value:.4g}" if isinstance(value, float) else str(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up points, curves and saturation rates.")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--csv", help="Compiled CSV (default: <results-dir>/all_results.csv)")
+    parser.add_argument("--iteration", default=DEFAULT_ITERATION,
+                        help="Iteration to read (default: %(default)s; '' for all)")
+    parser.add_argument("--json", action="store_true", help="Print the answer as JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sat = sub.add_parser("saturation", help="Saturation injection rate of a series")
+    crv = sub.add_parser("curve", help="Seed-averaged metrics at every injection rate")
+    pnt = sub.add_parser("point", help="Seed-averaged metrics at one injection rate")
+    for p in (sat, crv, pnt):
+        p.add_argument("topology")
+        p.add_argument("routing")
+        p.add_argument("traffic")
+    pnt.add_argument("rate", type=float)
+    lst = sub.add_parser("list", help="Series present in the results")
+    lst.add_argument("topology", nargs="?")
+    args = parser.parse_args(argv)
+
+    csv_path = args.csv or os.path.join(args.results_dir, "all_results.csv")
+    if args.command != "saturation" and not os.path.exists(csv_path):
+        print(f"No compiled results at {csv_path}; run extract_results.py first", file=sys.stderr)
+        return 1
+
+    if args.command == "list":
+        counts = series(csv_path, args.topology, args.iteration)
+        if args.json:
+            print(json.dumps([{"Topology": t, "Routing": r, "Traffic": tr, "Rows": n}
+                              for (t, r, tr), n in sorted(counts.items())], indent=1))
+            return 0
+        for (topology, routing, traffic), n in sorted(counts.items()):
+            print(f"{topology:<14} {routing:<16} {traffic:<22} {n:>5} rows")
+        return 0
+
+    if args.command == "saturation":
+        try:
+            summary = saturation(args.topology, args.routing, args.traffic, args.results_dir,
+                                 csv_path, args.iteration)
+        except FileNotFoundError as exc:
+            print(f"No results to estimate from: {exc.filename}", file=sys.stderr)
+            return 1
+        if summary is None:
+            print(f"No results for {args.topology} {args.routing} {args.traffic}", file=sys.stderr)
+            return 1
+        if args.json:
+            print(json.dumps(summary, indent=1))
+        else:
+            print(f"{args.topology} {args.routing} {args.traffic}: saturation ~ "
+                  f"{_format(summary['Saturation Rate'])} [{_format(summary['Lower Bound'])}, "
+                  f"{_format(summary['Upper Bound'])}] ({summary['Status']}, from {summary['Source']})")
+        return 0
+
+    points = curve(csv_path, args.topology, args.routing, args.traffic, args.iteration)
+    if args.command == "point":
+        points = [(rate, m) for rate, m in points if rate == round(args.rate, RATE_DIGITS)]
+    if not points:
+        print(f"No results for {args.topology} {args.routing} {args.traffic}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps([{"Injection Rate": rate, **m} for rate, m in points], indent=1))
+        return 0
+    print(f"{'Rate':>8} " + " ".join(f"{m:>16}" for m in CURVE_METRICS) + f" {'Runs':>5}")
+    for rate, m in points:
+        print(f"{rate:>8g} " + " ".join(f"{_format(m[c]):>16}" for c in CURVE_METRICS) + f" {m['Runs']:>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
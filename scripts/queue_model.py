@@ -0,0 +1,534 @@
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from paths import CONFIG_DIR, RESULTS_DIR
+
+# Analytical pre-screen: channel load plus a queueing model.
+#
+# For a config (topology, mesh_dim_x/y or n_delta_tiles, routing, traffic,
+# packet sizes, buffer_depth) the traffic matrix of the pattern is routed
+# over the network with NumPy to get the load of every channel per unit of
+# injected flits.  From that:
+#   hops          mean channels per packet (total load / injected load)
+#   max load      load of the bottleneck channel
+#   zero load     hops + packet length + offset                 [cycles]
+#   saturation    efficiency * link capacity / (max load * packet length)
+#                                                     [packets/cycle/node]
+#   delay(rate)   zero load + queue * M/D/1 wait at the bottleneck,
+#                 size * rho / (2 * (1 - rho)), rho = rate / saturation
+# Adaptive routings (ODD_EVEN, DYAD, and WEST_FIRST for flows that do not go
+# west) are modelled as an even split between the XY and YX paths; delta
+# networks use destination-tag routing through log2(n) stages.  The link
+# capacity is credit limited when buffer_depth is shorter than the credit
+# round trip.
+#
+# efficiency (per traffic pattern where data exists), offset and queue are
+# fitted per topology family against the compiled CSVs ("calibrate"), which
+# also prints the model's error against simulation: in sample, and held out
+# with every (topology, routing, traffic) series predicted by a calibration
+# fitted without it.  queue is only fitted when a family has at least
+# MIN_QUEUE_POINTS unsaturated points and the fit is not negative; otherwise
+# (the delta networks in the current results, which saturate after their
+# lowest rate) it stays at the plain M/D/1 value QUEUE_PRIOR, only offset is
+# fitted and "queue_fitted" is false in the calibration.  Delays below
+# saturation are then a textbook estimate, not a fitted one.  calibrate
+# stores each family's held-out delay error as "delay_error".  sweep.py
+# --prescreen uses prescreen() to skip points deep in saturation, and
+# points that are trivially linear only in families whose delay_error is
+# within MAX_DELAY_ERROR; elsewhere the delay model is not trusted and only
+# the saturation estimate is used.
+
+CALIBRATION_FILE = os.path.join(RESULTS_DIR, "queue_model.json")
+
+DELTA_TOPOLOGIES = ("BUTTERFLY", "BASELINE", "OMEGA")
+ADAPTIVE_SPLIT = {"XY": 0.0, "WEST_FIRST": 0.5, "ODD_EVEN": 0.5, "DYAD": 0.5}
+CREDIT_ROUND_TRIP = 2
+SATURATION_DELAY = 3.0
+SATURATION_ACCEPTED = 0.9
+# Unsaturated points a family needs before its queue coefficient is fitted,
+# and the coefficient used until then
+MIN_QUEUE_POINTS = 5
+QUEUE_PRIOR = 1.0
+
+# Points with rho below LINEAR_BELOW or above SATURATED_ABOVE are skipped by
+# the pre-screen
+LINEAR_BELOW = 0.05
+SATURATED_ABOVE = 2.0
+# Held-out relative delay error above which the pre-screen trusts only the
+# saturation estimate and keeps the points it would call linear.  A family
+# needs MIN_QUEUE_POINTS held-out delay points for its error to count.
+MAX_DELAY_ERROR = 0.25
+
+# Fitted on results/*_compiled_results.csv (python scripts/queue_model.py calibrate)
+DEFAULT_CALIBRATION = {
+    "mesh": {
+        "efficiency": 0.6022, "offset": 0.0, "queue": 0.234, "queue_fitted": True, "delay_error": 0.489,
+        "traffic": {"TRAFFIC_RANDOM": 0.2525, "TRAFFIC_SHUFFLE": 0.6022, "TRAFFIC_TRANSPOSE1": 0.8164},
+    },
+    "delta": {
+        "efficiency": 0.1945, "offset": 0.567, "queue": 1.0, "queue_fitted": False, "delay_error": None,
+        "traffic": {"TRAFFIC_BIT_REVERSAL": 0.125, "TRAFFIC_RANDOM": 0.2639},
+    },
+}
+
+
+def family(topology):
+    return "delta" if str(topology).upper() in DELTA_TOPOLOGIES else "mesh"
+
+
+def network(config):
+    # (family, topology, nodes, (dim_x, dim_y) or None)
+    topology = str(config.get("topology", "MESH")).upper()
+    if family(topology) == "delta":
+        nodes = int(config["n_delta_tiles"])
+        if nodes & (nodes - 1):
+            raise ValueError(f"n_delta_tiles must be a power of two, got {nodes}")
+        return "delta", topology, nodes, None
+    dim_x, dim_y = int(config["mesh_dim_x"]), int(config["mesh_dim_y"])
+    return "mesh", topology, dim_x * dim_y, (dim_x, dim_y)
+
+
+def destinations(traffic, nodes, dims):
+    # Destination of every source for the permutation patterns
+    ids = np.arange(nodes)
+    nbits = max(1, math.ceil(math.log2(nodes)))
+    mask = (1 << nbits) - 1
+    if traffic == "TRAFFIC_BIT_REVERSAL":
+        dst = np.zeros(nodes, dtype=np.int64)
+        for bit in range(nbits):
+            dst |= ((ids >> bit) & 1) << (nbits - 1 - bit)
+    elif traffic == "TRAFFIC_SHUFFLE":
+        dst = ((ids << 1) | (ids >> (nbits - 1))) & mask
+    elif traffic == "TRAFFIC_BUTTERFLY":
+        msb, lsb = (ids >> (nbits - 1)) & 1, ids & 1
+        dst = (ids & ~((1 << (nbits - 1)) | 1)) | (lsb << (nbits - 1)) | msb
+    elif traffic in ("TRAFFIC_TRANSPOSE1", "TRAFFIC_TRANSPOSE2"):
+        if dims is None:
+            raise ValueError(f"{traffic} needs a mesh")
+        dim_x, dim_y = dims
+        x, y = ids % dim_x, ids // dim_x
+        if traffic == "TRAFFIC_TRANSPOSE1":
+            tx, ty = dim_x - 1 - y, dim_y - 1 - x
+        else:
+            tx, ty = y, x
+        dst = np.clip(ty, 0, dim_y - 1) * dim_x + np.clip(tx, 0, dim_x - 1)
+    else:
+        raise ValueError(f"Traffic pattern {traffic} is not modelled")
+    return dst % nodes
+
+
+def traffic_matrix(traffic, nodes, dims):
+    # Flits/cycle from each source to each destination per flit/cycle injected
+    if traffic == "TRAFFIC_RANDOM":
+        matrix = np.full((nodes, nodes), 1.0 / (nodes - 1))
+        np.fill_diagonal(matrix, 0.0)
+        return matrix
+    # Sources that map onto themselves still inject: a mesh router delivers
+    # locally, a delta network carries them through every stage
+    matrix = np.zeros((nodes, nodes))
+    matrix[np.arange(nodes), destinations(traffic, nodes, dims)] = 1.0
+    return matrix
+
+
+def _add_runs(diff, line, start, stop, weight):
+    # Adds `weight` to the channels between start and stop along each line.
+    # Channel i of a positive run is i -> i+1, of a negative run i -> i-1.
+    pos = stop > start
+    np.add.at(diff[0], (line[pos], start[pos]), weight[pos])
+    np.add.at(diff[0], (line[pos], stop[pos]), -weight[pos])
+    neg = stop < start
+    np.add.at(diff[1], (line[neg], stop[neg] + 1), weight[neg])
+    np.add.at(diff[1], (line[neg], start[neg] + 1), -weight[neg])
+
+
+def mesh_channel_loads(matrix, dims, routing):
+    dim_x, dim_y = dims
+    src, dst = np.nonzero(matrix)
+    weight = matrix[src, dst]
+    sx, sy, tx, ty = src % dim_x, src // dim_x, dst % dim_x, dst // dim_x
+
+    split = np.full(len(src), ADAPTIVE_SPLIT.get(routing, 0.5))
+    if routing == "WEST_FIRST":
+        split[tx < sx] = 0.0
+    horizontal = np.zeros((2, dim_y, dim_x + 1))
+    vertical = np.zeros((2, dim_x, dim_y + 1))
+    for share, yx in ((1 - split, False), (split, True)):
+        w = weight * share
+        if yx:
+            _add_runs(vertical, sx, sy, ty, w)
+            _add_runs(horizontal, ty, sx, tx, w)
+        else:
+            _add_runs(horizontal, sy, sx, tx, w)
+            _add_runs(vertical, tx, sy, ty, w)
+    return np.concatenate([
+        np.cumsum(horizontal, axis=2).ravel(),
+        np.cumsum(vertical, axis=2).ravel(),
+        matrix.sum(axis=1),  # injection channels
+        matrix.sum(axis=0),  # ejection channels
+    ])
+
+
+def delta_positions(topology, src, dst, stage, nbits):
+    # Output line of a packet after `stage` with destination-tag routing
+    fixed = stage + 1
+    mask = (1 << nbits) - 1
+    if topology == "OMEGA":
+        # Perfect shuffle before every stage, the switch sets the low bit
+        return ((src << fixed) | (dst >> (nbits - fixed))) & mask
+    if topology == "BUTTERFLY":
+        high = (1 << nbits) - (1 << (nbits - fixed))
+        return (dst & high) | (src & ~high & mask)
+    # BASELINE: the destination prefix selects the sub-network, the source
+    # bits the line within it
+    low = nbits - fixed
+    return ((dst >> low) << low) | ((src >> fixed) & ((1 << low) - 1))
+
+
+def delta_channel_loads(matrix, topology):
+    nodes = matrix.shape[0]
+    nbits = int(math.log2(nodes))
+    src, dst = np.nonzero(matrix)
+    weight = matrix[src, dst]
+    loads = [matrix.sum(axis=1)]
+    for stage in range(nbits):
+        lines = delta_positions(topology, src, dst, stage, nbits)
+        loads.append(np.bincount(lines, weights=weight, minlength=nodes))
+    return np.concatenate(loads)
+
+
+@lru_cache(maxsize=4096)
+def channel_profile(topology, nodes, dims, routing, traffic):
+    # (mean hops, bottleneck load, active sources) per flit/cycle injected
+    matrix = traffic_matrix(traffic, nodes, dims)
+    if family(topology) == "delta":
+        loads = delta_channel_loads(matrix, topology)
+    else:
+        loads = mesh_channel_loads(matrix, dims, routing)
+    injected = matrix.sum()
+    active = int((matrix.sum(axis=1) > 0).sum())
+    return float(loads.sum() / injected) if injected else 0.0, float(loads.max()), active
+
+
+def packet_size(config):
+    return (float(config.get("min_packet_size", 8)) + float(config.get("max_packet_size", 8))) / 2
+
+
+def link_capacity(config):
+    return min(1.0, float(config.get("buffer_depth", 4)) / CREDIT_ROUND_TRIP)
+
+
+def load_calibration(path=CALIBRATION_FILE):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return DEFAULT_CALIBRATION
+
+
+def analyse(config, calibration=None):
+    # Rate independent part of the prediction for one config
+    calibration = calibration or load_calibration()
+    fam, topology, nodes, dims = network(config)
+    routing = str(config.get("routing_algorithm", "XY"))
+    traffic = str(config.get("traffic_distribution", "TRAFFIC_RANDOM"))
+    hops, max_load, active = channel_profile(topology, nodes, dims, routing, traffic)
+    params = calibration[fam]
+    efficiency = params.get("traffic", {}).get(traffic, params["efficiency"])
+    size = packet_size(config)
+    saturation = efficiency * link_capacity(config) / (max_load * size) if max_load else math.inf
+    return {
+        "family": fam,
+        "hops": hops,
+        "max_load": max_load,
+        "active": active,
+        "packet_size": size,
+        "zero_load": hops + size + params["offset"],
+        "saturation_rate": saturation,
+        "queue": params["queue"],
+    }
+
+
+def md1_wait(rho, service):
+    # Mean M/D/1 waiting time at the bottleneck, service = packet length
+    rho = np.asarray(rho, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(rho < 1, service * rho / (2 * (1 - rho)), np.inf)
+
+
+def predict(config, rates=None, calibration=None):
+    # Vectorized over `rates` (packets/cycle/node, default the config's
+    # packet_injection_rate): load rho, delay (inf when saturated) and
+    # network throughput in flits/cycle
+    a = analyse(config, calibration)
+    rates = np.atleast_1d(np.asarray(
+        config.get("packet_injection_rate", 0.01) if rates is None else rates, dtype=np.float64))
+    rho = rates / a["saturation_rate"]
+    with np.errstate(invalid="ignore"):
+        delay = np.where(rho < 1, a["zero_load"] + a["queue"] * md1_wait(rho, a["packet_size"]), np.inf)
+    throughput = a["active"] * a["packet_size"] * np.minimum(rates, a["saturation_rate"])
+    return dict(a, rate=rates, rho=rho, delay=delay, throughput=throughput)
+
+
+def coerce(value):
+    import yaml
+
+    return yaml.safe_load(value) if isinstance(value, str) else value
+
+
+def base_config(path):
+    import yaml
+
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def point_config(base, point):
+    config = dict(base)
+    config.update((key, coerce(value)) for key, value in point.config_overrides().items())
+    return config
+
+
+def predict_points(base_path, points, calibration=None):
+    # {SweepPoint: prediction} for a sweep over one base config
+    base = base_config(base_path)
+    calibration = calibration or load_calibration()
+    return {point: predict(point_config(base, point), calibration=calibration) for point in points}
+
+
+def delay_trusted(params):
+    # Whether a family's held-out delay error allows skipping linear points
+    error = params.get("delay_error")
+    return error is not None and error <= MAX_DELAY_ERROR
+
+
+def prescreen(base_path, points, low=LINEAR_BELOW, high=SATURATED_ABOVE, calibration=None):
+    # Splits points into (kept, skipped) by predicted load.  Points below
+    # `low` are only skipped where the delay model is trusted; points the
+    # model cannot evaluate (e.g. unmodelled traffic patterns) are kept.
+    base = base_config(base_path)
+    calibration = calibration or load_calibration()
+    kept, skipped = [], []
+    for point in points:
+        try:
+            p = predict(point_config(base, point), calibration=calibration)
+        except (KeyError, ValueError):
+            kept.append(point)
+            continue
+        rho = float(p["rho"][0])
+        floor = low if delay_trusted(calibration[p["family"]]) else 0.0
+        (kept if floor <= rho <= high else skipped).append(point)
+    return kept, skipped
+
+
+def topology_config(topology, config_dir=CONFIG_DIR):
+    return base_config(os.path.join(config_dir, f"{topology}.yaml"))
+
+
+def simulated_series(df, config_dir=CONFIG_DIR):
+    # Yields (config, profile, frame sorted by rate) per simulated series.
+    # A point counts as saturated in simulation when its delay is above
+    # SATURATION_DELAY x the series minimum or it accepts less than
+    # SATURATION_ACCEPTED of the offered load.
+    for (topology, routing, traffic), part in df.groupby(["Topology", "Routing", "Traffic"], sort=True):
+        config = dict(topology_config(topology, config_dir), routing_algorithm=routing,
+                      traffic_distribution=traffic)
+        fam, topo, nodes, dims = network(config)
+        hops, max_load, active = channel_profile(topo, nodes, dims, routing, traffic)
+        part = part.groupby("Injection Rate", as_index=False)[["Average Delay", "Throughput"]].mean()
+        offered = part["Injection Rate"] * active * packet_size(config)
+        part["Saturated"] = ((part["Average Delay"] > SATURATION_DELAY * part["Average Delay"].min())
+                             | (part["Throughput"] < SATURATION_ACCEPTED * offered))
+        yield config, (hops, max_load, active), part
+
+
+def calibrate(df, config_dir=CONFIG_DIR):
+    # Fits efficiency (per family and per traffic pattern), then offset >= 0
+    # and queue by least squares on the points that are unsaturated in
+    # simulation
+    series = list(simulated_series(df, config_dir))
+    calibration = {}
+    for config, (hops, max_load, active), part in series:
+        fam = network(config)[0]
+        fit = calibration.setdefault(fam, {"traffic": {}})
+        # Best accepted throughput per source against the ideal capacity
+        capacity = part["Throughput"].max() / active
+        efficiency = capacity * max_load / link_capacity(config)
+        fit["traffic"].setdefault(config["traffic_distribution"], []).append(efficiency)
+    for fit in calibration.values():
+        fit["traffic"] = {t: round(float(np.median(v)), 4) for t, v in sorted(fit["traffic"].items())}
+        fit["efficiency"] = round(float(np.median(list(fit["traffic"].values()))), 4)
+        fit["offset"], fit["queue"] = 0.0, 0.0
+
+    for fam, fit in calibration.items():
+        # delay - hops - size = offset + queue * md1(rho), fitted on relative
+        # errors so the few slow points do not dominate
+        rows, targets, delays = [], [], []
+        for config, _, part in series:
+            if network(config)[0] != fam:
+                continue
+            p = predict(config, part["Injection Rate"].to_numpy(), calibration)
+            calm = ~part["Saturated"].to_numpy() & (p["rho"] < 1)
+            rows.extend(md1_wait(p["rho"][calm], p["packet_size"]))
+            delays.extend(part["Average Delay"].to_numpy()[calm])
+            targets.extend(part["Average Delay"].to_numpy()[calm] - p["hops"] - p["packet_size"])
+        if not targets:
+            fit.update((k, DEFAULT_CALIBRATION[fam][k]) for k in ("offset", "queue", "queue_fitted"))
+            continue
+        rows, targets, weights = np.asarray(rows), np.asarray(targets), 1.0 / np.asarray(delays)
+        queue = -1.0
+        if len(targets) >= MIN_QUEUE_POINTS:
+            design = np.column_stack([np.ones(len(rows)), rows]) * weights[:, None]
+            offset, queue = np.linalg.lstsq(design, targets * weights, rcond=None)[0]
+            if offset < 0:
+                # No packet is faster than its hops plus its length: pin the
+                # offset at 0 and fit queue alone
+                offset = 0.0
+                queue = np.sum(rows * targets * weights ** 2) / np.sum((rows * weights) ** 2)
+        fit["queue_fitted"] = bool(queue >= 0)
+        if not fit["queue_fitted"]:
+            # Too few points, or queueing the data cannot explain: keep the
+            # prior and fit the offset alone
+            queue = QUEUE_PRIOR
+            offset = max(0.0, np.average(targets - queue * rows, weights=weights ** 2))
+        fit["offset"], fit["queue"] = round(float(offset), 3), round(float(queue), 3)
+    return calibration
+
+
+def error_stats(df, calibration, config_dir=CONFIG_DIR, rows=None):
+    # Per family, the errors of every point of df; families the calibration
+    # does not cover are skipped
+    rows = {} if rows is None else rows
+    for config, _, part in simulated_series(df, config_dir):
+        if network(config)[0] not in calibration:
+            continue
+        p = predict(config, part["Injection Rate"].to_numpy(), calibration)
+        stats = rows.setdefault(p["family"], {"throughput": [], "agree": [], "delay": []})
+        sim_tp = part["Throughput"].to_numpy()
+        stats["throughput"].extend(np.abs(p["throughput"] - sim_tp) / sim_tp)
+        model_sat = p["rho"] >= 1
+        sim_sat = part["Saturated"].to_numpy()
+        stats["agree"].extend(model_sat == sim_sat)
+        both = ~model_sat & ~sim_sat
+        sim_delay = part["Average Delay"].to_numpy()
+        stats["delay"].extend(np.abs(p["delay"][both] - sim_delay[both]) / sim_delay[both])
+    return rows
+
+
+def summarize(rows):
+    # Per family: throughput MAPE, saturation agreement and delay MAPE on the
+    # points both the model and the simulation call unsaturated
+    report = {}
+    for fam, stats in rows.items():
+        report[fam] = {
+            "points": len(stats["agree"]),
+            "throughput_mape": float(np.mean(stats["throughput"])),
+            "saturation_agreement": float(np.mean(stats["agree"])),
+            "delay_mape": float(np.mean(stats["delay"])) if stats["delay"] else None,
+            "delay_points": len(stats["delay"]),
+        }
+    return report
+
+
+def error_report(df, calibration, config_dir=CONFIG_DIR):
+    # In-sample error of a calibration fitted on df
+    return summarize(error_stats(df, calibration, config_dir))
+
+
+def holdout_report(df, config_dir=CONFIG_DIR):
+    # Held-out error: every (topology, routing, traffic) series is predicted
+    # by a calibration fitted on the other series only.  A family with a
+    # single series has nothing to be fitted on and is left out.
+    rows = {}
+    for _, index in df.groupby(["Topology", "Routing", "Traffic"], sort=True).groups.items():
+        calibration = calibrate(df.drop(index), config_dir)
+        error_stats(df.loc[index], calibration, config_dir, rows)
+    return summarize(rows)
+
+
+def record_delay_error(calibration, holdout):
+    # Stores the held-out delay error of every family in its calibration,
+    # None where too few held-out points were unsaturated to measure it
+    for fam, fit in calibration.items():
+        r = holdout.get(fam)
+        enough = r is not None and r["delay_mape"] is not None and r["delay_points"] >= MIN_QUEUE_POINTS
+        fit["delay_error"] = round(r["delay_mape"], 3) if enough else None
+    return calibration
+
+
+def compiled_csvs(results_dir=RESULTS_DIR):
+    return sorted(glob.glob(os.path.join(results_dir, "*_compiled_results.csv")))
+
+
+def read_compiled(paths):
+    import pandas as pd
+
+    frames = [pd.read_csv(path) for path in paths]
+    columns = ["Topology", "Routing", "Traffic", "Injection Rate", "Average Delay", "Throughput"]
+    return pd.concat([f[columns] for f in frames if set(columns) <= set(f.columns)], ignore_index=True)
+
+
+def print_report(report, label):
+    for fam, r in sorted(report.items()):
+        delay = "n/a" if r["delay_mape"] is None else f"{r['delay_mape']:.1%} over {r['delay_points']} points"
+        print(f"{fam} ({label}): {r['points']} points, throughput error {r['throughput_mape']:.1%}, "
+              f"saturation agreement {r['saturation_agreement']:.1%}, delay error {delay}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analytical latency/saturation model for Noxim configs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    cal = sub.add_parser("calibrate", help="Fit the model to compiled CSVs and report its error")
+    cal.add_argument("--csv", nargs="+", help="Compiled CSVs (default: results/*_compiled_results.csv)")
+    cal.add_argument("--config-dir", default=CONFIG_DIR)
+    cal.add_argument("--output", default=CALIBRATION_FILE)
+
+    pred = sub.add_parser("predict", help="Predict the latency curve of a config")
+    pred.add_argument("config")
+    pred.add_argument("--routing")
+    pred.add_argument("--traffic")
+    pred.add_argument("--rates", nargs="+", type=float, default=[0.005, 0.01, 0.02, 0.05, 0.1, 0.2])
+    pred.add_argument("--calibration", default=CALIBRATION_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        df = read_compiled(args.csv or compiled_csvs())
+        calibration = calibrate(df, args.config_dir)
+        holdout = holdout_report(df, args.config_dir)
+        record_delay_error(calibration, holdout)
+        with open(args.output, "w") as f:
+            json.dump(calibration, f, indent=1, sort_keys=True)
+        print(json.dumps(calibration, sort_keys=True))
+        print_report(error_report(df, calibration, args.config_dir), "in sample")
+        print_report(holdout, "held out")
+        for fam, fit in sorted(calibration.items()):
+            if not fit["queue_fitted"]:
+                print(f"{fam}: too few unsaturated points to fit queue, kept at {fit['queue']}")
+            if not delay_trusted(fit):
+                error = "unmeasured" if fit["delay_error"] is None else f"{fit['delay_error']:.1%}"
+                print(f"{fam}: held-out delay error {error} (bound {MAX_DELAY_ERROR:.0%}), "
+                      "the pre-screen only skips saturated points")
+        return 0
+
+    config = base_config(args.config)
+    if args.routing:
+        config["routing_algorithm"] = args.routing
+    if args.traffic:
+        config["traffic_distribution"] = args.traffic
+    p = predict(config, args.rates, load_calibration(args.calibration))
+    print(f"hops {p['hops']:.2f}, bottleneck load {p['max_load']:.3f}, zero-load latency "
+          f"{p['zero_load']:.1f} cycles, saturation ~{p['saturation_rate']:.4f} packets/cycle/node")
+    for rate, rho, delay, throughput in zip(p["rate"], p["rho"], p["delay"], p["throughput"]):
+        print(f"  rate {rate:<8g} rho {rho:6.2f}  delay {delay:10.1f}  throughput {throughput:8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
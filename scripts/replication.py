@@ -0,0 +1,235 @@
+import argparse
+import csv
+import math
+import os
+import statistics
+import sys
+import time
+
+# Seed replication with confidence intervals.
+#
+# Each (topology, routing, traffic, rate) point is run with independent
+# seeds.  After every round the running mean and the 95% confidence interval
+# half-width of Average Delay and Throughput are computed; a point stops
+# receiving replicas once both half-widths are below --rel-ci of their mean.
+# Noisy points ask for as many extra seeds as the 1/sqrt(n) shrinkage of the
+# interval suggests (capped per round), so compute goes to the points near
+# saturation rather than being spread evenly.
+#
+# annotate_replicas() adds the same statistics to extracted records, which is
+# how the CIs end up in the compiled CSV, the results store and the plots.
+# Extraction imports this module, so sweep.py (and NumPy with it) is only
+# imported by the functions that run simulations.
+
+MIN_REPLICAS = 3
+MAX_REPLICAS = 20
+REL_CI = 0.05
+MAX_PER_ROUND = 4
+FIRST_SEED = 1
+
+CI_METRICS = {"Average Delay": "Delay CI", "Throughput": "Throughput CI"}
+
+# Two-sided 95% Student t quantiles for 1..30 degrees of freedom
+T_975 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+FIELDNAMES = [
+    "Topology", "Routing", "Traffic", "Injection Rate", "Replicas",
+    "Average Delay", "Delay CI", "Throughput", "Throughput CI", "Converged",
+]
+
+
+def t_critical(dof):
+    if dof < 1:
+        return math.inf
+    return T_975[dof - 1] if dof <= len(T_975) else 1.96
+
+
+def mean_ci(values):
+    # (mean, 95% CI half-width); the half-width is NaN for a single sample
+    n = len(values)
+    mean = statistics.fmean(values)
+    if n < 2:
+        return mean, math.nan
+    return mean, t_critical(n - 1) * statistics.stdev(values) / math.sqrt(n)
+
+
+def replica_key(record):
+    return (
+        record.get("Iteration"), record["Topology"], record["Routing"], record["Traffic"],
+        record["Injection Rate"], record.get("Simulation Time"), record.get("Design"),
+    )
+
+
+def annotate_replicas(records):
+    # Adds "Replicas", "Delay CI" and "Throughput CI" to every record.  The
+    # replicas of a point are its distinct seeds: the runs of one seed (the
+    # "Run" blocks of a log) are averaged into one sample first, they are not
+    # independent.  Records are modified in place and returned.
+    groups = {}
+    for record in records:
+        seeds = groups.setdefault(replica_key(record), {})
+        seeds.setdefault(record.get("Seed"), []).append(record)
+    for seeds in groups.values():
+        stats = {"Replicas": len(seeds)}
+        for metric, column in CI_METRICS.items():
+            samples = []
+            for runs in seeds.values():
+                values = [r[metric] for r in runs if r.get(metric) is not None]
+                if values:
+                    samples.append(statistics.fmean(values))
+            ci = mean_ci(samples)[1] if samples else math.nan
+            stats[column] = None if math.isnan(ci) else round(ci, 6)
+        for runs in seeds.values():
+            for record in runs:
+                record.update(stats)
+    return records
+
+
+class ReplicaSet:
+    # The replicas of one point and the decision whether it needs more
+
+    def __init__(self, point, min_replicas=MIN_REPLICAS, max_replicas=MAX_REPLICAS,
+                 rel_ci=REL_CI, max_per_round=MAX_PER_ROUND):
+        self.point = point
+        self.min_replicas = min_replicas
+        self.max_replicas = max_replicas
+        self.rel_ci = rel_ci
+        self.max_per_round = max_per_round
+        self.samples = {}
+        self.failed = set()
+
+    def issued(self):
+        return len(self.samples) + len(self.failed)
+
+    def relative_widths(self):
+        widths = []
+        for metric in CI_METRICS:
+            mean, half = mean_ci([m[metric] for m in self.samples.values()])
+            widths.append(half / abs(mean) if mean else (0.0 if half == 0 else math.inf))
+        return widths
+
+    def converged(self):
+        if len(self.samples) < max(2, self.min_replicas):
+            return False
+        return max(self.relative_widths()) <= self.rel_ci
+
+    def wanted(self):
+        # Number of new seeds to launch this round
+        n = len(self.samples)
+        budget = self.max_replicas - self.issued()
+        if budget <= 0 or self.converged():
+            return 0
+        if n < self.min_replicas:
+            return min(self.min_replicas - n, budget)
+        worst = max(self.relative_widths())
+        if math.isnan(worst) or math.isinf(worst):
+            return min(1, budget)
+        # Half-width shrinks as 1/sqrt(n)
+        needed = math.ceil(n * (worst / self.rel_ci) ** 2) - n
+        return max(1, min(needed, self.max_per_round, budget))
+
+    def summary(self):
+        row = {
+            "Topology": self.point.topology,
+            "Routing": self.point.routing,
+            "Traffic": self.point.traffic,
+            "Injection Rate": self.point.rate,
+            "Replicas": len(self.samples),
+            "Converged": self.converged(),
+        }
+        for metric, column in CI_METRICS.items():
+            values = [m[metric] for m in self.samples.values()]
+            mean, half = mean_ci(values) if values else (math.nan, math.nan)
+            row[metric] = round(mean, 6)
+            row[column] = None if math.isnan(half) else round(half, 6)
+        return row
+
+
+def run_replications(base_config, replica_sets, options, first_seed=FIRST_SEED, progress=print):
+    from sweep import SweepPoint, run_sweep
+
+    next_seed = {id(rs): first_seed for rs in replica_sets}
+    round_no = 0
+    while True:
+        batch = {}
+        for rs in replica_sets:
+            for _ in range(rs.wanted()):
+                seed = next_seed[id(rs)]
+                next_seed[id(rs)] += 1
+                p = rs.point
+                batch[SweepPoint(p.topology, p.routing, p.traffic, p.rate, seed, p.overrides, p.sim_time)] = rs
+        if not batch:
+            return replica_sets
+        round_no += 1
+        if progress:
+            open_sets = sum(1 for rs in replica_sets if not rs.converged())
+            progress(f"Round {round_no}: {len(batch)} replicas for {open_sets} unconverged points")
+        for outcome in run_sweep(base_config, list(batch), options, progress=None):
+            point = outcome["point"]
+            rs = batch[point]
+            if outcome.get("metrics") is None:
+                rs.failed.add(point.seed)
+            else:
+                rs.samples[point.seed] = outcome["metrics"]
+
+
+def main(argv=None):
+    from sweep import (
+        INJECTION_RATES,
+        add_run_arguments,
+        default_axes,
+        expand_points,
+        options_from_args,
+        overrides_from_args,
+        resolve_base,
+        topology_name,
+    )
+
+    parser = argparse.ArgumentParser(description="Replicate points over seeds until their CIs converge.")
+    parser.add_argument("base", help="Base config, e.g. configs/mesh_8x8.yaml")
+    parser.add_argument("--routing", nargs="+", help="routing_algorithm values")
+    parser.add_argument("--traffic", nargs="+", help="traffic_distribution values")
+    parser.add_argument("--rates", nargs="+", type=float, default=INJECTION_RATES)
+    parser.add_argument("--min-replicas", type=int, default=MIN_REPLICAS)
+    parser.add_argument("--max-replicas", type=int, default=MAX_REPLICAS)
+    parser.add_argument("--rel-ci", type=float, default=REL_CI,
+                        help="Stop once the 95%% CI half-width is below this fraction of the mean")
+    parser.add_argument("--max-per-round", type=int, default=MAX_PER_ROUND)
+    parser.add_argument("--first-seed", type=int, default=FIRST_SEED)
+    parser.add_argument("--output", help="Summary CSV (default: <results-dir>/<topology>_replication.csv)")
+    add_run_arguments(parser)
+    args = parser.parse_args(argv)
+
+    base = resolve_base(args.base)
+    topology = topology_name(base)
+    with open(base, "r") as f:
+        routings, traffics = default_axes(f.read())
+    points = expand_points(topology, args.routing or routings, args.traffic or traffics,
+                           args.rates, overrides=overrides_from_args(args))
+    replica_sets = [
+        ReplicaSet(p, args.min_replicas, args.max_replicas, args.rel_ci, args.max_per_round)
+        for p in points
+    ]
+
+    start = time.monotonic()
+    run_replications(base, replica_sets, options_from_args(args), args.first_seed)
+
+    output_csv = args.output or os.path.join(args.results_dir, f"{topology}_replication.csv")
+    with open(output_csv, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rs.summary() for rs in replica_sets)
+
+    total = sum(len(rs.samples) for rs in replica_sets)
+    converged = sum(1 for rs in replica_sets if rs.converged())
+    print(f"{total} replicas, {converged}/{len(replica_sets)} points converged "
+          f"in {time.monotonic() - start:.1f}s, summary in {output_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
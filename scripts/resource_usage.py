@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Resource accounting for simulator runs.
+#
+# run_measured() runs one command and collects its rusage with os.wait4, so
+# concurrent runs from the sweep's thread pool do not see each other's
+# numbers.  For every completed run, sweep.run_config writes the result next
+# to the log as <name>.usage.json:
+#   wall_time, user_cpu, sys_cpu   seconds
+#   peak_rss_kb                    peak resident set size of the simulator, in
+#                                  kB on every platform (macOS reports bytes)
+#   exit_status, cycles, cycles_per_second, simulator (binary fingerprint)
+#   features                       config parameters for cost_model.py
+# The extractor merges these into the records as the USAGE_COLUMNS below, so
+# they end up in the compiled CSV and the results store.  "report" shows
+# where the compute goes, by topology, routing, injection rate or simulator
+# binary (a drop in cycles/s between binaries is a performance regression).
+
+USAGE_SUFFIX = ".usage.json"
+
+# Sidecar key -> record column
+USAGE_COLUMNS = {
+    "wall_time": "Wall Time",
+    "user_cpu": "User CPU",
+    "sys_cpu": "System CPU",
+    "peak_rss_kb": "Peak RSS",
+    "exit_status": "Exit Status",
+    "cycles_per_second": "Cycles Per Second",
+    "simulator": "Simulator",
+}
+
+REPORT_GROUPS = ["Topology", "Routing", "Injection Rate"]
+# How often a run with a `cancel` event checks it
+CANCEL_POLL = 1.0
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+RSS_DIVISOR = 1024 if sys.platform == "darwin" else 1
+# os.waitid is missing on macOS before Python 3.13; the child is then polled
+# with a non-blocking wait4, backing off up to REAP_POLL seconds
+HAVE_WAITID = hasattr(os, "waitid")
+REAP_POLL = 0.05
+
+
+def run_measured(cmd, stdout, timeout=None, cancel=None):
+    # Runs cmd with stdout redirected to the open file `stdout`.  Returns
+    # (exit status, stderr bytes, usage); the exit status is None when the
+    # run timed out or was killed because the `cancel` event was set.
+    # The child is only reaped under `lock`, after waiting for it without
+    # reaping (or polling for it where there is no waitid), so the watcher
+    # can never signal a pid that was already reaped (and possibly reused).
+    with tempfile.TemporaryFile() as stderr:
+        start = time.monotonic()
+        proc = subprocess.Popen(cmd, stdout=stdout, stderr=stderr)
+        killed = threading.Event()
+        finished = threading.Event()
+        lock = threading.Lock()
+        reaped = False
+
+        def kill():
+            with lock:
+                if reaped:
+                    return
+                killed.set()
+                # Not proc.kill(): it polls, and would reap the child first
+                os.kill(proc.pid, signal.SIGKILL)
+
+        def watch():
+            # Kills the child at the timeout or soon after `cancel` is set
+            deadline = start + timeout if timeout else None
+            while True:
+                left = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if cancel is not None:
+                    left = CANCEL_POLL if left is None else min(left, CANCEL_POLL)
+                if finished.wait(left):
+                    return
+                if (cancel is not None and cancel.is_set()) or (deadline and time.monotonic() >= deadline):
+                    kill()
+                    return
+
+        watcher = threading.Thread(target=watch, daemon=True) if timeout or cancel is not None else None
+        if watcher:
+            watcher.start()
+        try:
+            if HAVE_WAITID:
+                os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+                with lock:
+                    reaped = True
+                    _, status, rusage = os.wait4(proc.pid, 0)
+            else:
+                poll = 0.001
+                while True:
+                    with lock:
+                        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+                        reaped = pid != 0
+                    if reaped:
+                        break
+                    time.sleep(poll)
+                    poll = min(2 * poll, REAP_POLL)
+        finally:
+            finished.set()
+        wall = time.monotonic() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        stderr.seek(0)
+        err = stderr.read()
+
+    usage = {
+        "wall_time": round(wall, 4),
+        "user_cpu": round(rusage.ru_utime, 4),
+        "sys_cpu": round(rusage.ru_stime, 4),
+        "peak_rss_kb": rusage.ru_maxrss // RSS_DIVISOR,
+        "exit_status": proc.returncode,
+        "host": socket.gethostname(),
+    }
+    return (None if killed.is_set() else proc.returncode), err, usage
+
+
+def usage_path(output_path):
+    return os.path.splitext(output_path)[0] + USAGE_SUFFIX
+
+
+def write_usage(output_path, usage, cycles=None, simulator=None, features=None):
+    # features: the run's cost_model.config_features, the history the cost
+    # model is fitted on
+    usage = dict(usage)
+    if cycles:
+        usage["cycles"] = cycles
+        usage["cycles_per_second"] = round(cycles / usage["wall_time"], 1) if usage["wall_time"] else None
+    if simulator:
+        usage["simulator"] = simulator[:12]
+    if features:
+        usage["features"] = features
+    path = usage_path(output_path)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    with open(tmp_path, "w") as f:
+        json.dump(usage, f, sort_keys=True)
+    os.replace(tmp_path, path)
+    return usage
+
+
+def read_usage(output_path):
+    # Record columns of the run's sidecar, {} when the run was not measured
+    try:
+        with open(usage_path(output_path), "r") as f:
+            usage = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {column: usage.get(key) for key, column in USAGE_COLUMNS.items()}
+
+
+def usage_report(df, by):
+    # Cost of the runs grouped by `by`: runs, total and mean wall time, CPU,
+    # mean simulated cycles/s and peak memory
+    measured = df[df["Wall Time"].notna()]
+    grouped = measured.groupby(by, observed=True, sort=True)
+    report = grouped.agg(
+        runs=("Wall Time", "size"),
+        wall_total_s=("Wall Time", "sum"),
+        wall_mean_s=("Wall Time", "mean"),
+        cpu_mean_s=("User CPU", "mean"),
+        cycles_per_s=("Cycles Per Second", "mean"),
+        peak_rss_mb=("Peak RSS", "max"),
+    )
+    report["peak_rss_mb"] = report["peak_rss_mb"] / 1024
+    report["share"] = report["wall_total_s"] / report["wall_total_s"].sum()
+    return report.sort_values("wall_total_s", ascending=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the compute cost of simulator runs.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--results-dir", help="Results tree to extract (default: the repo's results/)")
+    source.add_argument("--store", help="Columnar results store (results_store.py)")
+    parser.add_argument("--by", nargs="+", help=f"Group by these columns (default: each of {', '.join(REPORT_GROUPS)})")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    if args.store:
+        from results_store import load_frame
+
+        df = load_frame(args.store)
+    else:
+        from extract_results import RESULTS_DIR, extract
+
+        df = pd.DataFrame(extract(args.results_dir or RESULTS_DIR))
+    if df.empty or "Wall Time" not in df or not df["Wall Time"].notna().any():
+        print("No measured runs found.")
+        return 1
+
+    pd.set_option("display.width", 160)
+    for by in [args.by] if args.by else [[column] for column in REPORT_GROUPS]:
+        print(usage_report(df, by).round(3).to_string())
+        print()
+    measured = df["Wall Time"].notna()
+    print(f"{int(measured.sum())} measured runs, {df.loc[measured, 'Wall Time'].sum() / 3600:.2f} h of wall time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+
+from paths import CACHE_DIR
+
+# Content-addressed cache of simulation results.
+#
+# Entries are keyed by a hash of the fully resolved config (base config plus
+# overrides, parsed so that comments and formatting do not matter), the seed,
+# a fingerprint of the simulator binary, a content hash of the power model and
+# the extra simulator arguments.  A hit returns the stored metrics, the path
+# of the raw log and the run's measured resource usage (the .usage.json
+# sidecar) without running anything.  The index lives in SQLite next to
+# the raw logs; the cache is bounded in size and evicts the least recently
+# used entries first.
+
+MAX_BYTES = 2 * 1024 ** 3
+
+_fingerprints = {}
+
+
+def binary_fingerprint(path):
+    # SHA-256 of the simulator binary, memoized on (size, mtime) so a sweep
+    # does not re-hash it for every point
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _fingerprints:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _fingerprints[memo_key] = h.hexdigest()
+    return _fingerprints[memo_key]
+
+
+def canonical(value):
+    # Mapping keys are stringified so sections such as Hubs, which mix
+    # "defaults" with integer hub ids, can be serialized with sorted keys
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [canonical(v) for v in value]
+    return value
+
+
+def resolve_config(config_text):
+    import yaml
+
+    return canonical(yaml.safe_load(config_text) or {})
+
+
+def cache_key(config_text, seed, binary_fp, power_file=None, extra_args=()):
+    config = resolve_config(config_text)
+    resolved = json.dumps(config, sort_keys=True, default=str)
+    payload = {"config": resolved, "seed": seed, "binary": binary_fp,
+               "args": [str(arg) for arg in extra_args]}
+    if power_file and os.path.isfile(power_file):
+        # The energy figures come from the power model
+        payload["power"] = binary_fingerprint(power_file)
+    table = config.get("traffic_table_filename")
+    if config.get("traffic_distribution") == "TRAFFIC_TABLE_BASED" and table and os.path.isfile(table):
+        # The traffic table is as much an input of the run as the config
+        payload["traffic_table"] = binary_fingerprint(table)
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "index.db"), timeout=30, check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, binary TEXT, size INTEGER,"
+            " created REAL, last_used REAL, metrics TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used)")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(entries)")}
+        if "usage" not in columns:
+            # Caches written before usage was stored
+            self._db.execute("ALTER TABLE entries ADD COLUMN usage TEXT")
+        self._db.commit()
+
+    def _log_path(self, key):
+        return os.path.join(self.cache_dir, "objects", key[:2], key + ".log")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT metrics, usage FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if not os.path.isfile(self._log_path(key)):
+                # Index and objects got out of sync; treat as a miss
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+        return {"metrics": json.loads(row[0]), "path": self._log_path(key),
+                "usage": json.loads(row[1]) if row[1] else None}
+
+    def put(self, key, log_path, metrics, binary_fp, usage=None):
+        # Stores a copy of the log at `log_path`, never reading it into memory
+        path = self._log_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(log_path, tmp_path)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, binary, size, created, last_used, metrics, usage)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, binary_fp, os.path.getsize(path), now, now, json.dumps(metrics),
+                 json.dumps(usage) if usage else None),
+            )
+            self._db.commit()
+        self.evict()
+
+    def _delete(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._log_path(key))
+            except FileNotFoundError:
+                pass
+        self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in keys])
+        self._db.commit()
+
+    def evict(self, max_bytes=None):
+        # Drop least recently used entries until the cache fits in max_bytes
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= max_bytes:
+                return []
+            victims = []
+            for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                if total <= max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+            self._delete(victims)
+        return victims
+
+    def invalidate(self, binary_fp=None, keep_binary_fp=None):
+        # Remove the entries produced by binary_fp, or every entry that was
+        # not produced by keep_binary_fp (i.e. after the simulator changed)
+        with self._lock:
+            if binary_fp is not None:
+                rows = self._db.execute("SELECT key FROM entries WHERE binary = ?", (binary_fp,))
+            elif keep_binary_fp is not None:
+                rows = self._db.execute("SELECT key FROM entries WHERE binary != ?", (keep_binary_fp,))
+            else:
+                rows = self._db.execute("SELECT key FROM entries")
+            keys = [row[0] for row in rows]
+            self._delete(keys)
+        return keys
+
+    def stats(self):
+        with self._lock:
+            count, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            binaries = self._db.execute(
+                "SELECT binary, COUNT(*) FROM entries GROUP BY binary"
+            ).fetchall()
+        return {"entries": count, "bytes": total, "max_bytes": self.max_bytes,
+                "binaries": dict(binaries)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and maintain the simulation result cache.")
+    parser.add_argument("command", choices=["stats", "evict", "invalidate", "clear"])
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--max-bytes", type=int, default=MAX_BYTES)
+    parser.add_argument("--sim-bin", help="For invalidate: keep only entries from this binary")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.cache_dir, args.max_bytes)
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+    elif args.command == "evict":
+        print(f"Evicted {len(cache.evict())} entries")
+    elif args.command == "invalidate":
+        if not args.sim_bin:
+            sys.exit("invalidate needs --sim-bin (use 'clear' to drop everything)")
+        removed = cache.invalidate(keep_binary_fp=binary_fingerprint(args.sim_bin))
+        print(f"Invalidated {len(removed)} entries from other binaries")
+    elif args.command == "clear":
+        print(f"Removed {len(cache.invalidate())} entries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
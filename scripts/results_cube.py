@@ -0,0 +1,193 @@
+import argparse
+import sys
+import warnings
+
+import numpy as np
+
+from extract_results import FULL_FIDELITY, full_fidelity
+
+# Dense, pre-indexed view of compiled results.
+#
+# ResultsCube holds one float64 array of shape
+#   (topology, routing, traffic, injection rate, metric)
+# built once from the compiled records, with NaN where a point was not run
+# and label <-> index dictionaries for every axis.  Replicas of a point
+# (seeds, runs) are averaged into their cell.  A series is then a plain
+# array view, cube.series("mesh_8x8", "XY", "TRAFFIC_RANDOM", "Average Delay"),
+# with no per-series scan of the data, and aggregates over whole axes are
+# single NumPy reductions, e.g. cube.reduce("mean", over="Traffic").
+# Only full-length runs of one iteration ("current" by default) and one
+# design go into the cube, the base configs (Design "") unless another
+# design-space sample is asked for; screening runs, older iterations and the
+# other designs would be averaged into the same cells otherwise.
+
+AXES = ("Topology", "Routing", "Traffic", "Injection Rate")
+METRICS = ("Average Delay", "Throughput", "Received Packets", "Max Delay", "Total Energy")
+RATE_DIGITS = 6
+
+REDUCERS = {
+    "mean": np.nanmean,
+    "min": np.nanmin,
+    "max": np.nanmax,
+    "median": np.nanmedian,
+    "std": np.nanstd,
+}
+
+
+def labels_of(column):
+    # Label column as a str array, "" where the CSV left it empty
+    return np.where(column.isna(), "", column.astype(str))
+
+
+class ResultsCube:
+
+    def __init__(self, values, labels, metrics):
+        # values: ndarray (len(labels[axis]) for axis in axes..., len(metrics))
+        # labels: {axis: [label, ...]} in axis order
+        self.values = values
+        self.axes = tuple(labels)
+        self.labels = {axis: list(labels[axis]) for axis in self.axes}
+        self.metrics = list(metrics)
+        self.index = {axis: {label: i for i, label in enumerate(self.labels[axis])} for axis in self.axes}
+        self.metric_index = {metric: i for i, metric in enumerate(self.metrics)}
+
+    @classmethod
+    def from_columns(cls, data, metrics=METRICS, categories=None):
+        # data: {column: array}; categorical columns are either labels or,
+        # with `categories` (as returned by results_store.load_columns), codes
+        metrics = [m for m in metrics if m in data]
+        inverse = []
+        labels = {}
+        for axis in AXES:
+            column = np.asarray(data[axis])
+            if axis == "Injection Rate":
+                column = np.round(column.astype(np.float64), RATE_DIGITS)
+            if categories is not None and axis in categories:
+                codes, inv = np.unique(column, return_inverse=True)
+                labels[axis] = [categories[axis][c] for c in codes]
+            else:
+                uniq, inv = np.unique(column, return_inverse=True)
+                labels[axis] = uniq.tolist()
+            inverse.append(inv.ravel())
+
+        shape = tuple(len(labels[axis]) for axis in AXES)
+        cells = int(np.prod(shape))
+        flat = np.ravel_multi_index(inverse, shape) if cells else np.empty(0, dtype=np.intp)
+        values = np.full((cells, len(metrics)), np.nan)
+        for j, metric in enumerate(metrics):
+            column = np.asarray(data[metric], dtype=np.float64)
+            present = ~np.isnan(column)
+            sums = np.bincount(flat[present], weights=column[present], minlength=cells)
+            counts = np.bincount(flat[present], minlength=cells)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values[:, j] = np.where(counts > 0, sums / counts, np.nan)
+        return cls(values.reshape(shape + (len(metrics),)), labels, metrics)
+
+    @classmethod
+    def from_frame(cls, df, metrics=METRICS, iteration="current", design=""):
+        # Same selection as from_store; iteration=None for frames that are
+        # already one iteration
+        df = full_fidelity(df)
+        if iteration and "Iteration" in df.columns:
+            df = df[labels_of(df["Iteration"]) == iteration]
+        if "Design" in df.columns:
+            df = df[labels_of(df["Design"]) == design]
+        data = {column: labels_of(df[column]) if column in AXES[:3] else df[column].to_numpy()
+                for column in list(AXES) + [m for m in metrics if m in df.columns]}
+        return cls.from_columns(data, metrics)
+
+    @classmethod
+    def from_store(cls, store_dir, metrics=METRICS, iteration="current", topologies=None, design=""):
+        from results_store import SCHEMA, load_columns
+
+        metrics = [m for m in metrics if m in SCHEMA]
+        where = {"Fidelity": FULL_FIDELITY, "Design": design}
+        if iteration:
+            where["Iteration"] = iteration
+        data, categories = load_columns(store_dir, list(AXES) + metrics, topologies, where)
+        return cls.from_columns(data, metrics, categories)
+
+    def position(self, axis, label):
+        if axis == "Injection Rate":
+            label = round(float(label), RATE_DIGITS)
+        return self.index[axis][label]
+
+    def sel(self, metric=None, **labels):
+        # View with the given axes fixed; keyword names use underscores for
+        # spaces (Injection_Rate=0.05).  Remaining axes keep their order.
+        key = []
+        for axis in self.axes:
+            label = labels.pop(axis.replace(" ", "_"), None)
+            key.append(slice(None) if label is None else self.position(axis, label))
+        if labels:
+            raise KeyError(f"Unknown axes: {', '.join(labels)}")
+        key.append(slice(None) if metric is None else self.metric_index[metric])
+        return self.values[tuple(key)]
+
+    def series(self, topology, routing, traffic, metric):
+        # (rates, values) of one curve, without the rates that were not run
+        values = self.values[
+            self.index["Topology"][topology], self.index["Routing"][routing],
+            self.index["Traffic"][traffic], :, self.metric_index[metric],
+        ]
+        present = ~np.isnan(values)
+        return np.asarray(self.labels["Injection Rate"])[present], values[present]
+
+    def reduce(self, how="mean", over=("Traffic",)):
+        # New cube with the `over` axes collapsed by a NaN-aware reducer
+        over = (over,) if isinstance(over, str) else tuple(over)
+        positions = tuple(self.axes.index(axis) for axis in over)
+        with warnings.catch_warnings():
+            # All-NaN slices are just points that were not run
+            warnings.simplefilter("ignore", RuntimeWarning)
+            values = REDUCERS[how](self.values, axis=positions)
+        labels = {axis: self.labels[axis] for axis in self.axes if axis not in over}
+        return ResultsCube(values, labels, self.metrics)
+
+    def to_records(self):
+        # Non-empty cells as dicts, e.g. for csv.DictWriter
+        grid = np.indices(self.values.shape[:-1]).reshape(len(self.axes), -1).T
+        flat = self.values.reshape(-1, len(self.metrics))
+        records = []
+        for cell, row in zip(grid, flat):
+            if np.isnan(row).all():
+                continue
+            record = {axis: self.labels[axis][i] for axis, i in zip(self.axes, cell)}
+            record.update((m, None if np.isnan(v) else float(v)) for m, v in zip(self.metrics, row))
+            records.append(record)
+        return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print series from the results cube.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="Compiled results CSV")
+    source.add_argument("--store", help="Columnar results store (results_store.py)")
+    parser.add_argument("--metric", default="Average Delay")
+    parser.add_argument("--reduce", choices=sorted(REDUCERS), help="Collapse the Traffic axis first")
+    parser.add_argument("--design", default="", help="Design-space sample id (default: the base configs)")
+    args = parser.parse_args(argv)
+
+    if args.store:
+        cube = ResultsCube.from_store(args.store, design=args.design)
+    else:
+        import pandas as pd
+
+        cube = ResultsCube.from_frame(pd.read_csv(args.csv), design=args.design)
+    if args.reduce:
+        cube = cube.reduce(args.reduce, over="Traffic")
+
+    rates = cube.labels["Injection Rate"]
+    print(" " * 40 + "".join(f"{rate:>10g}" for rate in rates))
+    names = [axis for axis in cube.axes if axis != "Injection Rate"]
+    for key in np.ndindex(*cube.values.shape[:len(names)]):
+        row = cube.values[key][:, cube.metric_index[args.metric]]
+        if np.isnan(row).all():
+            continue
+        label = " ".join(str(cube.labels[axis][i]) for axis, i in zip(names, key))
+        print(f"{label:<40}" + "".join(f"{v:>10.3f}" for v in row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
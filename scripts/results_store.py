@@ -0,0 +1,316 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+# Typed columnar store for compiled results.
+#
+# One fixed schema for every topology family instead of one CSV layout per
+# extractor.  Each column is a .npy file, partitioned by topology:
+#   <store>/schema.json
+#   <store>/topology=mesh_8x8.3f09a2c1d4e5/injection_rate.npy
+#   <store>/topology=mesh_8x8.3f09a2c1d4e5/average_delay.npy
+#   ...
+# Topology, Routing, Traffic, Iteration, Fidelity and Design are dictionary
+# encoded: the partitions hold int16 codes and schema.json holds the labels.
+# Columns are memory-mapped on load, so readers only touch the columns and
+# partitions they ask for.  Missing values are NaN for floats and -1 for integers.
+#
+# A partition directory is never modified: a changed partition is written to
+# a new directory named after its content, and schema.json, which lists the
+# directory of every partition, is swapped in atomically once it is complete.
+# New labels are only ever appended to the dictionaries, and schema.json gets
+# them before any partition using them is written.  A reader that loaded an
+# older schema.json therefore reads a consistent older version of the store;
+# if a writer removed that version's directories meanwhile, the reader
+# starts over with the new schema.json.
+
+SCHEMA_VERSION = 1
+
+CATEGORY = "category"
+SCHEMA = {
+    "Iteration": CATEGORY,
+    "Topology": CATEGORY,
+    "Routing": CATEGORY,
+    "Traffic": CATEGORY,
+    "Injection Rate": "float64",
+    "Seed": "int64",
+    "Run": "int32",
+    "Fidelity": CATEGORY,
+    "Design": CATEGORY,
+    "Received Packets": "int64",
+    "Average Delay": "float64",
+    "Throughput": "float64",
+    "Received Flits": "int64",
+    "Received/Ideal Flits Ratio": "float64",
+    "Wireless Utilization": "float64",
+    "Max Delay": "float64",
+    "IP Throughput": "float64",
+    "Total Energy": "float64",
+    "Dynamic Energy": "float64",
+    "Static Energy": "float64",
+    "Energy Per Flit": "float64",
+    "Energy Delay Product": "float64",
+    "Simulation Time": "int64",
+    "Cycles Executed": "int64",
+    "Wall Time": "float64",
+    "User CPU": "float64",
+    "System CPU": "float64",
+    "Peak RSS": "int64",
+    "Exit Status": "int32",
+    "Cycles Per Second": "float64",
+    "Simulator": CATEGORY,
+    "Replicas": "int32",
+    "Delay CI": "float64",
+    "Throughput CI": "float64",
+    "Refined": "int8",
+}
+CODE_DTYPE = "int16"
+
+
+def column_file(column):
+    # "Received/Ideal Flits Ratio" -> received_ideal_flits_ratio.npy
+    slug = "".join(c if c.isalnum() else "_" for c in column.lower())
+    return "_".join(filter(None, slug.split("_"))) + ".npy"
+
+
+# Attempts of a reader racing writers that remove old partitions
+READ_ATTEMPTS = 5
+
+
+def partition_dir(store_dir, topology, schema=None):
+    # Stores written before partitions were versioned have no "dir"
+    info = (schema or {}).get("partitions", {}).get(topology, {})
+    return os.path.join(store_dir, info.get("dir", f"topology={topology}"))
+
+
+def missing_value(dtype):
+    return np.nan if np.dtype(dtype).kind == "f" else -1
+
+
+def read_schema(store_dir):
+    try:
+        with open(os.path.join(store_dir, "schema.json"), "r") as f:
+            schema = json.load(f)
+    except FileNotFoundError:
+        return {"version": SCHEMA_VERSION, "categories": {}, "partitions": {}}
+    if schema.get("version") != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported results store version in {store_dir}")
+    return schema
+
+
+def write_schema(store_dir, schema):
+    path = os.path.join(store_dir, "schema.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(schema, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def encode_column(values, column, schema):
+    # Categorical labels -> codes, extending the dictionary with new labels.
+    # Codes of existing labels never change, so untouched partitions stay valid.
+    labels = schema["categories"].setdefault(column, [])
+    index = {label: i for i, label in enumerate(labels)}
+    codes = np.empty(len(values), dtype=CODE_DTYPE)
+    for i, value in enumerate(values):
+        label = "" if value is None else str(value)
+        code = index.get(label)
+        if code is None:
+            code = index[label] = len(labels)
+            labels.append(label)
+        codes[i] = code
+    return codes
+
+
+def to_array(values, dtype):
+    fill = missing_value(dtype)
+    return np.array([fill if v is None or v == "" else v for v in values], dtype=dtype)
+
+
+def partition_arrays(records, schema):
+    arrays = {}
+    for column, dtype in SCHEMA.items():
+        values = [record.get(column) for record in records]
+        if dtype == CATEGORY:
+            arrays[column] = encode_column(values, column, schema)
+        else:
+            arrays[column] = to_array(values, dtype)
+    return arrays
+
+
+def partition_signature(arrays):
+    # Category codes are stable, so hashing them is as good as the labels
+    h = hashlib.sha256()
+    for column, array in arrays.items():
+        h.update(column.encode())
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+
+def write_partition(store_dir, topology, arrays, signature):
+    # Writes the partition to a new directory named after its content and
+    # returns that name; the directory is complete once it has its name
+    name = f"topology={topology}.{signature[:12]}"
+    final_dir = os.path.join(store_dir, name)
+    if os.path.isdir(final_dir):
+        return name
+    tmp_dir = os.path.join(store_dir, f".tmp-{name}-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for column, array in arrays.items():
+        np.save(os.path.join(tmp_dir, column_file(column)), array)
+    os.rename(tmp_dir, final_dir)
+    return name
+
+
+def write_store(records, store_dir):
+    # Writes `records` (dicts keyed by SCHEMA column names, e.g. the output of
+    # extract_results.extract) as the full content of the store.  Only the
+    # partitions whose records changed are rewritten.  Returns their names.
+    os.makedirs(store_dir, exist_ok=True)
+    schema = read_schema(store_dir)
+    by_topology = {}
+    for record in records:
+        by_topology.setdefault(record["Topology"], []).append(record)
+
+    known_labels = {column: len(labels) for column, labels in schema["categories"].items()}
+    encoded = {}
+    for topology, part in sorted(by_topology.items()):
+        arrays = partition_arrays(part, schema)
+        encoded[topology] = (arrays, partition_signature(arrays), len(part))
+    if any(len(labels) != known_labels.get(column) for column, labels in schema["categories"].items()):
+        # The new labels go out before any code that refers to them; the
+        # partitions listed are still the old ones
+        write_schema(store_dir, schema)
+
+    old = dict(schema["partitions"])
+    written = []
+    partitions = {}
+    for topology, (arrays, signature, rows) in encoded.items():
+        known = old.get(topology)
+        if (known is None or known["signature"] != signature
+                or not os.path.isdir(partition_dir(store_dir, topology, schema))):
+            name = write_partition(store_dir, topology, arrays, signature)
+            written.append(topology)
+        else:
+            name = known.get("dir", f"topology={topology}")
+        partitions[topology] = {"rows": rows, "signature": signature, "dir": name}
+    written += sorted(set(old) - set(partitions))
+    schema["partitions"] = partitions
+    write_schema(store_dir, schema)
+
+    # Only now the old versions are unreferenced
+    current = {info["dir"] for info in partitions.values()}
+    for topology, info in old.items():
+        stale = info.get("dir", f"topology={topology}")
+        if stale not in current:
+            shutil.rmtree(os.path.join(store_dir, stale), ignore_errors=True)
+    return written
+
+
+def load_columns(store_dir, columns=None, topologies=None, where=None):
+    # Returns ({column: ndarray}, categories).  Categorical columns come back
+    # as int16 codes into categories[column].  `where` maps a categorical
+    # column to a label or list of labels to keep, e.g. {"Routing": "XY"}.
+    for attempt in range(READ_ATTEMPTS):
+        schema = read_schema(store_dir)
+        try:
+            return read_columns(store_dir, schema, columns, topologies, where)
+        except FileNotFoundError:
+            # A writer replaced a partition of this schema while it was read
+            if attempt == READ_ATTEMPTS - 1:
+                raise
+
+
+def read_columns(store_dir, schema, columns, topologies, where):
+    # load_columns() of one version of the store; raises FileNotFoundError
+    # when a partition it lists is gone
+    categories = schema["categories"]
+    columns = list(columns or SCHEMA)
+    where = dict(where or {})
+    if topologies is None and "Topology" in where:
+        topologies = where.pop("Topology")
+    if isinstance(topologies, str):
+        topologies = [topologies]
+    selected = [t for t in schema["partitions"] if topologies is None or t in topologies]
+    needed = list(dict.fromkeys(columns + list(where)))
+
+    pieces = {column: [] for column in needed}
+    for topology in selected:
+        rows = schema["partitions"][topology]["rows"]
+        directory = partition_dir(store_dir, topology, schema)
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"{directory}: partition of {topology} listed in schema.json is missing")
+        for column in needed:
+            path = os.path.join(directory, column_file(column))
+            dtype = CODE_DTYPE if SCHEMA[column] == CATEGORY else SCHEMA[column]
+            if os.path.exists(path):
+                pieces[column].append(np.load(path, mmap_mode="r"))
+            elif os.path.isdir(directory):
+                # Column added to the schema after this partition was written
+                pieces[column].append(np.full(rows, missing_value(dtype), dtype=dtype))
+            else:
+                raise FileNotFoundError(f"{directory}: partition of {topology} removed while reading")
+
+    data = {}
+    for column in needed:
+        if len(pieces[column]) == 1:
+            data[column] = pieces[column][0]
+        elif pieces[column]:
+            data[column] = np.concatenate(pieces[column])
+        else:
+            dtype = CODE_DTYPE if SCHEMA[column] == CATEGORY else SCHEMA[column]
+            data[column] = np.empty(0, dtype=dtype)
+
+    if where:
+        mask = np.ones(len(data[needed[0]]) if needed else 0, dtype=bool)
+        for column, labels in where.items():
+            labels = [labels] if isinstance(labels, str) else labels
+            lookup = categories.get(column, [])
+            codes = [lookup.index(label) for label in labels if label in lookup]
+            mask &= np.isin(data[column], codes)
+        data = {column: data[column][mask] for column in columns}
+    else:
+        data = {column: data[column] for column in columns}
+    return data, categories
+
+
+def load_frame(store_dir, columns=None, topologies=None, where=None):
+    # Same as load_columns, as a pandas DataFrame with categorical columns
+    import pandas as pd
+
+    data, categories = load_columns(store_dir, columns, topologies, where)
+    frame = {}
+    for column, values in data.items():
+        if SCHEMA[column] == CATEGORY:
+            frame[column] = pd.Categorical.from_codes(values, categories=categories.get(column, []))
+        else:
+            frame[column] = values
+    return pd.DataFrame(frame)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the columnar results store.")
+    parser.add_argument("store", help="Store directory")
+    parser.add_argument("--from-results", metavar="RESULTS_DIR",
+                        help="(Re)build the store from a results tree via extract_results")
+    args = parser.parse_args(argv)
+
+    if args.from_results:
+        from extract_results import extract
+
+        written = write_store(extract(args.from_results), args.store)
+        print(f"Rewrote {len(written)} partition(s): {', '.join(written) or '-'}")
+    schema = read_schema(args.store)
+    for topology, info in sorted(schema["partitions"].items()):
+        print(f"{topology}: {info['rows']} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+import argparse
+import os
+import sys
+import threading
+import warnings
+
+import numpy as np
+
+# Per-router statistics of detailed: true / show_buffer_stats: true runs.
+#
+# Noxim prints, after the global report,
+#   detailed = [ ... ];      one row per (src, dst) flow, grouped by dst:
+#                            src dst delay_avg delay_max throughput energy packets flits
+#   max_delay = [ ... ];     mesh_dim_y rows of mesh_dim_x values
+#   routed_flits = [ ... ];  same layout, flits that went through each router
+#   Router id / Buffer N ... one row per router: mean and max occupancy of
+#                            every input buffer
+# parse_router_stats() reads these blocks from a log into flat per-router
+# NumPy arrays, in node id order (y * mesh_dim_x + x); the flow rows are
+# parsed in bulk and reduced with bincount, never as Python dicts.
+# save_router_stats() keeps them with the run as <name>.routers.npz, with a
+# leading run axis for files holding several runs, plus the mesh shape.
+# sweep.run_config writes it for every run that has a detailed report.
+# "heatmap" draws the arrays on the mesh (a strip for delta networks) and
+# "hotspots" ranks the routers by a metric.
+
+ROUTER_SUFFIX = ".routers.npz"
+
+# name -> description, in report order
+ARRAYS = {
+    "received_packets": "Received packets",
+    "received_flits": "Received flits",
+    "sent_packets": "Sent packets",
+    "throughput": "Throughput (flits/cycle)",
+    "delay_avg": "Average delay (cycles)",
+    "delay_max": "Max delay (cycles)",
+    "energy": "Energy (J)",
+    "routed_flits": "Routed flits",
+    "buffer_mean": "Mean buffer occupancy (flits)",
+    "buffer_max": "Max buffer occupancy (flits)",
+}
+DEFAULT_HEATMAPS = ("routed_flits", "delay_avg", "buffer_mean", "received_flits")
+
+BLOCKS = ("detailed", "max_delay", "routed_flits")
+BUFFER_HEADER = b"Router id"
+
+
+def iter_report_blocks(source):
+    # Yields one {block name: [row lines]} per run of a log (path or bytes
+    # lines); runs without any detailed block yield {}
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        with open(source, "rb", buffering=1 << 20) as f:
+            yield from iter_report_blocks(f)
+        return
+
+    from noxim_log import BANNER
+
+    blocks = {}
+    current = None
+    started = False
+    for line in source:
+        if current == "buffers":
+            if line[:1].isdigit():
+                blocks[current].append(line)
+            elif blocks[current]:
+                # The table ends at the first line that is not a router row
+                current = None
+            continue
+        if current is not None:
+            if line[:2] == b"];":
+                current = None
+            elif line[:1] != b"%":
+                blocks[current].append(line)
+            continue
+        if line[:1] == b"\t" and BANNER in line:
+            if started:
+                yield blocks
+            blocks = {}
+            started = True
+            continue
+        head = line.rstrip()
+        if head.endswith(b"= ["):
+            name = head[:-3].strip().decode(errors="replace")
+            if name in BLOCKS:
+                current = name
+                blocks[current] = []
+        elif line.startswith(BUFFER_HEADER):
+            current = "buffers"
+            blocks[current] = []
+    yield blocks
+
+
+def _matrix(rows):
+    return np.loadtxt(rows, ndmin=2) if rows else np.empty((0, 0))
+
+
+def router_arrays(blocks, nodes=None):
+    # {name: 1-d array over the routers} plus "shape", from one run's blocks
+    detailed = np.loadtxt(blocks["detailed"], ndmin=2) if blocks.get("detailed") else np.empty((0, 8))
+    max_delay = _matrix(blocks.get("max_delay"))
+    routed = _matrix(blocks.get("routed_flits"))
+    buffers = [line.rstrip(b"\r\n").split(b"\t") for line in blocks.get("buffers", [])]
+
+    shape = max_delay.shape if max_delay.size else routed.shape if routed.size else None
+    if nodes is None:
+        candidates = [int(np.prod(shape)) if shape else 0, len(buffers)]
+        if len(detailed):
+            candidates.append(int(detailed[:, :2].max()) + 1)
+        nodes = max(candidates)
+    if not shape or int(np.prod(shape)) != nodes:
+        shape = (nodes,)
+
+    arrays = {}
+    if len(detailed):
+        src = detailed[:, 0].astype(np.int64)
+        dst = detailed[:, 1].astype(np.int64)
+        packets = detailed[:, 6]
+        arrays["received_packets"] = np.bincount(dst, packets, nodes)
+        arrays["received_flits"] = np.bincount(dst, detailed[:, 7], nodes)
+        arrays["sent_packets"] = np.bincount(src, packets, nodes)
+        arrays["throughput"] = np.bincount(dst, detailed[:, 4], nodes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            arrays["delay_avg"] = np.bincount(dst, detailed[:, 2] * packets, nodes) / arrays["received_packets"]
+        delay_max = np.zeros(nodes)
+        np.maximum.at(delay_max, dst, detailed[:, 3])
+        arrays["delay_max"] = delay_max
+        # The energy column is the destination router's, repeated per row
+        energy = np.full(nodes, np.nan)
+        energy[dst] = detailed[:, 5]
+        arrays["energy"] = energy
+    if max_delay.size == nodes:
+        # The matrix also covers routers that received nothing
+        arrays["delay_max"] = max_delay.ravel().astype(np.float64)
+    if routed.size == nodes:
+        arrays["routed_flits"] = routed.ravel().astype(np.float64)
+    if buffers:
+        ids = np.array([int(row[0]) for row in buffers])
+        values = np.array([[float(v) if v.strip() else np.nan for v in row[1:]] for row in buffers])
+        mean = np.full(nodes, np.nan)
+        peak = np.full(nodes, np.nan)
+        with warnings.catch_warnings():
+            # Routers without buffers print empty columns
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mean[ids] = np.nanmean(values[:, 0::2], axis=1)
+            peak[ids] = np.nanmax(values[:, 1::2], axis=1)
+        arrays["buffer_mean"] = mean
+        arrays["buffer_max"] = peak
+    return {name: arrays[name].astype(np.float32) for name in ARRAYS if name in arrays}, tuple(shape)
+
+
+def parse_router_stats(source, nodes=None):
+    # [(arrays, shape)] for the runs of a log that have a detailed report
+    return [router_arrays(blocks, nodes) for blocks in iter_report_blocks(source) if blocks]
+
+
+def router_stats_path(output_path):
+    return os.path.splitext(output_path)[0] + ROUTER_SUFFIX
+
+
+def save_router_stats(output_path, runs):
+    # Stores the runs' arrays with a leading run axis next to the log;
+    # returns the path or None when there was nothing to store
+    runs = [(arrays, shape) for arrays, shape in runs if arrays]
+    if not runs:
+        return None
+    shape = runs[-1][1]
+    names = [name for name in ARRAYS if all(name in arrays for arrays, _ in runs)]
+    path = router_stats_path(output_path)
+    tmp = path[:-len(".npz")] + f".{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    np.savez_compressed(tmp, shape=np.array(shape),
+                        **{name: np.stack([arrays[name] for arrays, _ in runs]) for name in names})
+    os.replace(tmp, path)
+    return path
+
+
+def load_router_stats(path, run=-1):
+    # (arrays, shape) of one run from a .routers.npz or a raw log
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            shape = tuple(int(v) for v in data["shape"])
+            return {name: data[name][run] for name in data.files if name != "shape"}, shape
+    runs = parse_router_stats(path)
+    if not runs:
+        raise ValueError(f"{path}: no detailed per-router report (run with detailed: true)")
+    return runs[run]
+
+
+def hotspots(values, shape, top=10):
+    # [(node, (x, y) or None, value, z-score)] of the `top` highest routers
+    values = np.asarray(values, dtype=np.float64)
+    order = np.argsort(np.where(np.isnan(values), -np.inf, values))[::-1][:top]
+    std = np.nanstd(values)
+    z = (values - np.nanmean(values)) / std if std > 0 else np.zeros_like(values)
+    result = []
+    for node in order:
+        if np.isnan(values[node]):
+            break
+        xy = (int(node % shape[1]), int(node // shape[1])) if len(shape) == 2 else None
+        result.append((int(node), xy, float(values[node]), float(z[node])))
+    return result
+
+
+def render_heatmaps(arrays, shape, names, output, title="", top=3):
+    # One panel per array on the router grid, top hotspots circled
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    names = [name for name in names if name in arrays]
+    if not names:
+        raise ValueError(f"None of {', '.join(names) or 'the requested arrays'} in this run")
+    grid = shape if len(shape) == 2 else (1, shape[0])
+    fig, axes = plt.subplots(1, len(names), figsize=(4.2 * len(names), 4), squeeze=False)
+    for ax, name in zip(axes[0], names):
+        image = ax.imshow(np.asarray(arrays[name]).reshape(grid), cmap="inferno", origin="upper")
+        fig.colorbar(image, ax=ax, shrink=0.8)
+        spots = hotspots(arrays[name], grid, top)
+        ax.scatter([n % grid[1] for n, _, _, _ in spots], [n // grid[1] for n, _, _, _ in spots],
+                   s=160, facecolors="none", edgecolors="cyan", linewidths=1.5)
+        ax.set_title(ARRAYS[name], fontsize=10)
+        ax.set_xlabel("x")
+        ax.set_ylabel("y" if len(shape) == 2 else "")
+        if len(shape) != 2:
+            ax.set_yticks([])
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(output, dpi=120)
+    plt.close(fig)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-router statistics of detailed Noxim runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    extract = sub.add_parser("extract", help="Write .routers.npz next to every detailed log")
+    extract.add_argument("--results-dir", default=None, help="Results tree (default: the repo's results/)")
+    heatmap = sub.add_parser("heatmap", help="Render router heatmaps of one run")
+    heatmap.add_argument("source", help="Log (.txt) or .routers.npz")
+    heatmap.add_argument("--arrays", nargs="+", choices=sorted(ARRAYS), default=list(DEFAULT_HEATMAPS))
+    heatmap.add_argument("--output", help="PNG to write (default: next to the source)")
+    heatmap.add_argument("--run", type=int, default=-1, help="Run of a multi-run file")
+    spots = sub.add_parser("hotspots", help="Rank the routers of one or more runs")
+    spots.add_argument("sources", nargs="+", help="Logs (.txt) or .routers.npz")
+    spots.add_argument("--array", choices=sorted(ARRAYS), default="routed_flits")
+    spots.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "extract":
+        from extract_results import RESULTS_DIR, iter_result_files
+
+        results_dir = args.results_dir or RESULTS_DIR
+        written = 0
+        for _, entry in iter_result_files(results_dir):
+            path = router_stats_path(entry.path)
+            if os.path.exists(path) and os.stat(path).st_mtime_ns >= entry.stat().st_mtime_ns:
+                continue
+            written += save_router_stats(entry.path, parse_router_stats(entry.path)) is not None
+        print(f"Wrote {written} router stats file(s)")
+    elif args.command == "heatmap":
+        arrays, shape = load_router_stats(args.source, args.run)
+        name = os.path.basename(args.source).split(".")[0]
+        output = args.output or os.path.splitext(router_stats_path(args.source))[0] + ".png"
+        render_heatmaps(arrays, shape, args.arrays, output, title=name)
+        print(f"Saved {output}")
+    else:
+        for source in args.sources:
+            arrays, shape = load_router_stats(source)
+            if args.array not in arrays:
+                print(f"{source}: no {args.array}", file=sys.stderr)
+                continue
+            print(f"{os.path.basename(source)}: top {args.top} routers by {ARRAYS[args.array].lower()}")
+            for node, xy, value, z in hotspots(arrays[args.array], shape, args.top):
+                where = f"({xy[0]}, {xy[1]})" if xy else ""
+                print(f"  {node:>5} {where:>10} {value:>14.6g}  z={z:+.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
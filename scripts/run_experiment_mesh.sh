@@ -2,12 +2,15 @@
 
 # Configure your test parameters here
 TOPOLOGY="mesh_10x10"
-CONFIG_FILE="/home/rishi/configs/${TOPOLOGY}.yaml"
-POWER_FILE="/home/rishi/noxim/bin/power.yaml"
-NOXIM_BIN="/home/rishi/noxim/bin/noxim"
+# Locations follow the same environment variables as scripts/paths.py
+NOXIM_HOME="${NOXIM_HOME:-$HOME}"
+NOXIM_DIR="${NOXIM_DIR:-$HOME/noxim}"
+CONFIG_FILE="${NOXIM_CONFIG_DIR:-$NOXIM_HOME/configs}/${TOPOLOGY}.yaml"
+POWER_FILE="${NOXIM_POWER:-$NOXIM_DIR/bin/power.yaml}"
+NOXIM_BIN="${NOXIM_BIN:-$NOXIM_DIR/bin/noxim}"
 
 # Directories
-RESULTS_DIR="/home/rishi/results/${TOPOLOGY}"
+RESULTS_DIR="${NOXIM_RESULTS_DIR:-$NOXIM_HOME/results}/${TOPOLOGY}"
 mkdir -p $RESULTS_DIR
 
 # Set the lists of parameters you want to vary
@@ -3,19 +3,27 @@
 topologies=("mesh_4x4" "mesh_8x8" "mesh_10x10" "butterfly" "baseline" "omega")
 injection_rates=(0.01 0.05 0.1 0.15 0.2)
 
+# Locations follow the same environment variables as scripts/paths.py
+NOXIM_HOME="${NOXIM_HOME:-$HOME}"
+NOXIM_DIR="${NOXIM_DIR:-$HOME/noxim}"
+CONFIG_DIR="${NOXIM_CONFIG_DIR:-$NOXIM_HOME/configs}"
+RESULTS_DIR="${NOXIM_RESULTS_DIR:-$NOXIM_HOME/results}"
+NOXIM_BIN="${NOXIM_BIN:-$NOXIM_DIR/bin/noxim}"
+POWER_FILE="${NOXIM_POWER:-$NOXIM_DIR/bin/power.yaml}"
+
 for topo in "${topologies[@]}"; do
     # Create a results directory for this topology/size if not existing
-    mkdir -p /home/rishi/results/${topo}
+    mkdir -p ${RESULTS_DIR}/${topo}
     
     for rate in "${injection_rates[@]}"; do
         # Modify the injection rate in the configuration file
-        sed -i "s/^packet_injection_rate:.*/packet_injection_rate: ${rate}/" /home/rishi/configs/${topo}.yaml
+        sed -i "s/^packet_injection_rate:.*/packet_injection_rate: ${rate}/" ${CONFIG_DIR}/${topo}.yaml
         
         # Run the simulation
-        /home/rishi/noxim/bin/noxim \
-            -config /home/rishi/configs/${topo}.yaml \
-            -power /home/rishi/noxim/bin/power.yaml \
-            > /home/rishi/results/${topo}/${topo}_rate_${rate}.txt
+        ${NOXIM_BIN} \
+            -config ${CONFIG_DIR}/${topo}.yaml \
+            -power ${POWER_FILE} \
+            > ${RESULTS_DIR}/${topo}/${topo}_rate_${rate}.txt
         
         echo "Simulation for ${topo} at injection rate ${rate} completed."
     done
@@ -0,0 +1,473 @@
+import argparse
+import itertools
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from cost_model import CostModel, config_features, format_seconds, lpt_makespan
+from noxim_log import read_metrics
+from resource_usage import run_measured, write_usage
+from paths import CACHE_DIR, CONFIG_DIR, NOXIM_BIN, POWER_FILE, REPO_DIR, RESULTS_DIR
+from result_cache import ResultCache, binary_fingerprint, cache_key
+
+# Parallel sweep engine.
+#
+# Expands a base config from configs/ and a sweep spec
+# (routing_algorithm x traffic_distribution x packet_injection_rate x seed)
+# into simulation points, writes one overridden config per point and runs the
+# simulator on all of them with bounded concurrency.  Output files keep the
+# naming used by the run_experiment_*.sh scripts:
+#   <results_dir>/<topology>/<topology>_<ROUTING>_<TRAFFIC>_rate_<RATE>.txt
+# with a "_seed_<SEED>" suffix when an explicit seed is requested and a
+# "_cycles_<N>" suffix for runs with a non-default simulation_time.
+#
+# Every job is its own simulator process, so the pool only has to wait on
+# subprocesses; a thread pool is enough to keep all cores busy.  Jobs are
+# handed out longest-expected-first according to cost_model.py, which is
+# refitted as runs complete, so no long run is left to start last.
+
+# Same defaults as run_experiment_mesh.sh / run_experiment_delta.sh
+INJECTION_RATES = [0.01, 0.05, 0.1, 0.15, 0.2]
+MESH_ROUTING_ALGORITHMS = ["XY", "ODD_EVEN", "WEST_FIRST", "DYAD"]
+MESH_TRAFFIC_PATTERNS = ["TRAFFIC_RANDOM", "TRAFFIC_TRANSPOSE1", "TRAFFIC_SHUFFLE"]
+DELTA_ROUTING_ALGORITHMS = ["DELTA"]
+DELTA_TRAFFIC_PATTERNS = ["TRAFFIC_RANDOM", "TRAFFIC_BIT_REVERSAL"]
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    topology: str
+    routing: str
+    traffic: str
+    rate: float
+    seed: int = None
+    # Extra "key: value" overrides applied on top of the base config
+    overrides: tuple = ()
+    # simulation_time override for shortened/extended runs, None keeps the
+    # base config's value
+    sim_time: int = None
+    # Id of a design-space sample (design_space.py), keeps the outputs of
+    # points that only differ in their overrides apart
+    design: str = None
+
+    @property
+    def name(self):
+        name = f"{self.topology}_{self.routing}_{self.traffic}_rate_{self.rate}"
+        if self.seed is not None:
+            name += f"_seed_{self.seed}"
+        if self.sim_time is not None:
+            name += f"_cycles_{self.sim_time}"
+        if self.design is not None:
+            name += f"_design_{self.design}"
+        return name
+
+    def config_overrides(self):
+        values = {
+            "routing_algorithm": self.routing,
+            "traffic_distribution": self.traffic,
+            "packet_injection_rate": self.rate,
+        }
+        if self.sim_time is not None:
+            values["simulation_time"] = self.sim_time
+        values.update(dict(self.overrides))
+        return values
+
+
+@dataclass
+class SweepOptions:
+    sim_bin: str = NOXIM_BIN
+    power_file: str = POWER_FILE
+    results_dir: str = RESULTS_DIR
+    jobs: int = os.cpu_count() or 1
+    timeout: float = None
+    retries: int = 1
+    # Directory for the per-point configs, defaults to <results>/<topo>/configs
+    config_out_dir: str = None
+    extra_args: list = field(default_factory=list)
+    # ResultCache consulted before running a point; None disables caching
+    cache: ResultCache = None
+    # CostModel ordering the jobs; None runs them in the given order
+    cost_model: CostModel = None
+    # Results dir to fit the cost model on instead, the first time a batch of
+    # more than one point needs ordering
+    cost_history: str = None
+
+    def scheduler(self, points):
+        # The cost model for a batch of `points`, None when there is nothing
+        # to order.  Fitting reads every usage sidecar, so it happens once.
+        if len(points) < 2:
+            return None
+        if self.cost_model is None and self.cost_history is not None:
+            self.cost_model = CostModel.from_results(self.cost_history)
+            self.cost_history = None
+        return self.cost_model
+
+
+def format_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def apply_overrides(config_text, overrides):
+    # Rewrite top-level "key: value" lines in place, exactly like the
+    # `sed -i "s/^key:.*/key: value/"` calls in the shell scripts, so the
+    # comments and nested sections of the base config are preserved.
+    # Keys that are not present yet are appended at the end.
+    lines = config_text.splitlines()
+    for key, value in overrides.items():
+        pattern = re.compile(rf"^{re.escape(key)}:.*$")
+        new_line = f"{key}: {format_value(value)}"
+        for i, line in enumerate(lines):
+            if pattern.match(line):
+                lines[i] = new_line
+                break
+        else:
+            lines.append(new_line)
+    return "\n".join(lines) + "\n"
+
+
+def topology_name(base_config):
+    # configs/mesh_8x8.yaml -> mesh_8x8
+    return os.path.splitext(os.path.basename(base_config))[0]
+
+
+def default_axes(config_text):
+    # Delta networks only support DELTA routing
+    match = re.search(r"^topology:\s*(\w+)", config_text, re.MULTILINE)
+    if match and match.group(1) != "MESH":
+        return DELTA_ROUTING_ALGORITHMS, DELTA_TRAFFIC_PATTERNS
+    return MESH_ROUTING_ALGORITHMS, MESH_TRAFFIC_PATTERNS
+
+
+def expand_points(topology, routings, traffics, rates, seeds=(None,), overrides=None):
+    extra = tuple(sorted((overrides or {}).items()))
+    points = []
+    for routing, traffic, rate, seed in itertools.product(routings, traffics, rates, seeds):
+        points.append(SweepPoint(topology, routing, traffic, float(rate), seed, extra))
+    return points
+
+
+def load_sweep_spec(path):
+    # A sweep spec is a small YAML file, e.g.
+    #   base: configs/mesh_8x8.yaml
+    #   routing_algorithm: [XY, ODD_EVEN, WEST_FIRST, DYAD]
+    #   traffic_distribution: [TRAFFIC_RANDOM, TRAFFIC_SHUFFLE]
+    #   packet_injection_rate: [0.01, 0.05, 0.1]
+    #   seed: [1, 2, 3]
+    #   overrides: {simulation_time: 20000}
+    import yaml
+
+    with open(path, "r") as f:
+        spec = yaml.safe_load(f) or {}
+    base = spec.get("base")
+    if base and not os.path.isabs(base):
+        base = os.path.join(os.path.dirname(os.path.abspath(path)), base)
+        if not os.path.exists(base):
+            base = os.path.join(REPO_DIR, spec["base"])
+    spec["base"] = base
+    return spec
+
+
+def config_path_for(point, options):
+    config_dir = options.config_out_dir or os.path.join(
+        options.results_dir, point.topology, "configs"
+    )
+    return os.path.join(config_dir, f"{point.name}.yaml")
+
+
+def output_path_for(point, options):
+    return os.path.join(options.results_dir, point.topology, f"{point.name}.txt")
+
+
+def write_point_config(point, base_text, options):
+    config_path = config_path_for(point, options)
+    os.makedirs(os.path.dirname(config_path), exist_ok=True)
+    config_text = apply_overrides(base_text, point.config_overrides())
+    write_atomic(config_path, config_text)
+    return config_path, config_text
+
+
+def part_path(path):
+    # Temporary file for `path`, private to this process and thread: two
+    # queue workers holding the same re-leased job never share one
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+
+
+def write_atomic(path, text):
+    tmp_path = part_path(path)
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def simulator_command(seed, config_path, options):
+    cmd = [options.sim_bin, "-config", config_path, "-power", options.power_file]
+    if seed is not None:
+        cmd += ["-seed", str(seed)]
+    return cmd + list(options.extra_args)
+
+
+def run_point(point, base_text, options):
+    config_path, config_text = write_point_config(point, base_text, options)
+    outcome = run_config(config_path, config_text, point.seed, output_path_for(point, options), options)
+    outcome["point"] = point
+    return outcome
+
+
+def save_sidecars(output_path):
+    # Per-router arrays of detailed runs, see router_stats.py; the log is
+    # streamed from disk like everything else that reads it
+    from router_stats import parse_router_stats, save_router_stats
+
+    save_router_stats(output_path, parse_router_stats(output_path))
+
+
+def restore_cached(hit, output_path):
+    # Copies a cache hit's log into place; False when it was evicted
+    # between the lookup and the copy
+    tmp_path = part_path(output_path)
+    try:
+        shutil.copyfile(hit["path"], tmp_path)
+    except FileNotFoundError:
+        return False
+    os.replace(tmp_path, output_path)
+    return True
+
+
+def run_config(config_path, config_text, seed, output_path, options, cancel=None):
+    # Run one resolved config, retrying on non-zero exit status or timeout.
+    # The output is written to a temporary file and renamed into place, so a
+    # killed or failed run never leaves a truncated results file behind.
+    # Setting the `cancel` event kills the simulator and gives up the run.
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = part_path(output_path)
+    cmd = simulator_command(seed, config_path, options)
+
+    key = hit = None
+    if options.cache is not None and os.path.isfile(options.sim_bin):
+        binary_fp = binary_fingerprint(options.sim_bin)
+        key = cache_key(config_text, seed, binary_fp, options.power_file, options.extra_args)
+        hit = options.cache.get(key)
+        if hit is not None and restore_cached(hit, output_path):
+            # Restore the sidecars a real run would have left next to the log
+            save_sidecars(output_path)
+            if hit["usage"]:
+                write_usage(output_path, hit["usage"])
+            return {
+                "status": "cached",
+                "attempts": 0,
+                "output": output_path,
+                "metrics": hit["metrics"],
+                "wall_time": 0.0,
+            }
+
+    error = usage = None
+    start = time.monotonic()
+    for attempt in range(1, options.retries + 2):
+        try:
+            with open(tmp_path, "w") as out:
+                returncode, stderr, usage = run_measured(cmd, out, options.timeout, cancel)
+            if returncode == 0:
+                os.replace(tmp_path, output_path)
+                metrics = read_metrics(output_path)
+                save_sidecars(output_path)
+                simulator = binary_fingerprint(options.sim_bin) if os.path.isfile(options.sim_bin) else None
+                usage = write_usage(output_path, usage, (metrics or {}).get("Cycles Executed"), simulator,
+                                    config_features(config_text))
+                # Only complete runs are worth caching
+                if key is not None and metrics is not None:
+                    options.cache.put(key, output_path, metrics, binary_fp, usage)
+                return {
+                    "status": "ok",
+                    "attempts": attempt,
+                    "output": output_path,
+                    "metrics": metrics,
+                    "usage": usage,
+                    "wall_time": time.monotonic() - start,
+                }
+            if cancel is not None and cancel.is_set():
+                error = "cancelled"
+                break
+            if returncode is None:
+                error = f"timed out after {options.timeout}s"
+            else:
+                error = f"exit status {returncode}: {stderr.decode(errors='replace').strip()}"
+        except OSError as e:
+            error = str(e)
+
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return {
+        "status": "failed",
+        "attempts": options.retries + 1,
+        "error": error,
+        "usage": usage,
+        "wall_time": time.monotonic() - start,
+    }
+
+
+def run_sweep(base_config, points, options, progress=print):
+    with open(base_config, "r") as f:
+        base_text = f.read()
+
+    model = options.scheduler(points)
+    features = costs = None
+    if model is not None:
+        features = {point: config_features(apply_overrides(base_text, point.config_overrides())) for point in points}
+        costs = {point: model.predict(features[point]) for point in points}
+        predicted = lpt_makespan(costs.values(), options.jobs)
+
+    outcomes = []
+    pending = list(points)
+    running = {}
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, options.jobs)) as pool:
+        while pending or running:
+            if costs is not None:
+                # Longest expected first, with the latest fit
+                pending.sort(key=costs.__getitem__)
+            while pending and len(running) < max(1, options.jobs):
+                point = pending.pop()
+                running[pool.submit(run_point, point, base_text, options)] = point
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                point = running.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    # e.g. the point's config could not be written; the other
+                    # points still run
+                    outcome = {"status": "failed", "attempts": 0, "error": str(e), "point": point,
+                               "wall_time": 0.0}
+                outcomes.append(outcome)
+                if model is not None and outcome["status"] == "ok":
+                    model.observe(features[point], outcome["usage"]["wall_time"])
+                    costs = {p: model.predict(features[p]) for p in pending}
+                if progress:
+                    done = len(outcomes)
+                    if outcome["status"] in ("ok", "cached"):
+                        progress(
+                            f"[{done}/{len(points)}] {outcome['status'].capitalize()}: "
+                            f"Topology={point.topology}, Routing={point.routing}, "
+                            f"Traffic={point.traffic}, Rate={point.rate}"
+                        )
+                    else:
+                        progress(f"[{done}/{len(points)}] FAILED: {point.name} ({outcome['error']})")
+    if progress and model is not None and points:
+        progress(f"Makespan: predicted {format_seconds(predicted)}, actual "
+                 f"{format_seconds(time.monotonic() - start)} on {options.jobs} worker(s)")
+    return outcomes
+
+
+def add_run_arguments(parser):
+    # Options shared by every tool that drives the simulator through run_sweep
+    parser.add_argument("--set", nargs="+", default=[], metavar="KEY=VALUE",
+                        help="Extra config overrides applied to every point")
+    parser.add_argument("--sim-bin", default=NOXIM_BIN)
+    parser.add_argument("--power", default=POWER_FILE)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--config-out-dir", help="Where to write the per-point configs")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout", type=float, help="Per-job timeout in seconds")
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="Always run the simulator")
+    parser.add_argument("--no-schedule", action="store_true",
+                        help="Run the points in the given order instead of longest-expected-first")
+
+
+def resolve_sim_bin(sim_bin):
+    # A bare name is looked up on PATH, so the binary can be fingerprinted
+    # for the cache
+    return shutil.which(sim_bin) or sim_bin
+
+
+def options_from_args(args):
+    return SweepOptions(
+        sim_bin=resolve_sim_bin(args.sim_bin),
+        power_file=args.power,
+        results_dir=args.results_dir,
+        jobs=args.jobs,
+        timeout=args.timeout,
+        retries=args.retries,
+        config_out_dir=args.config_out_dir,
+        cache=None if args.no_cache else ResultCache(args.cache_dir),
+        cost_history=None if args.no_schedule else args.results_dir,
+    )
+
+
+def overrides_from_args(args, overrides=None):
+    overrides = dict(overrides or {})
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key] = value
+    return overrides
+
+
+def resolve_base(base):
+    # Accept both "configs/mesh_8x8.yaml" and a bare "mesh_8x8"
+    if not os.path.exists(base) and os.path.exists(os.path.join(CONFIG_DIR, base + ".yaml")):
+        return os.path.join(CONFIG_DIR, base + ".yaml")
+    return base
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a parallel Noxim parameter sweep.")
+    parser.add_argument("base", nargs="?", help="Base config, e.g. configs/mesh_8x8.yaml")
+    parser.add_argument("--spec", help="YAML sweep spec (see load_sweep_spec)")
+    parser.add_argument("--routing", nargs="+", help="routing_algorithm values")
+    parser.add_argument("--traffic", nargs="+", help="traffic_distribution values")
+    parser.add_argument("--rates", nargs="+", type=float, help="packet_injection_rate values")
+    parser.add_argument("--seeds", nargs="+", type=int, help="Simulator seeds")
+    parser.add_argument("--prescreen", nargs=2, type=float, metavar=("LOW", "HIGH"),
+                        help="Skip points whose load predicted by queue_model.py is outside "
+                             "[LOW, HIGH] times the saturation rate, e.g. 0.05 2; LOW only applies "
+                             "where the model's held-out delay error is small enough")
+    add_run_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    spec = load_sweep_spec(args.spec) if args.spec else {}
+    base = args.base or spec.get("base")
+    if not base:
+        sys.exit("A base config (positional argument or 'base' in --spec) is required.")
+    base = resolve_base(base)
+
+    with open(base, "r") as f:
+        routings, traffics = default_axes(f.read())
+
+    points = expand_points(
+        topology_name(base),
+        args.routing or spec.get("routing_algorithm") or routings,
+        args.traffic or spec.get("traffic_distribution") or traffics,
+        args.rates or spec.get("packet_injection_rate") or INJECTION_RATES,
+        args.seeds or spec.get("seed") or [None],
+        overrides_from_args(args, spec.get("overrides")),
+    )
+    if args.prescreen:
+        from queue_model import prescreen
+
+        points, skipped = prescreen(base, points, *args.prescreen)
+        print(f"Pre-screen skipped {len(skipped)} trivially linear or saturated points, "
+              f"{len(points)} left to simulate.")
+    options = options_from_args(args)
+
+    start = time.monotonic()
+    outcomes = run_sweep(base, points, options)
+    failed = [o for o in outcomes if o["status"] == "failed"]
+    cached = [o for o in outcomes if o["status"] == "cached"]
+    print(f"{len(outcomes) - len(failed)}/{len(outcomes)} simulations completed "
+          f"({len(cached)} from cache) in {time.monotonic() - start:.1f}s.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
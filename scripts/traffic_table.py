@@ -0,0 +1,207 @@
+import argparse
+import os
+import re
+import sys
+import warnings
+
+import numpy as np
+
+# Traffic-table generator for TRAFFIC_TABLE_BASED runs.
+#
+# Builds the file named by traffic_table_filename ("t.txt" in the configs)
+# from either
+#   - a communication matrix: task x task volumes (.npy, or whitespace/comma
+#     separated text), scaled so the mean per-tile injection rate is --rate;
+#   - a packet trace: "<cycle> <src task> <dst task>" lines, turned into
+#     measured packets/cycle per pair.  The trace is read in chunks and folded
+#     into a task x task count matrix, so memory is bounded by the task count,
+#     not the trace length.
+# Tasks are placed on the tiles of the config's network (mesh_dim_x x
+# mesh_dim_y for MESH, n_delta_tiles for the delta networks) with a NumPy
+# mapping, and the table is written in vectorized chunks, one line per pair:
+#   <src tile> <dst tile> <pir> <por>
+# Mesh tile ids are y * mesh_dim_x + x, as in Noxim.
+
+DELTA_TOPOLOGIES = ("BUTTERFLY", "BASELINE", "OMEGA")
+MAPPINGS = ("linear", "random", "center")
+TRACE_CHUNK = 1 << 20
+WRITE_CHUNK = 1 << 16
+COMMENT = "%"
+
+
+def config_field(config_text, key, default=None):
+    match = re.search(rf"^{key}:\s*\"?([\w.]+)\"?", config_text, re.MULTILINE)
+    return match.group(1) if match else default
+
+
+def network_shape(config_text):
+    # (topology, tiles, (dim_x, dim_y) or None for delta networks)
+    topology = config_field(config_text, "topology", "MESH").upper()
+    if topology in DELTA_TOPOLOGIES:
+        return topology, int(config_field(config_text, "n_delta_tiles")), None
+    dim_x = int(config_field(config_text, "mesh_dim_x"))
+    dim_y = int(config_field(config_text, "mesh_dim_y"))
+    return topology, dim_x * dim_y, (dim_x, dim_y)
+
+
+def load_matrix(path):
+    if path.endswith(".npy"):
+        matrix = np.load(path)
+    else:
+        with open(path, "r") as f:
+            sample = f.read(4096)
+        matrix = np.loadtxt(path, delimiter="," if "," in sample else None, comments=("#", COMMENT), ndmin=2)
+    if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+        raise ValueError(f"{path}: communication matrix must be square, got {matrix.shape}")
+    if (matrix < 0).any():
+        raise ValueError(f"{path}: communication matrix has negative volumes")
+    return matrix.astype(np.float64)
+
+
+def iter_trace_chunks(path, chunk=TRACE_CHUNK):
+    # Yields (cycles, src, dst) int64 arrays of up to `chunk` packets
+    with open(path, "r") as f, warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)  # empty read at EOF
+        while True:
+            block = np.loadtxt(f, dtype=np.int64, comments=("#", COMMENT), usecols=(0, 1, 2),
+                               max_rows=chunk, ndmin=2)
+            if not len(block):
+                return
+            yield block[:, 0], block[:, 1], block[:, 2]
+
+
+def trace_matrix(path, tasks=None, chunk=TRACE_CHUNK):
+    # Packet counts per task pair and the traced duration in cycles
+    counts = np.zeros((tasks or 0, tasks or 0), dtype=np.int64)
+    first, last = None, None
+    for cycles, src, dst in iter_trace_chunks(path, chunk):
+        size = max(counts.shape[0], int(src.max()) + 1, int(dst.max()) + 1)
+        if tasks is not None and size > tasks:
+            raise ValueError(f"{path}: task id {size - 1} >= --tasks {tasks}")
+        if size > counts.shape[0]:
+            grown = np.zeros((size, size), dtype=np.int64)
+            grown[:counts.shape[0], :counts.shape[1]] = counts
+            counts = grown
+        counts += np.bincount(src * size + dst, minlength=size * size).reshape(size, size)
+        lo, hi = int(cycles.min()), int(cycles.max())
+        first = lo if first is None else min(first, lo)
+        last = hi if last is None else max(last, hi)
+    if first is None:
+        raise ValueError(f"{path}: trace contains no packets")
+    return counts, max(last - first + 1, 1)
+
+
+def tile_order(tiles, mesh, mapping, seed=None):
+    # Tiles in the order tasks are placed on them
+    if mapping == "linear":
+        return np.arange(tiles)
+    if mapping == "random":
+        return np.random.default_rng(seed).permutation(tiles)
+    if mesh is None:
+        # Every tile of a delta network is equally far from every other
+        return np.arange(tiles)
+    dim_x, dim_y = mesh
+    ids = np.arange(tiles)
+    dist = np.abs(ids % dim_x - (dim_x - 1) / 2) + np.abs(ids // dim_x - (dim_y - 1) / 2)
+    return np.argsort(dist, kind="stable")
+
+
+def map_tasks(volume, tiles, mesh, mapping="linear", seed=None):
+    # Task x task volumes -> tile x tile volumes.  "center" puts the busiest
+    # tasks on the tiles closest to the middle of the mesh.
+    tasks = volume.shape[0]
+    if tasks > tiles:
+        raise ValueError(f"{tasks} tasks do not fit on {tiles} tiles")
+    order = tile_order(tiles, mesh, mapping, seed)
+    if mapping == "center":
+        load = volume.sum(axis=0) + volume.sum(axis=1)
+        ranked = np.argsort(-load, kind="stable")
+        placement = np.empty(tasks, dtype=np.int64)
+        placement[ranked] = order[:tasks]
+    else:
+        placement = order[:tasks]
+    mapped = np.zeros((tiles, tiles), dtype=np.float64)
+    mapped[np.ix_(placement, placement)] = volume
+    np.fill_diagonal(mapped, 0.0)
+    return mapped, placement
+
+
+def scale_to_rate(mapped, rate):
+    # Mean over the tiles of the per-tile injection rate becomes `rate`
+    total = mapped.sum()
+    if total == 0:
+        raise ValueError("communication matrix carries no traffic between distinct tiles")
+    return mapped * (rate * mapped.shape[0] / total)
+
+
+def write_table(path, rates, por, header=()):
+    # Streams the non-zero pairs; returns the number of lines written
+    src, dst = np.nonzero(rates)
+    pir = rates[src, dst]
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        for line in header:
+            f.write(f"{COMMENT} {line}\n")
+        for start in range(0, len(src), WRITE_CHUNK):
+            stop = start + WRITE_CHUNK
+            block = np.empty(min(stop, len(src)) - start,
+                             dtype=[("src", "i8"), ("dst", "i8"), ("pir", "f8"), ("por", "f8")])
+            block["src"] = src[start:stop]
+            block["dst"] = dst[start:stop]
+            block["pir"] = pir[start:stop]
+            block["por"] = por
+            np.savetxt(f, block, fmt="%d %d %.8g %.6g")
+    os.replace(tmp, path)
+    return len(src)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a Noxim traffic table from a communication matrix or a packet trace.")
+    parser.add_argument("config", help="Config whose network the table is for, e.g. configs/mesh_8x8.yaml")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--matrix", help="Task x task communication volumes (.npy or text)")
+    source.add_argument("--trace", help="Packet trace, '<cycle> <src task> <dst task>' per line")
+    parser.add_argument("--rate", type=float,
+                        help="Mean packet injection rate per tile for --matrix (default: the config's packet_injection_rate)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the traced rates by this factor")
+    parser.add_argument("--tasks", type=int, help="Number of tasks in the trace (default: highest id + 1)")
+    parser.add_argument("--mapping", choices=MAPPINGS, default="linear", help="Task to tile placement")
+    parser.add_argument("--seed", type=int, help="Seed of the random mapping")
+    parser.add_argument("--por", type=float, help="Probability of retransmission (default: the config's)")
+    parser.add_argument("--output", default="t.txt", help="Traffic table to write")
+    args = parser.parse_args(argv)
+
+    with open(args.config, "r") as f:
+        config_text = f.read()
+    topology, tiles, mesh = network_shape(config_text)
+    por = args.por if args.por is not None else float(config_field(config_text, "probability_of_retransmission", 0.01))
+
+    if args.matrix:
+        volume = load_matrix(args.matrix)
+        mapped, placement = map_tasks(volume, tiles, mesh, args.mapping, args.seed)
+        rate = args.rate if args.rate is not None else float(config_field(config_text, "packet_injection_rate", 0.01))
+        rates = scale_to_rate(mapped, rate)
+        origin = f"matrix {os.path.basename(args.matrix)}, mean rate {rate}"
+    else:
+        counts, duration = trace_matrix(args.trace, args.tasks)
+        mapped, placement = map_tasks(counts.astype(np.float64), tiles, mesh, args.mapping, args.seed)
+        rates = mapped * (args.scale / duration)
+        origin = f"trace {os.path.basename(args.trace)}, {int(counts.sum())} packets over {duration} cycles"
+
+    overloaded = int((rates.sum(axis=1) > 1.0).sum())
+    if overloaded:
+        print(f"Warning: {overloaded} tile(s) inject more than one packet per cycle", file=sys.stderr)
+
+    header = [
+        f"{topology} {tiles} tiles, {origin}, {args.mapping} mapping",
+        "task -> tile: " + " ".join(map(str, placement.tolist())),
+        "src dst pir por",
+    ]
+    lines = write_table(args.output, rates, por, header)
+    print(f"Wrote {lines} pairs to {args.output}; run with traffic_distribution: TRAFFIC_TABLE_BASED "
+          f"and traffic_table_filename: \"{args.output}\"")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from paths import CONFIG_DIR
+from sweep import SweepOptions, expand_points
+
+# The tests run the tools against scripts/fake_noxim.py, in temporary
+# results dirs, so they need neither a Noxim build nor the repo's results.
+
+FAKE_NOXIM = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "fake_noxim.py")
+BASE_CONFIG = os.path.join(CONFIG_DIR, "mesh_4x4.yaml")
+
+
+@pytest.fixture
+def make_options(tmp_path):
+    # SweepOptions running fake_noxim into tmp_path/results, without a cache
+    # or cost model unless asked for
+    def make(**kwargs):
+        kwargs.setdefault("sim_bin", FAKE_NOXIM)
+        kwargs.setdefault("power_file", os.devnull)
+        kwargs.setdefault("results_dir", str(tmp_path / "results"))
+        kwargs.setdefault("jobs", 2)
+        return SweepOptions(**kwargs)
+
+    return make
+
+
+@pytest.fixture
+def points():
+    return expand_points("mesh_4x4", ["XY"], ["TRAFFIC_RANDOM"], [0.01, 0.05, 0.1])
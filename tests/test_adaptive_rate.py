@@ -0,0 +1,56 @@
+from adaptive_rate import KneeSearch, run_search
+from conftest import BASE_CONFIG
+
+KNEE = 0.0731
+
+
+def knee_metrics(rate):
+    # M/D/1-like delay up to the knee, throughput capped at it
+    if rate >= KNEE:
+        return {"Average Delay": 1000.0, "Throughput": KNEE}
+    return {"Average Delay": 10.0 / (1.0 - rate / KNEE * 0.5), "Throughput": rate}
+
+
+def drive(search):
+    while True:
+        rates = search.next_rates()
+        if not rates:
+            return search
+        for rate in rates:
+            search.record(rate, knee_metrics(rate))
+
+
+def test_search_brackets_the_knee():
+    search = drive(KneeSearch("mesh_4x4", "XY", "TRAFFIC_RANDOM", tol=0.002))
+    summary = search.summary()
+
+    assert summary["Status"] == "converged"
+    assert summary["Lower Bound"] < KNEE <= summary["Upper Bound"]
+    assert summary["Upper Bound"] - summary["Lower Bound"] <= 0.002
+    # Far fewer runs than a grid at that resolution
+    assert summary["Runs"] < (0.2 - 0.005) / 0.002 / 5
+
+
+def test_search_reports_series_that_never_saturate():
+    search = drive(KneeSearch("mesh_4x4", "XY", "TRAFFIC_RANDOM", high=0.05))
+    assert search.summary()["Status"] == "not saturated"
+    assert search.summary()["Saturation Rate"] is None
+
+
+def test_failed_lowest_rate_fails_the_search():
+    search = KneeSearch("mesh_4x4", "XY", "TRAFFIC_RANDOM")
+    for rate in search.next_rates():
+        search.record(rate, None if rate == search.low else knee_metrics(rate))
+    assert search.next_rates() == []
+    assert search.status == "failed"
+
+
+def test_run_search_on_the_simulator(make_options):
+    searches = [KneeSearch("mesh_4x4", "XY", "TRAFFIC_RANDOM", tol=0.01)]
+    run_search(BASE_CONFIG, searches, make_options(), progress=None)
+    summary = searches[0].summary()
+
+    assert summary["Status"] == "converged"
+    # fake_noxim saturates a 4x4 mesh at 0.38 / 4 ** 1.5 = 0.0475
+    assert summary["Lower Bound"] < 0.0475 + 0.01
+    assert summary["Upper Bound"] - summary["Lower Bound"] <= 0.01
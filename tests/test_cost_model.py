@@ -0,0 +1,70 @@
+import json
+import math
+
+import pytest
+
+from conftest import BASE_CONFIG
+from cost_model import CostModel, config_features, iter_history, lpt_makespan, lpt_order
+from sweep import run_sweep
+
+MESH = "topology: MESH\nmesh_dim_x: 8\nmesh_dim_y: 8\nrouting_algorithm: XY\nreset_time: 1000\n" \
+       "simulation_time: 10000\nbuffer_depth: 4\npacket_injection_rate: 0.05\n"
+
+
+def features(tiles, rate, cycles=11000, routing="XY"):
+    return {"tiles": tiles, "cycles": cycles, "buffer_depth": 4, "rate": rate, "routing": routing}
+
+
+def seconds(f):
+    # A run that costs a microsecond per router-cycle, three times that
+    # with DYAD, doubling every 0.1 of injection rate
+    return 1e-6 * f["tiles"] * f["cycles"] * 2 ** (f["rate"] / 0.1) * (3 if f["routing"] == "DYAD" else 1)
+
+
+def history():
+    return [
+        (f, seconds(f))
+        for f in (features(tiles, rate, cycles, routing)
+                  for tiles in (16, 64, 256) for rate in (0.01, 0.05, 0.1, 0.2)
+                  for cycles in (2000, 11000) for routing in ("XY", "DYAD"))
+    ]
+
+
+def test_features_of_a_resolved_config():
+    assert config_features(MESH) == features(64, 0.05)
+    delta = config_features("topology: BUTTERFLY\nn_delta_tiles: 16\nrouting_algorithm: DELTA\n")
+    assert delta["tiles"] == 16 and delta["cycles"] == 11000 and delta["routing"] == "DELTA"
+
+
+def test_fit_follows_the_history():
+    # Ridge-shrunk towards the prior, so close rather than exact
+    model = CostModel(history())
+    assert len(model) == 48
+    assert model.error() < 0.2
+    # A size that was never run
+    unseen = features(100, 0.1, routing="DYAD")
+    assert model.predict(unseen) == pytest.approx(seconds(unseen), rel=0.25)
+    assert math.exp(model.routing_offset["DYAD"] - model.routing_offset["XY"]) == pytest.approx(3, rel=0.15)
+
+
+def test_lpt_packs_the_longest_jobs_first():
+    assert lpt_order([3, 5, 4], lambda c: c) == [5, 4, 3]
+    # 5 | 4, 4+3 | 5+3, 7+3 | 8+3 ...
+    assert lpt_makespan([3, 5, 3, 4, 3], 2) == 10
+    assert lpt_makespan([3, 5], 4) == 5
+
+
+def test_history_only_counts_successful_measured_runs(tmp_path):
+    for name, usage in {
+        "a": {"wall_time": 2.0, "exit_status": 0, "features": features(16, 0.01)},
+        "b": {"wall_time": 9.0, "exit_status": 1, "features": features(16, 0.01)},
+        "c": {"wall_time": 3.0, "exit_status": 0},
+    }.items():
+        (tmp_path / f"{name}.usage.json").write_text(json.dumps(usage))
+    assert list(iter_history(str(tmp_path))) == [(features(16, 0.01), 2.0)]
+
+
+def test_sweep_runs_the_longest_expected_point_first(make_options, points):
+    options = make_options(jobs=1, cost_model=CostModel(history()))
+    outcomes = run_sweep(BASE_CONFIG, points, options, progress=None)
+    assert [o["point"].rate for o in outcomes] == [0.1, 0.05, 0.01]
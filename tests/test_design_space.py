@@ -0,0 +1,77 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+from conftest import BASE_CONFIG
+from design_space import (
+    PARAMETERS, GaussianProcess, Study, expected_improvement, latin_hypercube, predict, run_exploration,
+    save_models, sobol, write_designs,
+)
+from sweep import output_path_for
+
+
+@pytest.mark.parametrize("sampler", [latin_hypercube, sobol])
+def test_samples_fill_every_stratum(sampler):
+    u = sampler(16, 3, np.random.default_rng(1))
+    assert u.shape == (16, 3) and (0 <= u).all() and (u < 1).all()
+    for column in u.T:
+        assert sorted(np.floor(column * 16).astype(int)) == list(range(16))
+
+
+def test_parameters_map_to_their_grid():
+    buffers = PARAMETERS["buffer_depth"]
+    assert [buffers.value(u) for u in (0.0, 0.5, 0.99)] == [2, 8, 32]
+    assert buffers.unit(8) == 0.5
+    assert PARAMETERS["dyad_threshold"].value(0.5) == 0.5
+    assert buffers.with_range(4, 16).levels == 3
+
+
+def test_gp_interpolates_a_smooth_function():
+    rng = np.random.default_rng(0)
+    X = latin_hypercube(20, 2, rng)
+    y = np.sin(3 * X[:, 0]) + X[:, 1] ** 2
+    gp = GaussianProcess.tune(X, y)
+
+    test = rng.random((50, 2))
+    mean, sd = gp.predict(test)
+    error = np.abs(mean - (np.sin(3 * test[:, 0]) + test[:, 1] ** 2))
+    assert error.mean() < 0.03 and error.max() < 0.2
+    assert np.abs(gp.loo() - y).mean() < 0.05
+    assert (sd >= 0).all()
+
+
+def test_expected_improvement_prefers_low_and_uncertain():
+    ei = expected_improvement(np.array([1.0, 2.0, 2.0]), np.array([0.1, 0.1, 1.0]), best=1.5)
+    assert ei[0] > ei[2] > ei[1] > 0
+
+
+def test_exploration_finds_the_deepest_buffers(make_options, tmp_path):
+    parameters = [PARAMETERS["buffer_depth"], PARAMETERS["n_virtual_channels"]]
+    study = Study("mesh_4x4", "XY", "TRAFFIC_RANDOM", 0.04, parameters)
+    options = make_options()
+    run_exploration(BASE_CONFIG, [study], options, budget=10, initial=6, batch=2,
+                    rng=np.random.default_rng(3), progress=None)
+
+    assert len(study.designs) == 10
+    assert all(d["metrics"] is not None for d in study.designs.values())
+    # Every design is its own run
+    paths = {output_path_for(study.point(key), options) for key in study.designs}
+    assert len(paths) == 10 and all(os.path.exists(p) for p in paths)
+
+    # fake_noxim's saturation grows with buffer depth (up to 16) and VCs
+    validation = study.validation()
+    values, _, _ = study.best_predicted(validation["Average Delay"][0], np.random.default_rng(0))
+    assert values["buffer_depth"] >= 16 and values["n_virtual_channels"] >= 3
+
+    model_path = str(tmp_path / "model.json")
+    save_models([study], [validation], model_path)
+    best = study.best_observed()
+    predicted = predict(model_path, "XY", "TRAFFIC_RANDOM", 0.04, best["values"])
+    assert predicted["Average Delay"][0] == pytest.approx(best["metrics"]["Average Delay"], rel=0.1)
+
+    write_designs([study], str(tmp_path / "dse.csv"))
+    with open(tmp_path / "dse.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 10 and {row["Status"] for row in rows} == {"ok"}
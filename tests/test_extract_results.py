@@ -0,0 +1,142 @@
+import csv
+import os
+import shutil
+
+import pytest
+
+import extract_results
+from conftest import BASE_CONFIG
+from extract_results import (
+    FULL_FIDELITY,
+    MANIFEST_NAME,
+    compile_results,
+    extract,
+    load_manifest,
+    parse_result_name,
+    update_manifest,
+)
+from resource_usage import usage_path
+from sweep import SweepPoint, output_path_for, run_sweep
+
+
+@pytest.fixture
+def results(make_options, points):
+    options = make_options()
+    run_sweep(BASE_CONFIG, points, options, progress=None)
+    return options.results_dir
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("mesh_4x4_rate_0.1.txt", ("mesh_4x4", "", "", 0.1, None, FULL_FIDELITY, "")),
+    ("mesh_8x8_WEST_FIRST_TRAFFIC_SHUFFLE_rate_0.05.txt",
+     ("mesh_8x8", "WEST_FIRST", "TRAFFIC_SHUFFLE", 0.05, None, FULL_FIDELITY, "")),
+    ("butterfly_DELTA_TRAFFIC_BIT_REVERSAL_rate_0.2_seed_3.txt",
+     ("butterfly", "DELTA", "TRAFFIC_BIT_REVERSAL", 0.2, 3, FULL_FIDELITY, "")),
+    ("mesh_4x4_XY_TRAFFIC_RANDOM_rate_0.1_cycles_1000.txt",
+     ("mesh_4x4", "XY", "TRAFFIC_RANDOM", 0.1, None, "1000 cycles", "")),
+    ("mesh_4x4_XY_TRAFFIC_RANDOM_rate_0.1_design_3f09a2c1.txt",
+     ("mesh_4x4", "XY", "TRAFFIC_RANDOM", 0.1, None, FULL_FIDELITY, "3f09a2c1")),
+])
+def test_parse_result_name(name, expected):
+    params = parse_result_name(name)
+    columns = ("Topology", "Routing", "Traffic", "Injection Rate", "Seed", "Fidelity", "Design")
+    assert tuple(params[c] for c in columns) == expected
+
+
+@pytest.mark.parametrize("name", ["notes.txt", "mesh_4x4_rate_x.txt", "mesh_4x4_rate_0.1_seed.txt",
+                                  "mesh_4x4_rate_0.1_seed_x.txt"])
+def test_parse_result_name_rejects(name):
+    assert parse_result_name(name) is None
+
+
+def test_manifest_only_parses_changed_files(results):
+    manifest = load_manifest(os.path.join(results, MANIFEST_NAME))
+    assert update_manifest(results, manifest) == (3, 0, 0)
+    assert update_manifest(results, manifest) == (0, 0, 0)
+    generation = manifest.generation
+
+    log = os.path.join(results, "mesh_4x4", "mesh_4x4_XY_TRAFFIC_RANDOM_rate_0.1.txt")
+    st = os.stat(log)
+    os.utime(log, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert update_manifest(results, manifest) == (0, 1, 0)
+    assert manifest.generation > generation
+
+    with open(log, "a") as f:
+        f.write("\n")
+    assert update_manifest(results, manifest) == (1, 0, 0)
+
+    os.remove(log)
+    assert update_manifest(results, manifest) == (0, 0, 1)
+    assert len(manifest.index()) == 2
+    manifest.close()
+
+
+def test_usage_sidecars_are_only_read_when_they_come_or_go(results, monkeypatch):
+    manifest = load_manifest(os.path.join(results, MANIFEST_NAME))
+    update_manifest(results, manifest)
+    log = os.path.join(results, "mesh_4x4", "mesh_4x4_XY_TRAFFIC_RANDOM_rate_0.1.txt")
+    sidecar = usage_path(log)
+    os.rename(sidecar, sidecar + ".bak")
+    assert update_manifest(results, manifest) == (0, 1, 0)
+    assert manifest.records(os.path.relpath(log, results))[0]["Wall Time"] is not None
+
+    read = []
+    monkeypatch.setattr(extract_results, "read_usage", lambda path: read.append(path) or {})
+    assert update_manifest(results, manifest) == (0, 0, 0)
+    os.rename(sidecar + ".bak", sidecar)
+    assert update_manifest(results, manifest) == (0, 1, 0)
+    assert read == [log]
+    manifest.close()
+
+
+def test_compile_rewrites_csv_only_on_change(results, tmp_path, monkeypatch):
+    output = str(tmp_path / "all.csv")
+    rows, written = compile_results(results, output)
+    assert written and rows == 3
+    assert {r["Injection Rate"] for r in read_csv(output)} == {"0.01", "0.05", "0.1"}
+
+    before = os.stat(output).st_mtime_ns
+    # Nothing changed: not even the records are loaded
+    monkeypatch.setattr(extract_results, "manifest_records", None)
+    assert compile_results(results, output) == (3, False)
+    assert os.stat(output).st_mtime_ns == before
+    monkeypatch.undo()
+
+    os.remove(os.path.join(results, "mesh_4x4", "mesh_4x4_XY_TRAFFIC_RANDOM_rate_0.01.txt"))
+    rows, written = compile_results(results, output)
+    assert written and rows == 2 and len(read_csv(output)) == 2
+
+
+def test_compile_checks_selections_it_cannot_name(results, tmp_path):
+    output = str(tmp_path / "some.csv")
+    assert compile_results(results, output, select=lambda r: r["Injection Rate"] < 0.1) == (2, True)
+    assert compile_results(results, output, select=lambda r: r["Injection Rate"] < 0.05) == (1, True)
+    assert compile_results(results, output, select=lambda r: r["Injection Rate"] < 0.05,
+                           selection="below 0.05") == (1, False)
+
+
+def test_compile_marks_refined_runs_and_skips_dse(results, make_options):
+    options = make_options()
+    screen = SweepPoint("mesh_4x4", "XY", "TRAFFIC_RANDOM", 0.1, overrides=(("stats_warm_up_time", 100),),
+                        sim_time=1000)
+    run_sweep(BASE_CONFIG, [screen], options, progress=None)
+    full = output_path_for(SweepPoint("mesh_4x4", "XY", "TRAFFIC_RANDOM", 0.1), options)
+    dse = os.path.join(results, "dse", "mesh_4x4")
+    os.makedirs(dse)
+    shutil.copy(full, os.path.join(dse, "mesh_4x4_XY_TRAFFIC_RANDOM_rate_0.1_design_ab12.txt"))
+
+    records = extract(results)
+    by_rate = {(r["Injection Rate"], r["Fidelity"]): r for r in records}
+    assert len(records) == 4
+    assert by_rate[(0.1, FULL_FIDELITY)]["Refined"] is True
+    assert by_rate[(0.1, "1000 cycles")]["Refined"] is False
+    assert by_rate[(0.05, FULL_FIDELITY)]["Refined"] is False
+    assert all(r["Design"] == "" for r in records)
+
+    samples = extract(os.path.join(results, "dse"))
+    assert [r["Design"] for r in samples] == ["ab12"]
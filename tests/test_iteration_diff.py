@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from iteration_diff import compare, load_side, main, normalize
+
+RATES = [0.01, 0.02, 0.03, 0.04, 0.05]
+SEEDS = [1, 2, 3]
+
+
+def iteration(label, delays, seeds=SEEDS, runs=1, fidelity="full"):
+    # One XY / random curve; every seed jitters the delay by +-1%
+    rows = []
+    for rate, delay in zip(RATES, delays):
+        for i, seed in enumerate(seeds):
+            for run in range(runs):
+                jitter = 1 + 0.01 * (i - 1) if seed is not None else 1
+                rows.append({
+                    "Iteration": label, "Topology": "mesh_4x4", "Routing": "XY", "Traffic": "TRAFFIC_RANDOM",
+                    "Design": "", "Injection Rate": rate, "Seed": seed, "Run": run, "Fidelity": fidelity,
+                    "Average Delay": delay * jitter, "Throughput": rate * 16,
+                })
+    return pd.DataFrame(rows)
+
+
+BASE = [20.0, 22.0, 25.0, 30.0, 200.0]
+
+
+def compared(new_delays, **kwargs):
+    base = normalize(iteration("Iter 1", BASE, **kwargs))
+    new = normalize(iteration("current", new_delays, **kwargs))
+    return compare(base, new)
+
+
+def test_changes_beyond_the_ci_are_flagged():
+    points, curves, counts = compared([20.1, 22.0, 30.0, 30.0, 200.0])
+    assert counts == {"matched": 15, "base only": 0, "new only": 0}
+    flags = dict(zip(points["Injection Rate"], points["Average Delay Flag"]))
+    # +0.5% is inside the seeds' spread, +20% is not
+    assert flags == {0.01: "", 0.02: "", 0.03: "regression", 0.04: "", 0.05: ""}
+    assert set(points["Average Delay Basis"]) == {"ci"}
+    assert curves["Saturation Flag"].tolist() == [""]
+
+
+def test_points_without_replicas_use_the_threshold():
+    points, _, _ = compared([20.1, 22.0, 22.0, 30.0, 200.0], seeds=[None], runs=3)
+    assert set(points["Average Delay Basis"]) == {"threshold"}
+    flags = dict(zip(points["Injection Rate"], points["Average Delay Flag"]))
+    assert flags[0.01] == "" and flags[0.03] == "improvement"
+
+
+def test_earlier_saturation_is_a_curve_regression():
+    _, curves, _ = compared([20.0, 22.0, 150.0, 180.0, 200.0])
+    row = curves.iloc[0]
+    assert row["Saturation Flag"] == "regression"
+    assert row["Saturation Rate base"] == 0.045 and row["Saturation Rate new"] == 0.025
+
+
+def test_cli_compares_csv_files_without_screening_runs(tmp_path, capsys):
+    base, new = str(tmp_path / "base.csv"), str(tmp_path / "new.csv")
+    iteration("Iter 1", BASE).to_csv(base, index=False)
+    screening = iteration("current", [500.0] * 5, fidelity="1000 cycles")
+    pd.concat([iteration("current", BASE), screening]).to_csv(new, index=False)
+    assert len(load_side(new)) == 15
+
+    output_dir = str(tmp_path / "diff")
+    assert main([base, new, "--output-dir", output_dir, "--fail-on-regression"]) == 0
+    assert "0 significant regressions" in capsys.readouterr().out
+
+    iteration("current", np.array(BASE) * 1.5).to_csv(new, index=False)
+    assert main([base, new, "--output-dir", output_dir, "--fail-on-regression", "--plots", "1"]) == 1
+    assert os.listdir(os.path.join(output_dir, "overlays")) == ["mesh_4x4_XY_TRAFFIC_RANDOM.png"]
+    assert len(pd.read_csv(os.path.join(output_dir, "points.csv"))) == 5
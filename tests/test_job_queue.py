@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from conftest import BASE_CONFIG
+from job_queue import DONE, FAILED, LEASED, PENDING, JobQueue, point_jobs, work
+
+OK = {"status": "ok", "metrics": {"Average Delay": 1.0}, "wall_time": 0.1}
+
+
+@pytest.fixture
+def queue(tmp_path, make_options, points):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    queue.submit(point_jobs(BASE_CONFIG, points, make_options()))
+    yield queue
+    queue.close()
+
+
+def statuses(queue):
+    return [row[0] for row in queue._db.execute("SELECT status FROM jobs ORDER BY id")]
+
+
+def test_submit_is_idempotent(queue, make_options, points):
+    assert queue.submit(point_jobs(BASE_CONFIG, points, make_options())) == 0
+    assert statuses(queue) == [PENDING] * 3
+
+
+def test_leases_are_exclusive(queue):
+    a = queue.lease("a", lease_seconds=60)
+    b = queue.lease("b", lease_seconds=60)
+    assert a["id"] != b["id"]
+    assert queue.heartbeat(a["id"], "a", 60)
+    assert not queue.heartbeat(a["id"], "b", 60)
+    assert not queue.finish(a["id"], "b", OK)
+    assert queue.finish(a["id"], "a", OK)
+    assert statuses(queue).count(DONE) == 1
+
+
+def test_expired_lease_is_stolen(queue):
+    job = queue.lease("a", lease_seconds=-1)
+    stolen = queue.lease("b", lease_seconds=60)
+    assert stolen["id"] == job["id"]
+
+    # The first worker lost the job: it can neither renew nor complete it
+    assert not queue.heartbeat(job["id"], "a", 60)
+    assert not queue.finish(job["id"], "a", OK)
+    assert queue.finish(job["id"], "b", OK)
+    assert statuses(queue)[0] == DONE
+
+
+def test_jobs_that_keep_failing_are_parked(queue):
+    for attempt in range(2):
+        job = queue.lease("a", max_attempts=2)
+        assert job["attempts"] == attempt
+        queue.finish(job["id"], "a", {"status": "failed", "error": "boom"}, max_attempts=2)
+    assert statuses(queue) == [FAILED, PENDING, PENDING]
+    assert queue.requeue() == 1
+    assert statuses(queue) == [PENDING] * 3
+
+
+def test_abandoned_leases_fail_after_max_attempts(queue):
+    for _ in range(2):
+        queue.lease("a", lease_seconds=-1, max_attempts=2)
+    job = queue.lease("b", lease_seconds=60, max_attempts=2)
+    assert statuses(queue)[0] == FAILED
+    assert job["id"] != 1 and statuses(queue).count(LEASED) == 1
+
+
+def test_work_drains_the_queue(queue, make_options, points):
+    options = make_options()
+    assert work(queue.path, options, wait=False, progress=None) == 3
+    assert statuses(queue) == [DONE] * 3
+    assert queue.unfinished() == 0
+    outputs = [row[0] for row in queue._db.execute("SELECT output FROM jobs")]
+    assert all(os.path.exists(path) for path in outputs)
+
+
+def test_queue_is_safe_for_shared_filesystems(tmp_path, make_options, points, monkeypatch):
+    # No WAL (it needs shared memory on one host), and paths that do not
+    # depend on the submitting shell's working directory
+    monkeypatch.chdir(tmp_path)
+    queue = JobQueue("queue.db")
+    try:
+        assert queue._db.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        queue.submit(point_jobs(BASE_CONFIG, points, make_options(results_dir="results")))
+        paths = queue._db.execute("SELECT config_path, output FROM jobs").fetchall()
+        assert all(os.path.isabs(path) for row in paths for path in row)
+        assert all(row[1].startswith(str(tmp_path / "results")) for row in paths)
+    finally:
+        queue.close()
@@ -0,0 +1,45 @@
+import os
+
+from conftest import BASE_CONFIG
+from extract_results import extract
+from log_archive import ARCHIVE_NAME, LogArchive, archive_tree, open_archive
+from sweep import run_sweep
+
+
+def test_add_and_read_round_trip(tmp_path):
+    archive = LogArchive(str(tmp_path / "archive"))
+    logs = {f"mesh_4x4/run_{i}.txt": f"% Total received packets: {i}\n".encode() * 50 for i in range(5)}
+    archive.add_many((run_id, data, None) for run_id, data in logs.items())
+    # The same content under another name is stored once
+    archive.add("Iter 1/mesh_4x4/run_0.txt", logs["mesh_4x4/run_0.txt"])
+
+    for run_id, data in logs.items():
+        assert archive.read(run_id) == data
+    assert archive.read("Iter 1/mesh_4x4/run_0.txt") == logs["mesh_4x4/run_0.txt"]
+    assert archive.read("missing.txt") is None
+    stats = archive.stats()
+    assert (stats["runs"], stats["blobs"]) == (6, 5)
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+
+    digests = {archive.digest(run_id): data for run_id, data in logs.items()}
+    assert dict(archive.read_many(digests)) == digests
+    archive.close()
+
+
+def test_extract_reads_archived_logs(make_options, points):
+    options = make_options()
+    run_sweep(BASE_CONFIG, points, options, progress=None)
+    results = options.results_dir
+    before = extract(results)
+
+    archive = LogArchive(os.path.join(results, ARCHIVE_NAME))
+    added, _, deleted = archive_tree(results, archive, delete=True, progress=None)
+    archive.close()
+    assert added == deleted == 3
+    assert not [name for name in os.listdir(os.path.join(results, "mesh_4x4")) if name.endswith(".txt")]
+
+    archive = open_archive(results)
+    assert len(archive.runs("mesh_4x4/*")) == 3
+    archive.close()
+    after = extract(results)
+    assert after == before
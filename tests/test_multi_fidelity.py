@@ -0,0 +1,56 @@
+import os
+
+from conftest import BASE_CONFIG
+from multi_fidelity import knee_estimate, run_multi_fidelity, score_points, select_promoted, stage_point
+from sweep import SweepPoint, output_path_for
+
+RATES = [0.01, 0.02, 0.05, 0.1, 0.15]
+
+
+def screened(delays, packets):
+    # Short-run metrics of one series: saturated from 0.05 on
+    return {
+        SweepPoint("mesh_4x4", "XY", "TRAFFIC_RANDOM", rate): {
+            "Average Delay": delay, "Throughput": min(rate, 0.045) * 100, "Received Packets": count,
+        }
+        for rate, delay, count in zip(RATES, delays, packets)
+    }
+
+
+def test_knee_is_between_the_last_idle_and_first_saturated_rate():
+    results = screened([14, 19, 125, 324, 393], [145, 290, 691, 691, 691])
+    curve = sorted((point.rate, metrics) for point, metrics in results.items())
+    assert knee_estimate(curve) == (0.02 + 0.05) / 2
+
+
+def test_idle_and_saturated_points_are_not_refined():
+    # The idle points have the fewest packets, i.e. the most uncertain
+    # estimates, but are nowhere near the knee at 0.035
+    results = screened([14, 19, 125, 324, 393], [145, 290, 691, 691, 691])
+    scores = score_points(results)
+
+    assert sorted(point.rate for point in scores) == [0.02, 0.05]
+    promoted = select_promoted(scores, 0.3, len(results))
+    assert sorted(point.rate for point in promoted) == [0.02, 0.05]
+    assert len(select_promoted(scores, 0.2, len(results))) == 1
+
+
+def test_screening_run_keeps_the_point_apart():
+    point = SweepPoint("mesh_4x4", "XY", "TRAFFIC_RANDOM", 0.05)
+    short = stage_point(point, 1000, 10000, 1000)
+    assert short.sim_time == 1000 and dict(short.overrides)["stats_warm_up_time"] == 100
+    assert short.name != point.name
+    assert stage_point(point, 10000, 10000, 1000) == point
+
+
+def test_only_promoted_points_run_at_full_length(make_options):
+    options = make_options()
+    points = [SweepPoint("mesh_4x4", "XY", "TRAFFIC_RANDOM", rate) for rate in RATES]
+    rows, cycles = run_multi_fidelity(BASE_CONFIG, points, [1000, None], [0.3], options, progress=None)
+
+    promoted = sorted(row["Injection Rate"] for row in rows if row["Promoted"])
+    assert promoted == [0.02, 0.05]
+    assert sorted(row["Injection Rate"] for row in rows if row["Stage"] == 1) == promoted
+    assert {row["Injection Rate"] for row in rows if row["Score"] is None} == {0.01, 0.1, 0.15}
+    assert cycles == 5 * (1000 + 1000) + 2 * (10000 + 1000)
+    assert [p.rate for p in points if os.path.exists(output_path_for(p, options))] == promoted
@@ -0,0 +1,48 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+import noxim_tools
+from conftest import FAKE_NOXIM
+
+SCRIPTS = os.path.dirname(FAKE_NOXIM)
+
+
+@pytest.fixture(autouse=True)
+def keep_argv(monkeypatch):
+    # main() rewrites sys.argv for the command's parser
+    monkeypatch.setattr(sys, "argv", ["noxim-tools"])
+
+
+def test_every_command_has_a_module():
+    for module, _ in noxim_tools.COMMANDS.values():
+        assert importlib.util.find_spec(module) is not None, module
+
+
+def test_help_lists_the_commands(capsys):
+    assert noxim_tools.main(["--help"]) == 0
+    out = capsys.readouterr().out
+    assert all(f"  {name} " in out for name in noxim_tools.COMMANDS)
+
+
+def test_unknown_command_is_an_error(capsys):
+    assert noxim_tools.main(["frobnicate"]) == 2
+    assert "unknown command 'frobnicate'" in capsys.readouterr().err
+
+
+def test_query_dispatches_to_its_module(tmp_path, capsys):
+    csv_path = tmp_path / "all_results.csv"
+    csv_path.write_text("Topology,Routing,Traffic,Injection Rate\nmesh_4x4,XY,TRAFFIC_RANDOM,0.01\n")
+    assert noxim_tools.main(["query", "--csv", str(csv_path), "list"]) == 0
+    assert "mesh_4x4" in capsys.readouterr().out
+    assert noxim_tools.main(["query", "--csv", str(tmp_path / "missing.csv"), "list"]) == 1
+
+
+def test_query_does_not_load_numpy_or_pandas():
+    code = ("import sys, noxim_tools; noxim_tools.main(['query', '--csv', 'missing.csv', 'list']); "
+            "print('numpy' in sys.modules, 'pandas' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
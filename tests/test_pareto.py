@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pareto import design_points, pareto_frontier, skyline
+
+
+def brute_force(points, groups):
+    # Rows not dominated by any other row of their group
+    keep = np.zeros(len(points), dtype=bool)
+    for i, p in enumerate(points):
+        if np.isnan(p).any():
+            continue
+        others = points[(groups == groups[i]) & ~np.isnan(points).any(axis=1)]
+        dominated = ((others <= p).all(axis=1) & (others < p).any(axis=1)).any()
+        keep[i] = not dominated
+    return keep
+
+
+@pytest.mark.parametrize("objectives", [1, 2, 3])
+def test_skyline_matches_brute_force(objectives):
+    rng = np.random.default_rng(objectives)
+    # Coarse values so that ties and exact duplicates occur
+    points = rng.integers(0, 8, size=(400, objectives)).astype(np.float64)
+    points[rng.choice(400, 10, replace=False), 0] = np.nan
+    groups = rng.integers(0, 4, size=400)
+
+    assert (skyline(points, groups) == brute_force(points, groups)).all()
+
+
+def test_skyline_without_groups():
+    points = [[1, 5], [2, 2], [5, 1], [3, 3], [2, 2]]
+    assert skyline(points).tolist() == [True, True, True, False, True]
+
+
+def test_skyline_rejects_too_many_objectives():
+    with pytest.raises(ValueError):
+        skyline(np.zeros((3, 4)))
+
+
+def test_frontier_keeps_designs_apart():
+    df = pd.DataFrame({
+        "Traffic": ["TRAFFIC_RANDOM"] * 4,
+        "Injection Rate": [0.1] * 4,
+        "Topology": ["mesh_4x4"] * 4,
+        "Routing": ["XY", "XY", "XY", "DYAD"],
+        "Design": [np.nan, np.nan, "ab12", np.nan],
+        "Average Delay": [10.0, 12.0, 5.0, 20.0],
+        "Throughput": [1.0, 1.0, 0.5, 2.0],
+    })
+    points = design_points(df, ["Average Delay", "Throughput"])
+    assert len(points) == 3
+    base = points[(points["Routing"] == "XY") & (points["Design"] == "")]
+    assert base["Average Delay"].tolist() == [11.0]
+
+    frontier = pareto_frontier(points, ["Average Delay", "Throughput"])
+    assert sorted(frontier["Design"] + frontier["Routing"]) == ["DYAD", "XY", "ab12XY"]
+    assert frontier["Rank"].min() == 1
@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+
+from plot_engine import ROUTING_PLOTS, build_jobs, render_plots
+
+RATES = [0.01, 0.05, 0.1]
+
+
+def frame(fidelity="full"):
+    rows = []
+    for routing in ("XY", "WEST_FIRST"):
+        for traffic in ("TRAFFIC_RANDOM", "TRAFFIC_TRANSPOSE1"):
+            for rate in RATES:
+                rows.append({
+                    "Topology": "mesh_4x4", "Routing": routing, "Traffic": traffic, "Injection Rate": rate,
+                    "Average Delay": 10 + 100 * rate, "Throughput": rate, "Fidelity": fidelity,
+                })
+    return pd.DataFrame(rows)
+
+
+def test_only_changed_figures_are_redrawn(tmp_path):
+    output_dir = str(tmp_path / "plots")
+    df = frame()
+    drawn = render_plots(df, ROUTING_PLOTS, output_dir, jobs=2, progress=None)
+    # Delay per traffic and per routing, throughput for random traffic only
+    assert sorted(os.path.basename(p) for p in drawn) == [
+        "delay_vs_rate_TRAFFIC_RANDOM.png", "delay_vs_rate_TRAFFIC_TRANSPOSE1.png",
+        "delay_vs_rate_routing_WEST_FIRST.png", "delay_vs_rate_routing_XY.png",
+        "throughput_vs_rate_TRAFFIC_RANDOM.png",
+    ]
+    assert all(os.path.getsize(p) > 0 for p in drawn)
+    assert render_plots(df, ROUTING_PLOTS, output_dir, jobs=1, progress=None) == []
+
+    df.loc[(df["Routing"] == "XY") & (df["Traffic"] == "TRAFFIC_TRANSPOSE1"), "Average Delay"] += 1
+    drawn = render_plots(df, ROUTING_PLOTS, output_dir, jobs=1, progress=None)
+    assert sorted(os.path.basename(p) for p in drawn) == [
+        "delay_vs_rate_TRAFFIC_TRANSPOSE1.png", "delay_vs_rate_routing_XY.png",
+    ]
+    assert len(render_plots(df, ROUTING_PLOTS, output_dir, jobs=1, force=True, progress=None)) == 5
+
+
+def test_screening_runs_are_not_plotted(tmp_path):
+    output_dir = str(tmp_path / "plots")
+    full = frame()
+    screening = frame("1000 cycles").assign(**{"Average Delay": 500.0})
+    digests = [job[4] for job in build_jobs(full, ROUTING_PLOTS, output_dir)]
+
+    assert [job[4] for job in build_jobs(pd.concat([full, screening]), ROUTING_PLOTS, output_dir)] == digests
+    assert build_jobs(screening, ROUTING_PLOTS, output_dir) == []
+
+
+def test_figures_are_cut_from_the_cube(tmp_path):
+    df = frame()
+    other_design = frame().assign(Design="dse_0001", **{"Average Delay": 500.0})
+    jobs = build_jobs(pd.concat([df.assign(Design=""), other_design]), ROUTING_PLOTS, str(tmp_path))
+
+    spec, facet_values, (labels, rates, values, metrics), _, _ = jobs[0]
+    assert facet_values == {"Traffic": "TRAFFIC_RANDOM"}
+    assert labels == ["WEST_FIRST", "XY"] and rates == RATES
+    assert values[:, :, metrics.index("Average Delay")].tolist() == [[10 + 100 * r for r in RATES]] * 2
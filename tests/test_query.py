@@ -0,0 +1,64 @@
+import csv
+
+import pytest
+
+import query
+from conftest import BASE_CONFIG
+from extract_results import FIELDNAMES, FULL_FIDELITY, compile_results
+from sweep import SweepPoint, run_sweep
+
+SERIES = ("mesh_4x4", "XY", "TRAFFIC_RANDOM")
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({"Topology": "mesh_4x4", "Routing": "XY", "Traffic": "TRAFFIC_RANDOM",
+                             "Iteration": "current", "Fidelity": FULL_FIDELITY, "Design": "", **row})
+    return str(path)
+
+
+@pytest.fixture
+def compiled(tmp_path):
+    # Two seeds per rate, saturating between 0.04 and 0.06, plus a screening
+    # run and a design-space sample that must not be averaged in
+    rows = []
+    for rate, delay, throughput in [(0.01, 20, 0.01), (0.02, 21, 0.02), (0.04, 24, 0.04),
+                                    (0.06, 300, 0.045), (0.08, 400, 0.045)]:
+        for seed, skew in ((1, -1), (2, 1)):
+            rows.append({"Injection Rate": rate, "Seed": seed, "Average Delay": delay + skew,
+                         "Throughput": throughput})
+    rows.append({"Injection Rate": 0.02, "Average Delay": 900, "Throughput": 0.001, "Fidelity": "1000 cycles"})
+    rows.append({"Injection Rate": 0.02, "Average Delay": 900, "Throughput": 0.001, "Design": "ab12"})
+    return write_csv(tmp_path / "all_results.csv", rows)
+
+
+def test_curve_averages_full_length_base_runs(compiled):
+    points = dict(query.curve(compiled, *SERIES))
+    assert sorted(points) == [0.01, 0.02, 0.04, 0.06, 0.08]
+    assert points[0.02] == {"Runs": 2, "Average Delay": 21, "Throughput": 0.02, "Energy Per Flit": None}
+    assert query.series(compiled) == {SERIES: 10}
+
+
+def test_saturation_is_bracketed_on_the_curve(compiled, tmp_path):
+    summary = query.saturation(*SERIES, results_dir=str(tmp_path), csv_path=compiled)
+    assert (summary["Lower Bound"], summary["Upper Bound"]) == (0.04, 0.06)
+    assert summary["Source"] == "all_results.csv"
+
+
+def test_screening_runs_are_left_out(make_options, points, tmp_path):
+    options = make_options()
+    run_sweep(BASE_CONFIG, points, options, progress=None)
+    screen = SweepPoint(*SERIES, 0.1, overrides=(("stats_warm_up_time", 100),), sim_time=1000)
+    run_sweep(BASE_CONFIG, [screen], options, progress=None)
+    output = str(tmp_path / "all_results.csv")
+    assert compile_results(options.results_dir, output)[0] == 4
+
+    with open(output, newline="") as f:
+        full = [row for row in csv.DictReader(f) if row["Fidelity"] == FULL_FIDELITY]
+    points = dict(query.curve(output, *SERIES))
+    assert [m["Runs"] for m in points.values()] == [1, 1, 1]
+    assert points[0.1]["Average Delay"] == float(next(r for r in full if r["Injection Rate"] == "0.1")["Average Delay"])
+    assert query.main(["--csv", output, "point", *SERIES, "0.1"]) == 0
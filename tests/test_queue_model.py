@@ -0,0 +1,53 @@
+import copy
+
+import pytest
+
+from conftest import BASE_CONFIG
+from queue_model import (
+    DEFAULT_CALIBRATION, base_config, calibrate, channel_profile, compiled_csvs, predict,
+    prescreen, read_compiled, record_delay_error,
+)
+from sweep import expand_points
+
+
+def test_random_traffic_hops_on_a_mesh():
+    hops, max_load, active = channel_profile("MESH", 16, (4, 4), "XY", "TRAFFIC_RANDOM")
+    # Mean Manhattan distance between distinct tiles of a 4x4 mesh is 8/3,
+    # plus the injection and ejection channels
+    assert hops == pytest.approx(2 + 8 / 3)
+    assert active == 16
+
+
+def test_delay_grows_towards_saturation():
+    config = dict(base_config(BASE_CONFIG), routing_algorithm="XY", traffic_distribution="TRAFFIC_RANDOM")
+    saturation = predict(config)["saturation_rate"]
+    p = predict(config, [0.1 * saturation, 0.5 * saturation, 0.9 * saturation, 1.5 * saturation])
+
+    assert p["delay"][0] < p["delay"][1] < p["delay"][2] < p["delay"][3] == float("inf")
+    assert p["rho"].tolist() == pytest.approx([0.1, 0.5, 0.9, 1.5])
+
+
+def test_calibration_offset_is_not_negative():
+    calibration = calibrate(read_compiled(compiled_csvs()))
+    for fit in calibration.values():
+        assert fit["offset"] >= 0
+        assert fit["queue"] >= 0
+    assert calibration["mesh"]["queue_fitted"]
+
+
+def test_delay_error_is_recorded_per_family():
+    calibration = {"mesh": {}, "delta": {}}
+    holdout = {"mesh": {"delay_mape": 0.4891, "delay_points": 24}, "delta": {"delay_mape": 0.04, "delay_points": 3}}
+    record_delay_error(calibration, holdout)
+    assert calibration == {"mesh": {"delay_error": 0.489}, "delta": {"delay_error": None}}
+
+
+@pytest.mark.parametrize("delay_error, skipped", [(0.489, [5.0]), (0.1, [0.0001, 5.0]), (None, [5.0])])
+def test_prescreen_skips_linear_points_only_with_a_good_delay_model(delay_error, skipped):
+    calibration = copy.deepcopy(DEFAULT_CALIBRATION)
+    calibration["mesh"]["delay_error"] = delay_error
+    points = expand_points("mesh_4x4", ["XY"], ["TRAFFIC_RANDOM"], [0.0001, 0.01, 5.0])
+    kept, dropped = prescreen(BASE_CONFIG, points, calibration=calibration)
+
+    assert [p.rate for p in dropped] == skipped
+    assert len(kept) + len(dropped) == 3
@@ -0,0 +1,37 @@
+from conftest import BASE_CONFIG
+from replication import ReplicaSet, annotate_replicas, run_replications
+from sweep import SweepPoint
+
+
+def record(seed, run, delay, throughput=0.05):
+    return {
+        "Iteration": "current", "Topology": "mesh_4x4", "Routing": "XY", "Traffic": "TRAFFIC_RANDOM",
+        "Injection Rate": 0.05, "Simulation Time": 10000, "Design": "", "Seed": seed, "Run": run,
+        "Average Delay": delay, "Throughput": throughput,
+    }
+
+
+def test_runs_of_one_log_are_not_replicas():
+    records = annotate_replicas([record(None, run, delay) for run, delay in enumerate([20.0, 30.0, 40.0])])
+    assert {r["Replicas"] for r in records} == {1}
+    assert {r["Delay CI"] for r in records} == {None}
+
+
+def test_runs_of_a_seed_are_averaged_before_the_ci():
+    # Seed 1 has two runs averaging 20, seeds 2 and 3 one run each
+    records = [record(1, 0, 10.0), record(1, 1, 30.0), record(2, 0, 22.0), record(3, 0, 18.0)]
+    annotate_replicas(records)
+    assert {r["Replicas"] for r in records} == {3}
+    # Samples 20, 22, 18: stdev 2, t(2) = 4.303
+    assert records[0]["Delay CI"] == round(4.303 * 2 / 3 ** 0.5, 6)
+    assert records[0]["Throughput CI"] == 0.0
+
+
+def test_replications_stop_once_the_ci_is_narrow(make_options):
+    replica_set = ReplicaSet(SweepPoint("mesh_4x4", "XY", "TRAFFIC_RANDOM", 0.01), max_replicas=6, rel_ci=0.5)
+    run_replications(BASE_CONFIG, [replica_set], make_options(), progress=None)
+
+    assert sorted(replica_set.samples) == [1, 2, 3]
+    summary = replica_set.summary()
+    assert summary["Converged"] and summary["Replicas"] == 3
+    assert summary["Delay CI"] <= 0.5 * summary["Average Delay"]
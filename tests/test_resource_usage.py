@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+
+import pytest
+
+import resource_usage
+from resource_usage import run_measured
+
+
+@pytest.fixture(params=[True, False], ids=["waitid", "polled"])
+def reaping(request, monkeypatch):
+    # Both ways of reaping the child; without waitid as on macOS before 3.13
+    if request.param and not hasattr(os, "waitid"):
+        pytest.skip("no os.waitid on this platform")
+    monkeypatch.setattr(resource_usage, "HAVE_WAITID", request.param)
+
+
+def test_usage_of_a_completed_run(reaping, tmp_path):
+    code = "import sys; print('hello'); sys.stderr.write('warn'); sys.exit(3)"
+    with open(tmp_path / "out.txt", "w") as out:
+        status, err, usage = run_measured([sys.executable, "-c", code], out)
+
+    assert status == 3 and usage["exit_status"] == 3
+    assert err == b"warn"
+    assert (tmp_path / "out.txt").read_text() == "hello\n"
+    assert usage["wall_time"] > 0 and usage["peak_rss_kb"] > 1000
+
+
+def test_timeout_kills_the_run(reaping, tmp_path):
+    start = time.monotonic()
+    with open(tmp_path / "out.txt", "w") as out:
+        status, _, usage = run_measured([sys.executable, "-c", "import time; time.sleep(10)"], out, timeout=0.3)
+
+    assert status is None
+    assert usage["exit_status"] == -9
+    assert time.monotonic() - start < 5
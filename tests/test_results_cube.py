@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from results_cube import ResultsCube
+from results_store import write_store
+
+
+def record(routing, traffic, rate, delay, iteration="current", fidelity="full", design="", seed=None):
+    return {"Iteration": iteration, "Topology": "mesh_4x4", "Routing": routing, "Traffic": traffic,
+            "Injection Rate": rate, "Seed": seed, "Run": 0, "Fidelity": fidelity, "Design": design,
+            "Received Packets": 100, "Average Delay": delay, "Throughput": rate, "Refined": False}
+
+
+RECORDS = [
+    record("XY", "TRAFFIC_RANDOM", 0.01, 10.0, seed=1),
+    record("XY", "TRAFFIC_RANDOM", 0.01, 14.0, seed=2),
+    record("XY", "TRAFFIC_RANDOM", 0.05, 30.0),
+    record("XY", "TRAFFIC_TRANSPOSE1", 0.01, 20.0),
+    record("DYAD", "TRAFFIC_RANDOM", 0.05, 25.0),
+    # None of these belong in the cube
+    record("XY", "TRAFFIC_RANDOM", 0.01, 99.0, iteration="Iter 1"),
+    record("XY", "TRAFFIC_RANDOM", 0.01, 99.0, fidelity="1000 cycles"),
+    record("XY", "TRAFFIC_RANDOM", 0.01, 99.0, design="dse_0001"),
+]
+
+
+def test_cube_averages_replicas_of_the_current_iteration():
+    cube = ResultsCube.from_frame(pd.DataFrame(RECORDS))
+
+    rates, delays = cube.series("mesh_4x4", "XY", "TRAFFIC_RANDOM", "Average Delay")
+    assert rates.tolist() == [0.01, 0.05]
+    assert delays.tolist() == [12.0, 30.0]
+    # DYAD was only run at 0.05
+    assert cube.series("mesh_4x4", "DYAD", "TRAFFIC_RANDOM", "Average Delay")[0].tolist() == [0.05]
+    assert np.isnan(cube.sel("Average Delay", Routing="DYAD", Injection_Rate=0.01)).all()
+
+
+def test_iteration_and_design_can_be_chosen():
+    df = pd.DataFrame(RECORDS)
+    assert ResultsCube.from_frame(df, iteration="Iter 1").to_records()[0]["Average Delay"] == 99.0
+    assert ResultsCube.from_frame(df, design="dse_0001").to_records()[0]["Average Delay"] == 99.0
+    # iteration=None takes the frame as one iteration
+    assert len(ResultsCube.from_frame(df, iteration=None).to_records()) == 4
+
+
+def test_reduce_collapses_an_axis():
+    cube = ResultsCube.from_frame(pd.DataFrame(RECORDS)).reduce("mean", over="Traffic")
+    assert cube.axes == ("Topology", "Routing", "Injection Rate")
+    assert cube.sel("Average Delay", Routing="XY", Injection_Rate=0.01)[0] == (12.0 + 20.0) / 2
+
+
+def test_store_and_frame_give_the_same_cube(tmp_path):
+    store = str(tmp_path / "store")
+    write_store(RECORDS, store)
+    from_store = ResultsCube.from_store(store)
+    from_frame = ResultsCube.from_frame(pd.DataFrame(RECORDS))
+
+    def cells(cube):
+        return sorted(((r["Routing"], r["Traffic"], r["Injection Rate"]), r["Average Delay"], r["Throughput"])
+                      for r in cube.to_records())
+
+    assert cells(from_store) == cells(from_frame)
@@ -0,0 +1,81 @@
+import shutil
+
+import numpy as np
+import pytest
+
+import results_store
+from results_store import SCHEMA, load_columns, load_frame, partition_dir, read_columns, read_schema, write_store
+
+
+def record(topology, routing, rate, delay, seed=None):
+    return {"Iteration": "current", "Topology": topology, "Routing": routing, "Traffic": "TRAFFIC_RANDOM",
+            "Injection Rate": rate, "Seed": seed, "Run": 0, "Fidelity": "full", "Design": "",
+            "Received Packets": 100, "Average Delay": delay, "Throughput": 0.5, "Refined": False}
+
+
+RECORDS = [
+    record("mesh_4x4", "XY", 0.01, 12.5),
+    record("mesh_4x4", "DYAD", 0.05, 30.0, seed=2),
+    record("mesh_8x8", "XY", 0.01, 20.25),
+]
+
+
+def test_round_trip(tmp_path):
+    store = str(tmp_path / "store")
+    assert write_store(RECORDS, store) == ["mesh_4x4", "mesh_8x8"]
+    df = load_frame(store).sort_values("Average Delay").reset_index(drop=True)
+
+    assert list(df.columns) == list(SCHEMA)
+    assert df["Topology"].astype(str).tolist() == ["mesh_4x4", "mesh_8x8", "mesh_4x4"]
+    assert df["Routing"].astype(str).tolist() == ["XY", "XY", "DYAD"]
+    assert df["Average Delay"].tolist() == [12.5, 20.25, 30.0]
+    # Missing values: -1 for integers, NaN for floats
+    assert df["Seed"].tolist() == [-1, -1, 2]
+    assert np.isnan(df["Max Delay"]).all()
+
+
+def test_where_and_partitions(tmp_path):
+    store = str(tmp_path / "store")
+    write_store(RECORDS, store)
+    data, categories = load_columns(store, ["Routing", "Average Delay"], where={"Routing": "XY"})
+    assert sorted(data["Average Delay"].tolist()) == [12.5, 20.25]
+    assert {categories["Routing"][c] for c in data["Routing"]} == {"XY"}
+
+    data, _ = load_columns(store, ["Average Delay"], topologies="mesh_8x8")
+    assert data["Average Delay"].tolist() == [20.25]
+
+
+def test_only_changed_partitions_are_rewritten(tmp_path):
+    store = str(tmp_path / "store")
+    write_store(RECORDS, store)
+    assert write_store(RECORDS, store) == []
+
+    changed = RECORDS[:2] + [record("mesh_8x8", "XY", 0.01, 21.0)]
+    assert write_store(changed, store) == ["mesh_8x8"]
+    assert write_store(RECORDS[:2], store) == ["mesh_8x8"]
+    assert set(read_schema(store)["partitions"]) == {"mesh_4x4"}
+
+
+def test_readers_never_see_a_half_written_store(tmp_path, monkeypatch):
+    store = str(tmp_path / "store")
+    write_store(RECORDS, store)
+    before = read_schema(store)
+
+    # A writer dying after the new labels went out leaves the old version readable
+    changed = RECORDS[:2] + [record("mesh_8x8", "ODD_EVEN", 0.01, 21.0)]
+    monkeypatch.setattr(results_store, "write_partition", lambda *args: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        write_store(changed, store)
+    monkeypatch.undo()
+    assert "ODD_EVEN" in read_schema(store)["categories"]["Routing"]
+    assert sorted(load_frame(store)["Average Delay"]) == [12.5, 20.25, 30.0]
+
+    # The version a slow reader started from is gone: it is told, not handed NaNs
+    write_store(changed, store)
+    with pytest.raises(FileNotFoundError):
+        read_columns(store, before, ["Average Delay"], "mesh_8x8", None)
+    assert sorted(load_frame(store)["Average Delay"]) == [12.5, 21.0, 30.0]
+
+    shutil.rmtree(partition_dir(store, "mesh_8x8", read_schema(store)))
+    with pytest.raises(FileNotFoundError):
+        load_columns(store, ["Average Delay"])
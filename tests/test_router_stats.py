@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+
+from conftest import BASE_CONFIG
+from router_stats import hotspots, load_router_stats, parse_router_stats, render_heatmaps, router_stats_path
+from sweep import expand_points, output_path_for, run_sweep
+
+RUN = """\tNoxim - the NoC Simulator
+% Total received packets: 20
+detailed = [
+%  src  dst delay avg delay max throughput energy received received
+ 1 0 10 20 0.01 0.5 4 32
+ 2 0 20 30 0.02 0.5 6 48
+ 0 3 5 8 0.03 0.7 10 80
+];
+max_delay = [
+ 30 0
+ 0 8
+];
+routed_flits = [
+ 100 50
+ 50 {routed}
+];
+Router id\tBuffer N\t\tBuffer E
+         \tMean\tMax\tMean\tMax
+0\t1.0\t2\t3.0\t4
+1\t\t\t0.5\t1
+2\t0\t0\t0\t0
+3\t2\t2\t2\t2
+% Global average delay (cycles): 10
+"""
+
+
+def test_two_runs_of_a_2x2_mesh(tmp_path):
+    log = tmp_path / "run.txt"
+    log.write_text(RUN.format(routed=200) + RUN.format(routed=400))
+    runs = parse_router_stats(str(log))
+    assert len(runs) == 2
+    arrays, shape = runs[0]
+
+    assert shape == (2, 2)
+    assert arrays["received_packets"].tolist() == [10, 0, 0, 10]
+    assert arrays["sent_packets"].tolist() == [10, 4, 6, 0]
+    # Packet-weighted: (4 * 10 + 6 * 20) / 10
+    assert arrays["delay_avg"][0] == 16 and np.isnan(arrays["delay_avg"][1])
+    assert arrays["delay_max"].tolist() == [30, 0, 0, 8]
+    assert arrays["buffer_mean"].tolist() == [2, 0.5, 0, 2]
+    assert arrays["buffer_max"].tolist() == [4, 1, 0, 2]
+    assert runs[1][0]["routed_flits"].tolist() == [100, 50, 50, 400]
+
+
+def test_detailed_sweep_stores_router_arrays(make_options, tmp_path):
+    options = make_options()
+    points = expand_points("mesh_4x4", ["XY"], ["TRAFFIC_HOTSPOT"], [0.02],
+                           overrides={"detailed": True, "show_buffer_stats": True})
+    assert run_sweep(BASE_CONFIG, points, options, progress=None)[0]["status"] == "ok"
+    npz = router_stats_path(output_path_for(points[0], options))
+    arrays, shape = load_router_stats(npz)
+
+    assert shape == (4, 4)
+    assert arrays["routed_flits"].shape == arrays["buffer_mean"].shape == (16,)
+    # fake_noxim loads the routers around the hotspot in the middle most
+    assert {node for node, *_ in hotspots(arrays["routed_flits"], shape, top=4)} == {5, 6, 9, 10}
+    assert hotspots(arrays["routed_flits"], shape, top=1)[0][1] in {(1, 1), (2, 1), (1, 2), (2, 2)}
+
+    png = render_heatmaps(arrays, shape, ["routed_flits", "buffer_mean"], str(tmp_path / "heat.png"))
+    assert os.path.getsize(png) > 0
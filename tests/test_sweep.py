@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import result_cache
+from conftest import BASE_CONFIG, FAKE_NOXIM
+from resource_usage import read_usage, usage_path
+from result_cache import ResultCache, binary_fingerprint, cache_key
+from sweep import output_path_for, run_config, run_sweep, write_point_config
+
+CONFIG = "topology: MESH\nmesh_dim_x: 4\nmesh_dim_y: 4\npacket_injection_rate: 0.1\n"
+
+
+def test_sweep_writes_one_log_per_point(make_options, points):
+    options = make_options()
+    outcomes = run_sweep(BASE_CONFIG, points, options, progress=None)
+
+    assert sorted(o["status"] for o in outcomes) == ["ok"] * 3
+    for outcome in outcomes:
+        path = output_path_for(outcome["point"], options)
+        assert outcome["output"] == path
+        assert outcome["metrics"]["Received Packets"] > 0
+        assert read_usage(path)["Wall Time"] is not None
+    leftovers = [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".part")]
+    assert leftovers == []
+
+
+def test_sweep_reports_failures_per_point(make_options, points):
+    options = make_options(sim_bin=os.path.join(os.path.dirname(FAKE_NOXIM), "no_such_noxim"), retries=0)
+    outcomes = run_sweep(BASE_CONFIG, points, options, progress=None)
+
+    assert [o["status"] for o in outcomes] == ["failed"] * 3
+    assert not any(os.path.exists(output_path_for(p, options)) for p in points)
+
+
+def test_sweep_times_out(make_options, points, monkeypatch):
+    monkeypatch.setenv("FAKE_NOXIM_SLEEP", "5")
+    options = make_options(timeout=0.5, retries=0)
+    outcomes = run_sweep(BASE_CONFIG, points[:1], options, progress=None)
+
+    assert outcomes[0]["status"] == "failed"
+    assert "timed out" in outcomes[0]["error"]
+
+
+def test_cache_hit_restores_log_and_usage(make_options, points, tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    options = make_options(cache=cache)
+    first = run_sweep(BASE_CONFIG, points, options, progress=None)
+    path = output_path_for(points[0], options)
+    with open(path) as f:
+        log = f.read()
+    os.remove(path)
+    os.remove(usage_path(path))
+
+    second = run_sweep(BASE_CONFIG, points, options, progress=None)
+    assert [o["status"] for o in second] == ["cached"] * 3
+    assert {o["point"]: o["metrics"] for o in second} == {o["point"]: o["metrics"] for o in first}
+    with open(path) as f:
+        assert f.read() == log
+    assert read_usage(path)["Wall Time"] is not None
+
+
+def test_cache_key_ignores_formatting():
+    fp = binary_fingerprint(FAKE_NOXIM)
+    key = cache_key(CONFIG, None, fp)
+    reformatted = "# comment\n" + CONFIG.replace(": ", ":   ").replace("0.1", "0.10")
+    assert cache_key(reformatted, None, fp) == key
+    assert cache_key(CONFIG, 1, fp) != key
+    assert cache_key(CONFIG, None, "other binary") != key
+    assert cache_key(CONFIG.replace("0.1", "0.2"), None, fp) != key
+
+
+def test_cache_misses_on_new_power_model_or_extra_args(make_options, points, tmp_path):
+    power = tmp_path / "power.yaml"
+    power.write_text("Energy:\n  flit: 1.0\n")
+    cache = ResultCache(str(tmp_path / "cache"))
+    options = make_options(cache=cache, power_file=str(power))
+    run_sweep(BASE_CONFIG, points[:1], options, progress=None)
+    assert run_sweep(BASE_CONFIG, points[:1], options, progress=None)[0]["status"] == "cached"
+
+    power.write_text("Energy:\n  flit: 2.25\n")
+    assert run_sweep(BASE_CONFIG, points[:1], options, progress=None)[0]["status"] == "ok"
+    options.extra_args = ["-sim", "20000"]
+    assert run_sweep(BASE_CONFIG, points[:1], options, progress=None)[0]["status"] == "ok"
+    assert run_sweep(BASE_CONFIG, points[:1], options, progress=None)[0]["status"] == "cached"
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(time=lambda: next(clock)))
+    log = tmp_path / "run.txt"
+    log.write_text("x" * 100)
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=300)
+    for key in "abc":
+        cache.put(key * 64, str(log), {"Average Delay": 1.0}, "fp")
+    # Using "aaa..." leaves "bbb..." the least recently used
+    assert cache.get("a" * 64) is not None
+    cache.put("d" * 64, str(log), {"Average Delay": 1.0}, "fp")
+
+    assert cache.get("b" * 64) is None
+    for key in "acd":
+        with open(cache.get(key * 64)["path"]) as f:
+            assert f.read() == "x" * 100
+    assert cache.stats()["entries"] == 3
+
+
+def test_cancel_kills_the_run(make_options, points, monkeypatch):
+    monkeypatch.setenv("FAKE_NOXIM_SLEEP", "5")
+    options = make_options()
+    with open(BASE_CONFIG) as f:
+        config_path, config_text = write_point_config(points[0], f.read(), options)
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    start = time.monotonic()
+    output_path = output_path_for(points[0], options)
+    outcome = run_config(config_path, config_text, None, output_path, options, cancel)
+
+    assert outcome["status"] == "failed" and outcome["error"] == "cancelled"
+    assert time.monotonic() - start < 4
+    # Neither a log nor a temporary file is left behind
+    assert os.listdir(os.path.dirname(output_path)) == ["configs"]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from conftest import BASE_CONFIG
+from traffic_table import main, map_tasks, scale_to_rate, trace_matrix, write_table
+
+
+def test_trace_is_folded_chunk_by_chunk(tmp_path):
+    trace = tmp_path / "trace.txt"
+    trace.write_text("# cycle src dst\n10 0 1\n11 0 1\n12 2 0\n13 1 2\n19 0 1\n")
+    whole, duration = trace_matrix(str(trace))
+    chunked, chunked_duration = trace_matrix(str(trace), chunk=2)
+
+    assert duration == chunked_duration == 10
+    assert (whole == chunked).all()
+    assert whole[0, 1] == 3 and whole[2, 0] == 1 and whole.sum() == 5
+    with pytest.raises(ValueError):
+        trace_matrix(str(trace), tasks=2)
+
+
+def test_center_mapping_puts_the_busiest_task_in_the_middle():
+    volume = np.array([[0, 1, 0], [1, 0, 9], [0, 9, 0]], dtype=np.float64)
+    mapped, placement = map_tasks(volume, 16, (4, 4), "center")
+
+    # Task 1 talks the most; tiles 5, 6, 9 and 10 are the middle of a 4x4 mesh
+    assert placement[1] in (5, 6, 9, 10)
+    assert mapped[placement[1], placement[2]] == 9
+    rates = scale_to_rate(mapped, 0.05)
+    assert rates.sum(axis=1).mean() == pytest.approx(0.05)
+
+
+def test_table_has_one_line_per_pair(tmp_path, monkeypatch):
+    monkeypatch.setattr("traffic_table.WRITE_CHUNK", 2)
+    rates = np.zeros((4, 4))
+    rates[0, 1], rates[1, 0], rates[2, 3] = 0.01, 0.02, 0.03
+    path = str(tmp_path / "t.txt")
+
+    assert write_table(path, rates, 0.01, header=["test"]) == 3
+    with open(path) as f:
+        assert f.read().splitlines() == ["% test", "0 1 0.01 0.01", "1 0 0.02 0.01", "2 3 0.03 0.01"]
+
+
+def test_cli_scales_a_matrix_to_the_rate(tmp_path, capsys):
+    matrix = tmp_path / "volumes.txt"
+    matrix.write_text("0,2\n2,0\n")
+    output = str(tmp_path / "t.txt")
+    assert main([BASE_CONFIG, "--matrix", str(matrix), "--rate", "0.1", "--output", output]) == 0
+
+    table = np.loadtxt(output, comments="%")
+    # Two busy tiles carry all of the 16 tiles' 0.1 mean rate
+    assert table[:, :2].tolist() == [[0, 1], [1, 0]]
+    assert table[:, 2].tolist() == [0.8, 0.8]
+    assert "Wrote 2 pairs" in capsys.readouterr().out